@@ -1,8 +1,10 @@
+import multiprocessing
 import queue
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from database.esquema_central import preparar_banco_central
 from database.sessao import sessao
 from services.licenca_online_service import verificar_licenca_online
 from telas.tela_login import TelaLogin
@@ -10,6 +12,8 @@ from utils.constantes import CORES
 
 
 def abrir_login():
+    preparar_banco_central()
+
     root = tk.Tk()
     root.withdraw()
 
@@ -59,4 +63,7 @@ def abrir_login():
 
 
 if __name__ == "__main__":
+    # Executável congelado: os processos da importação em lote de NFS-e
+    # reabrem o próprio .exe e precisam parar aqui
+    multiprocessing.freeze_support()
     abrir_login()
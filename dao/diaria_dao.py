@@ -1,6 +1,18 @@
 from database.empresa_conexao import get_conn_empresa
+from database.paginacao import clausula_ordem
 from datetime import datetime
 
+# Campos pelos quais a lista de diárias pode ser ordenada
+ORDENS_DIARIAS = {
+    "id": "id",
+    "diarista": "diarista COLLATE NOCASE",
+    "cpf": "cpf",
+    "qtd_diarias": "qtd_diarias",
+    "vlr_total": "vlr_total",
+    "descricao": "descricao",
+    "data_emissao": "data_emissao",
+}
+
 
 class DiariaDAO:
     def __init__(self):
@@ -84,16 +96,9 @@ class DiariaDAO:
         return cur.lastrowid
 
 
-    def listar_diarias(self, filtro_nome="", data_inicio=None, data_fim=None):
-        cur = self.conn.cursor()
-
-        sql = """
-            SELECT id, diarista, cpf, qtd_diarias, vlr_total,
-                descricao, data_emissao, caminho_arquivo
-            FROM diarias
-            WHERE 1=1
-        """
-
+    def _filtros_diarias(self, filtro_nome="", data_inicio=None, data_fim=None):
+        """Cláusulas WHERE (e parâmetros) comuns à listagem e à contagem."""
+        sql = " WHERE 1=1"
         params = []
 
         # 🔎 Filtro por nome ou CPF
@@ -108,7 +113,30 @@ class DiariaDAO:
             params.append(data_inicio)
             params.append(data_fim)
 
-        sql += " ORDER BY id DESC"
+        return sql, params
+
+    def listar_diarias(self, filtro_nome="", data_inicio=None, data_fim=None,
+                       ordem="id", descendente=True, apos=None, limite=None):
+        """Diárias ordenadas por um dos campos de ORDENS_DIARIAS (padrão: da
+        mais recente para a mais antiga).
+
+        Paginação: `apos` é (valor do campo de ordem, id) da última diária já
+        exibida e `limite` o tamanho da página; sem eles, devolve todas."""
+        cur = self.conn.cursor()
+
+        where, params = self._filtros_diarias(filtro_nome, data_inicio, data_fim)
+        cond, cond_params, order_by = clausula_ordem(ORDENS_DIARIAS, ordem,
+                                                     descendente, apos)
+        params += cond_params
+
+        sql = """
+            SELECT id, diarista, cpf, qtd_diarias, vlr_total,
+                descricao, data_emissao, caminho_arquivo
+            FROM diarias
+        """ + where + cond + order_by
+        if limite:
+            sql += " LIMIT ?"
+            params.append(limite)
 
         cur.execute(sql, params)
 
@@ -127,6 +155,13 @@ class DiariaDAO:
 
         return dados
 
+    def contar_diarias(self, filtro_nome="", data_inicio=None, data_fim=None):
+        """Total de diárias com os mesmos filtros de listar_diarias."""
+        cur = self.conn.cursor()
+        where, params = self._filtros_diarias(filtro_nome, data_inicio, data_fim)
+        cur.execute("SELECT COUNT(*) FROM diarias" + where, params)
+        return cur.fetchone()[0]
+
 
 
     
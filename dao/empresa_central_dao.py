@@ -1,8 +1,8 @@
 # dao/empresa_central_dao.py
 
-from database.conexao import garantir_banco
+from database.conexao import DB_DIR, garantir_banco
+from database.esquema_empresa import criar_banco_empresa
 import os
-import shutil
 
 
 class EmpresaCentralDAO:
@@ -35,7 +35,7 @@ class EmpresaCentralDAO:
         return None
 
     def cadastrar_empresa(self, nome_exibicao):
-        """Cria uma nova empresa copiando do modelo."""
+        """Cria uma nova empresa com um banco novo já no esquema atual."""
         cur = self.conn.cursor()
 
         try:
@@ -122,25 +122,13 @@ class EmpresaCentralDAO:
             return False
 
     def _criar_banco_empresa(self, empresa_id):
-        """Cria banco físico copiando do modelo."""
-        base_dir = r"T:\MTSistem\db\empresas"
-        modelo = r"T:\MTSistem\db\modelo_empresa.db"
-
-        os.makedirs(base_dir, exist_ok=True)
-
-        destino = os.path.join(base_dir, f"{empresa_id}.db")
-
-        if not os.path.exists(modelo):
-            raise FileNotFoundError(
-                f"Arquivo modelo não encontrado: {modelo}\n\n"
-                "Crie o arquivo modelo_empresa.db na pasta db/"
-            )
+        """Cria o banco físico da empresa aplicando as migrações do esquema."""
+        destino = os.path.join(DB_DIR, "empresas", f"{empresa_id}.db")
 
         if os.path.exists(destino):
             raise FileExistsError(f"Banco {empresa_id}.db já existe.")
 
-        shutil.copyfile(modelo, destino)
-        return destino
+        return criar_banco_empresa(destino)
 
     # ═════════════════════════════════════════════════════════════════════════
     # GERENCIAMENTO DE PERMISSÕES
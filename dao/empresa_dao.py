@@ -1,7 +1,7 @@
-import sqlite3
+from database.conexao import DB_DIR
 from database.empresa_conexao import get_conn_empresa # ajuste se seu projeto usar outro padrão
+from database.esquema_empresa import criar_banco_empresa
 import os
-import shutil
 class EmpresaDAO:
     def __init__(self):
         self.conn = get_conn_empresa()
@@ -83,11 +83,5 @@ class EmpresaDAO:
        
 
     def _criar_banco_empresa(self, empresa_id):
-        base_dir = r"T:\MTSistem\db\empresas"
-        os.makedirs(base_dir, exist_ok=True)
-
-        destino = os.path.join(base_dir, f"{empresa_id}.db")
-        modelo = r"T:\MTSistem\db\modelo_empresa.db"
-
-        shutil.copyfile(modelo, destino)
-   
\ No newline at end of file
+        destino = os.path.join(DB_DIR, "empresas", f"{empresa_id}.db")
+        criar_banco_empresa(destino)
@@ -1,5 +1,7 @@
 from datetime import datetime
 from database.empresa_conexao import get_conn_empresa
+from database.esquema_empresa import vincular_notas_orfas
+from database.paginacao import clausula_ordem
 
 
 def _dict(cur, row):
@@ -9,6 +11,58 @@ def _dict(cur, row):
     return dict(zip(colunas, row))
 
 
+# Campos pelos quais a listagem de notas pode ser ordenada (valores crus:
+# data ISO e valor REAL, cobertos por índices). A competência fica de fora:
+# MM/AAAA não ordena como texto.
+ORDENS_NOTAS = {
+    "numero": "nf.numero",
+    "emitente": "nf.emitente COLLATE NOCASE",
+    "data_emissao": "nf.data_emissao",
+    "valor": "nf.valor",
+    "status": "nf.status",
+}
+
+
+# Valores por consulta IN — abaixo do limite de 999 parâmetros de SQLites antigos
+_LOTE_IN = 500
+
+_MINUSCULAS_ASCII = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+                                  "abcdefghijklmnopqrstuvwxyz")
+
+
+def _norm(texto):
+    """O mesmo que LOWER(TRIM(x)) no SQLite (que só converte letras ASCII),
+    para comparar em Python com as chaves normalizadas do banco."""
+    return (texto or "").strip(" ").translate(_MINUSCULAS_ASCII)
+
+
+def _chave_emitente(nome, cnpj_cpf):
+    """(nome_norm, cnpj normalizado) como upsert_fornecedor_auto compara."""
+    return _norm((nome or "").strip()), _norm((cnpj_cpf or "").strip())
+
+
+def _blocos(valores, tamanho=_LOTE_IN):
+    valores = list(valores)
+    for i in range(0, len(valores), tamanho):
+        yield valores[i:i + tamanho]
+
+
+# Colunas gravadas pela importação em lote (inserir_notas_lote)
+_COLUNAS_IMPORTACAO = ("fornecedor_id", "numero", "emitente", "cnpj_cpf",
+                       "descricao_servico", "valor", "data_emissao",
+                       "competencia", "chave_acesso")
+
+
+# Nota ↔ fornecedor: mesmo nome normalizado, preferindo o mesmo CNPJ/CPF
+# quando há homônimos (usa o índice de fornecedores.nome_norm).
+_SQL_FORNECEDOR_DA_NOTA = """
+    SELECT id FROM fornecedores
+    WHERE nome_norm = LOWER(TRIM(?))
+    ORDER BY (COALESCE(cnpj_cpf,'') = COALESCE(?,'')) DESC, id
+    LIMIT 1
+"""
+
+
 class NotasFiscaisDAO:
     def __init__(self):
         self.conn = get_conn_empresa()
@@ -24,7 +78,7 @@ class NotasFiscaisDAO:
                    SUM(nf.valor) as valor_total,
                    SUM(CASE WHEN nf.pago=0 THEN nf.valor ELSE 0 END) as valor_pendente
             FROM fornecedores f
-            LEFT JOIN notas_fiscais nf ON LOWER(TRIM(nf.emitente)) = LOWER(TRIM(f.nome))
+            LEFT JOIN notas_fiscais nf ON nf.fornecedor_id = f.id
             WHERE 1=1
         """
         params = []
@@ -46,7 +100,7 @@ class NotasFiscaisDAO:
         cur = self.conn.cursor()
         cur.execute(
             """SELECT id FROM fornecedores
-               WHERE LOWER(TRIM(nome)) = LOWER(TRIM(?))
+               WHERE nome_norm = LOWER(TRIM(?))
                AND LOWER(TRIM(COALESCE(cnpj_cpf,''))) = LOWER(TRIM(COALESCE(?,'')))""",
             (dados.get('nome', ''), dados.get('cnpj_cpf', '') or '')
         )
@@ -82,6 +136,7 @@ class NotasFiscaisDAO:
 
     def excluir_fornecedor(self, forn_id):
         cur = self.conn.cursor()
+        cur.execute("UPDATE notas_fiscais SET fornecedor_id = NULL WHERE fornecedor_id=?", (forn_id,))
         cur.execute("DELETE FROM fornecedores WHERE id=?", (forn_id,))
         self.conn.commit()
 
@@ -94,7 +149,7 @@ class NotasFiscaisDAO:
         cur = self.conn.cursor()
         cur.execute(
             """SELECT id FROM fornecedores
-               WHERE LOWER(TRIM(nome)) = LOWER(TRIM(?))
+               WHERE nome_norm = LOWER(TRIM(?))
                AND LOWER(TRIM(COALESCE(cnpj_cpf,''))) = LOWER(TRIM(COALESCE(?,'')))""",
             (nome, cnpj_cpf)
         )
@@ -105,8 +160,10 @@ class NotasFiscaisDAO:
             "INSERT INTO fornecedores (nome, cnpj_cpf) VALUES (?,?)",
             (nome, cnpj_cpf)
         )
+        forn_id = cur.lastrowid
+        vincular_notas_orfas(cur, [_norm(nome)])
         self.conn.commit()
-        return cur.lastrowid
+        return forn_id
 
     def listar_fornecedores_select(self):
         """Lista simplificada para dropdowns/autocomplete."""
@@ -115,10 +172,16 @@ class NotasFiscaisDAO:
         return [_dict(cur, r) for r in cur.fetchall()]
 
     def importar_emitentes_das_notas(self):
-        """Migra emitentes das notas existentes para a tabela de fornecedores."""
+        """Migra emitentes das notas ainda sem fornecedor para a tabela de
+        fornecedores e vincula essas notas."""
         cur = self.conn.cursor()
-        cur.execute("SELECT DISTINCT emitente, cnpj_cpf FROM notas_fiscais WHERE emitente != ''")
+        cur.execute(
+            """SELECT DISTINCT emitente, cnpj_cpf FROM notas_fiscais
+               WHERE fornecedor_id IS NULL AND emitente != ''"""
+        )
         notas = cur.fetchall()
+        if not notas:
+            return
         for emitente, cnpj_cpf in notas:
             try:
                 cur.execute(
@@ -127,35 +190,32 @@ class NotasFiscaisDAO:
                 )
             except Exception:
                 pass
+        vincular_notas_orfas(cur)
         self.conn.commit()
 
+    def _fornecedor_id(self, cur, emitente, cnpj_cpf):
+        cur.execute(_SQL_FORNECEDOR_DA_NOTA, (emitente or "", cnpj_cpf or ""))
+        row = cur.fetchone()
+        return row[0] if row else None
+
     # ─────────────────────────────────────────────────────────────────────────
     # NOTAS FISCAIS
     # ─────────────────────────────────────────────────────────────────────────
 
-    def listar_notas(self, filtro_status=None, busca=None,
-                     emitente_id=None, data_ini=None, data_fim=None):
-        """filtro_status: None (todos) | "pendente" (sem recibo e sem pagamento)
-        | "ok" (recibo anexado, ainda não marcada como paga) | "pago"."""
-        sql = """
-            SELECT nf.*,
-                   COUNT(r.id) as qtd_recibos
-            FROM notas_fiscais nf
-            LEFT JOIN recibos r ON r.nota_id = nf.id
-            WHERE 1=1
-        """
+    def _filtros_notas(self, filtro_status=None, busca=None,
+                       emitente_id=None, data_ini=None, data_fim=None):
+        """Cláusulas WHERE (e parâmetros) comuns à listagem e aos totais."""
+        sql = " WHERE 1=1"
         params = []
-        if filtro_status in ("pendente", "ok"):
-            sql += " AND nf.pago = 0"
-        elif filtro_status == "pago":
-            sql += " AND nf.pago = 1"
+        if filtro_status in ("pendente", "ok", "pago"):
+            sql += " AND nf.status = ?"
+            params.append(filtro_status)
         if busca:
             sql += " AND (nf.numero LIKE ? OR nf.emitente LIKE ? OR nf.descricao_servico LIKE ?)"
             b = f"%{busca}%"
             params += [b, b, b]
         if emitente_id:
-            sql += """ AND LOWER(TRIM(nf.emitente)) = (
-                SELECT LOWER(TRIM(nome)) FROM fornecedores WHERE id=?)"""
+            sql += " AND nf.fornecedor_id = ?"
             params.append(emitente_id)
         if data_ini:
             sql += " AND nf.data_emissao >= ?"
@@ -163,12 +223,30 @@ class NotasFiscaisDAO:
         if data_fim:
             sql += " AND nf.data_emissao <= ?"
             params.append(data_fim)
-        sql += " GROUP BY nf.id"
-        if filtro_status == "pendente":
-            sql += " HAVING qtd_recibos = 0"
-        elif filtro_status == "ok":
-            sql += " HAVING qtd_recibos > 0"
-        sql += " ORDER BY nf.data_emissao DESC, nf.id DESC"
+        return sql, params
+
+    def listar_notas(self, filtro_status=None, busca=None,
+                     emitente_id=None, data_ini=None, data_fim=None,
+                     ordem="data_emissao", descendente=True,
+                     apos=None, limite=None):
+        """filtro_status: None (todos) | "pendente" (sem recibo e sem pagamento)
+        | "ok" (recibo anexado, ainda não marcada como paga) | "pago".
+
+        qtd_recibos e status são colunas mantidas por triggers (migração 4).
+
+        ordem: um dos campos de ORDENS_NOTAS (desempate pelo id, no mesmo
+        sentido). Paginação: `apos` é (valor do campo de ordem, id) da última
+        nota já exibida e `limite` o tamanho da página; sem eles, devolve
+        todas as notas."""
+        where, params = self._filtros_notas(filtro_status, busca, emitente_id,
+                                            data_ini, data_fim)
+        cond, cond_params, order_by = clausula_ordem(
+            ORDENS_NOTAS, ordem, descendente, apos, coluna_id="nf.id")
+        sql = "SELECT nf.* FROM notas_fiscais nf" + where + cond + order_by
+        params += cond_params
+        if limite:
+            sql += " LIMIT ?"
+            params.append(limite)
         cur = self.conn.cursor()
         cur.execute(sql, params)
         return [_dict(cur, r) for r in cur.fetchall()]
@@ -202,8 +280,62 @@ class NotasFiscaisDAO:
                 return _dict(cur, row)
         return None
 
+    def buscar_notas_duplicadas(self, notas):
+        """Versão em lote de buscar_nota_duplicada, para a importação de
+        muitos arquivos: em vez de uma ou duas consultas por nota, uma
+        consulta IN por bloco de chaves de acesso e outra por bloco de
+        (número, emitente).
+
+        notas: dicts com numero, emitente e _chave_acesso (como os devolvidos
+        pelo nfse_importer). Devolve uma lista alinhada com `notas`: a nota
+        já cadastrada ou None."""
+        cur = self.conn.cursor()
+
+        por_chave = {}
+        chaves = {n.get("_chave_acesso") for n in notas if n.get("_chave_acesso")}
+        for bloco in _blocos(chaves):
+            cur.execute(
+                f"SELECT * FROM notas_fiscais WHERE chave_acesso IN ({','.join('?' * len(bloco))})",
+                bloco
+            )
+            for row in cur.fetchall():
+                nota = _dict(cur, row)
+                por_chave.setdefault(nota["chave_acesso"], nota)
+
+        por_numero = {}
+        pares = {(_norm(n.get("emitente")), _norm(n.get("numero")))
+                 for n in notas if n.get("numero") and n.get("emitente")}
+        for bloco in _blocos(pares):
+            emitentes = sorted({e for e, _ in bloco})
+            numeros = sorted({num for _, num in bloco})
+            # Usa idx_nf_duplicidade; o produto cartesiano dos dois IN é
+            # filtrado abaixo pelos pares de fato pedidos
+            cur.execute(
+                f"""SELECT * FROM notas_fiscais
+                    WHERE LOWER(TRIM(emitente)) IN ({','.join('?' * len(emitentes))})
+                    AND LOWER(TRIM(numero)) IN ({','.join('?' * len(numeros))})""",
+                emitentes + numeros
+            )
+            for row in cur.fetchall():
+                nota = _dict(cur, row)
+                par = (_norm(nota["emitente"]), _norm(nota["numero"]))
+                if par in pares:
+                    por_numero.setdefault(par, nota)
+
+        resultado = []
+        for n in notas:
+            dup = por_chave.get(n.get("_chave_acesso")) if n.get("_chave_acesso") else None
+            if dup is None and n.get("numero") and n.get("emitente"):
+                dup = por_numero.get((_norm(n["emitente"]), _norm(n["numero"])))
+            resultado.append(dup)
+        return resultado
+
     def inserir_nota(self, dados: dict):
         cur = self.conn.cursor()
+        if not dados.get("fornecedor_id"):
+            dados = dict(dados)
+            dados["fornecedor_id"] = self._fornecedor_id(
+                cur, dados.get("emitente"), dados.get("cnpj_cpf"))
         cols = ", ".join(dados.keys())
         placeholders = ", ".join(["?"] * len(dados))
         cur.execute(
@@ -213,11 +345,78 @@ class NotasFiscaisDAO:
         self.conn.commit()
         return cur.lastrowid
 
+    def inserir_notas_lote(self, notas):
+        """Grava várias notas numa única transação (importação em lote).
+
+        Cada nota tem as chaves de _COLUNAS_IMPORTACAO (fornecedor_id é
+        resolvido aqui, criando os fornecedores que faltam como faria
+        upsert_fornecedor_auto). Devolve a quantidade de notas gravadas;
+        em caso de erro desfaz tudo e repassa a exceção."""
+        if not notas:
+            return 0
+        cur = self.conn.cursor()
+        try:
+            if not self.conn.in_transaction:
+                cur.execute("BEGIN IMMEDIATE")
+            fornecedores = self._fornecedores_do_lote(cur, notas)
+            cur.executemany(
+                f"INSERT INTO notas_fiscais ({', '.join(_COLUNAS_IMPORTACAO)}) "
+                f"VALUES ({', '.join('?' * len(_COLUNAS_IMPORTACAO))})",
+                [
+                    [fornecedores.get(_chave_emitente(n.get("emitente"), n.get("cnpj_cpf")))]
+                    + [n.get(c) for c in _COLUNAS_IMPORTACAO[1:]]
+                    for n in notas
+                ]
+            )
+            self.conn.commit()
+            return len(notas)
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _fornecedores_do_lote(self, cur, notas):
+        """{(nome_norm, cnpj_norm): id} dos emitentes das notas, inserindo
+        os fornecedores que ainda não existem (sem commit)."""
+        pedidos = {}
+        for n in notas:
+            nome = (n.get("emitente") or "").strip()
+            if nome:
+                cnpj = (n.get("cnpj_cpf") or "").strip()
+                pedidos.setdefault(_chave_emitente(nome, cnpj), (nome, cnpj))
+
+        def _carregar():
+            encontrados = {}
+            for bloco in _blocos({nome for nome, _ in pedidos}):
+                cur.execute(
+                    f"""SELECT id, nome_norm, LOWER(TRIM(COALESCE(cnpj_cpf,'')))
+                        FROM fornecedores
+                        WHERE nome_norm IN ({','.join('?' * len(bloco))})
+                        ORDER BY id""",
+                    bloco
+                )
+                for forn_id, nome_norm, cnpj_norm in cur.fetchall():
+                    encontrados.setdefault((nome_norm, cnpj_norm), forn_id)
+            return encontrados
+
+        ids = _carregar()
+        faltando = [pedidos[k] for k in pedidos if k not in ids]
+        if faltando:
+            cur.executemany(
+                "INSERT OR IGNORE INTO fornecedores (nome, cnpj_cpf) VALUES (?,?)",
+                faltando
+            )
+            vincular_notas_orfas(cur, [_norm(nome) for nome, _ in faltando])
+            ids = _carregar()
+        return ids
+
     def atualizar_nota(self, nota_id, dados: dict):
         dados = dict(dados)
         dados["atualizado_em"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sets = ", ".join([f"{k} = ?" for k in dados.keys()])
         cur = self.conn.cursor()
+        if "emitente" in dados and "fornecedor_id" not in dados:
+            dados["fornecedor_id"] = self._fornecedor_id(
+                cur, dados["emitente"], dados.get("cnpj_cpf"))
+        sets = ", ".join([f"{k} = ?" for k in dados.keys()])
         cur.execute(f"UPDATE notas_fiscais SET {sets} WHERE id = ?",
                     list(dados.values()) + [nota_id])
         self.conn.commit()
@@ -278,23 +477,26 @@ class NotasFiscaisDAO:
     # ESTATÍSTICAS
     # ─────────────────────────────────────────────────────────────────────────
 
-    def get_stats(self):
+    def get_stats(self, busca=None, emitente_id=None, data_ini=None, data_fim=None):
+        """Totais dos cards da tela, com os mesmos filtros de listar_notas."""
+        where, params = self._filtros_notas(None, busca, emitente_id, data_ini, data_fim)
         cur = self.conn.cursor()
-        cur.execute("""
-            SELECT
-                COUNT(*) as total,
-                SUM(CASE WHEN pago=0 AND qtd_recibos=0 THEN 1 ELSE 0 END) as pendentes,
-                SUM(CASE WHEN pago=0 AND qtd_recibos>0 THEN 1 ELSE 0 END) as ok,
-                SUM(CASE WHEN pago=1 THEN 1 ELSE 0 END) as pagos,
-                SUM(CASE WHEN pago=0 AND qtd_recibos=0 THEN valor ELSE 0 END) as valor_pendente,
-                SUM(CASE WHEN pago=0 AND qtd_recibos>0 THEN valor ELSE 0 END) as valor_ok,
-                SUM(CASE WHEN pago=1 THEN valor ELSE 0 END) as valor_pago,
-                SUM(valor) as valor_total
-            FROM (
-                SELECT nf.*, COUNT(r.id) as qtd_recibos
-                FROM notas_fiscais nf
-                LEFT JOIN recibos r ON r.nota_id = nf.id
-                GROUP BY nf.id
-            )
-        """)
-        return _dict(cur, cur.fetchone())
+        cur.execute(
+            "SELECT nf.status, COUNT(*), SUM(nf.valor) FROM notas_fiscais nf"
+            + where + " GROUP BY nf.status",
+            params
+        )
+        por_status = {status: (qtd, valor or 0) for status, qtd, valor in cur.fetchall()}
+        pend = por_status.get("pendente", (0, 0))
+        ok = por_status.get("ok", (0, 0))
+        pago = por_status.get("pago", (0, 0))
+        return {
+            "total": pend[0] + ok[0] + pago[0],
+            "pendentes": pend[0],
+            "ok": ok[0],
+            "pagos": pago[0],
+            "valor_pendente": pend[1],
+            "valor_ok": ok[1],
+            "valor_pago": pago[1],
+            "valor_total": pend[1] + ok[1] + pago[1],
+        }
@@ -2,6 +2,20 @@ import sqlite3
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from database.empresa_conexao import get_conn_empresa
+from database.paginacao import clausula_ordem
+
+# Campos pelos quais a lista de produções pode ser ordenada (valores crus:
+# datas ISO e totais REAL, com índices da migração 6; o nome sem
+# diferenciar maiúsculas, como a tela sempre ordenou)
+ORDENS_PRODUCOES = {
+    "nome": "cc.centro COLLATE NOCASE",
+    "status": "p.status",
+    "data_inicio": "p.data_inicio",
+    "data_fim": "p.data_fim",
+    "total_sacos": "p.total_sacos",
+    "valor_total": "p.valor_total",
+    "created_at": "p.created_at",
+}
 
 
 class ProducaoDAO:
@@ -54,10 +68,42 @@ class ProducaoDAO:
             print(f"Erro ao atualizar valor do saco: {e}")
             return False
 
-    def listar_producoes(self, apenas_abertas: bool = False) -> List[Dict]:
-        """Lista todas as produções com o nome do centro de custo"""
+    def _filtros_producoes(self, apenas_abertas=False, status=None,
+                           busca_nome=None, busca_data=None):
+        """Cláusulas WHERE (e parâmetros) comuns à listagem e à contagem."""
+        sql = " WHERE 1=1"
+        params = []
+        if apenas_abertas:
+            status = "aberta"
+        if status:
+            sql += " AND p.status = ?"
+            params.append(status)
+        if busca_nome:
+            sql += " AND cc.centro LIKE ?"
+            params.append(f"%{busca_nome}%")
+        if busca_data:
+            # Busca parcial na data como a tela mostra: "04-2025" acha "10-04-2025"
+            sql += " AND strftime('%d-%m-%Y', p.data_inicio) LIKE ?"
+            params.append(f"%{busca_data}%")
+        return sql, params
+
+    def listar_producoes(self, apenas_abertas: bool = False, status: Optional[str] = None,
+                         busca_nome: Optional[str] = None, busca_data: Optional[str] = None,
+                         ordem: str = "created_at", descendente: bool = True,
+                         apos: Optional[Tuple] = None,
+                         limite: Optional[int] = None) -> List[Dict]:
+        """Lista as produções com o nome do centro de custo.
+
+        ordem: um dos campos de ORDENS_PRODUCOES (desempate pelo id).
+        Paginação: `apos` é (valor do campo de ordem, id) da última produção
+        já exibida e `limite` o tamanho da página."""
         cursor = self.conn.cursor()
 
+        where, params = self._filtros_producoes(apenas_abertas, status,
+                                                busca_nome, busca_data)
+        cond, cond_params, order_by = clausula_ordem(
+            ORDENS_PRODUCOES, ordem, descendente, apos, coluna_id="p.id")
+
         query = """
             SELECT
                 p.id,
@@ -73,15 +119,30 @@ class ProducaoDAO:
                 p.created_at
             FROM producoes p
             JOIN centros_custo cc ON cc.id = p.centro_custo_id
-        """
-        if apenas_abertas:
-            query += " WHERE p.status = 'aberta'"
-        query += " ORDER BY p.created_at DESC"
+        """ + where + cond + order_by
+        params += cond_params
+        if limite:
+            query += " LIMIT ?"
+            params.append(limite)
 
-        cursor.execute(query)
+        cursor.execute(query, params)
         colunas = [desc[0] for desc in cursor.description]
         return [dict(zip(colunas, row)) for row in cursor.fetchall()]
 
+    def contar_producoes(self, apenas_abertas: bool = False, status: Optional[str] = None,
+                         busca_nome: Optional[str] = None,
+                         busca_data: Optional[str] = None) -> int:
+        """Total de produções com os mesmos filtros de listar_producoes."""
+        where, params = self._filtros_producoes(apenas_abertas, status,
+                                                busca_nome, busca_data)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM producoes p"
+            " JOIN centros_custo cc ON cc.id = p.centro_custo_id" + where,
+            params
+        )
+        return cursor.fetchone()[0]
+
     def get_producao(self, producao_id: int) -> Optional[Dict]:
         """Retorna detalhes de uma produção com o nome do centro de custo"""
         cursor = self.conn.cursor()
@@ -108,29 +169,22 @@ class ProducaoDAO:
         return dict(zip(colunas, row)) if row else None
 
     def excluir_producao(self, producao_id: int) -> bool:
-        """Exclui uma produção e todos os seus dados relacionados"""
+        """Exclui uma produção e todos os seus dados relacionados
+        (poucos DELETEs por conjunto, numa única transação)"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-
-            cursor.execute("SELECT id FROM producao_dias WHERE producao_id = ?", (producao_id,))
-            dias = cursor.fetchall()
-
-            for dia_row in dias:
-                dia_id = dia_row[0]
-                cursor.execute(
-                    "SELECT id FROM producao_divisoes WHERE producao_dia_id = ?", (dia_id,))
-                divisoes = cursor.fetchall()
-
-                for divisao_row in divisoes:
-                    divisao_id = divisao_row[0]
-                    cursor.execute(
-                        "DELETE FROM producao_participantes WHERE producao_divisao_id = ?",
-                        (divisao_id,))
-
-                cursor.execute(
-                    "DELETE FROM producao_divisoes WHERE producao_dia_id = ?", (dia_id,))
-
+            cursor.execute(
+                """DELETE FROM producao_participantes
+                   WHERE producao_divisao_id IN (
+                       SELECT pd.id FROM producao_divisoes pd
+                       JOIN producao_dias pdia ON pdia.id = pd.producao_dia_id
+                       WHERE pdia.producao_id = ?)""",
+                (producao_id,))
+            cursor.execute(
+                """DELETE FROM producao_divisoes
+                   WHERE producao_dia_id IN (
+                       SELECT id FROM producao_dias WHERE producao_id = ?)""",
+                (producao_id,))
             cursor.execute("DELETE FROM producao_dias WHERE producao_id = ?", (producao_id,))
             cursor.execute(
                 "DELETE FROM producao_totais_diarista WHERE producao_id = ?", (producao_id,))
@@ -139,32 +193,21 @@ class ProducaoDAO:
             self.conn.commit()
             return True
         except Exception as e:
+            self.conn.rollback()
             print(f"Erro ao excluir produção: {e}")
             import traceback
             traceback.print_exc()
             return False
 
     def fechar_producao(self, producao_id: int, data_fim: str) -> bool:
-        """Fecha uma produção e calcula totais"""
+        """Fecha uma produção (os totais já são mantidos a cada dia lançado)"""
         try:
             cursor = self.conn.cursor()
-
-            cursor.execute(
-                """SELECT SUM(pd.total_sacos_dia), SUM(pd.total_sacos_dia * pd.valor_saco)
-                   FROM producao_dias pd
-                   WHERE pd.producao_id = ?""",
-                (producao_id,)
-            )
-            total_sacos, valor_total = cursor.fetchone()
-            total_sacos = total_sacos or 0
-            valor_total = valor_total or 0.0
-
             cursor.execute(
                 """UPDATE producoes
-                   SET status = 'fechada', data_fim = ?,
-                       total_sacos = ?, valor_total = ?
+                   SET status = 'fechada', data_fim = ?
                    WHERE id = ?""",
-                (data_fim, total_sacos, valor_total, producao_id)
+                (data_fim, producao_id)
             )
             self.conn.commit()
             return True
@@ -191,57 +234,78 @@ class ProducaoDAO:
             }
         ]
         """
+        return self.adicionar_dias_producao(producao_id, [{
+            'data_producao': data_producao,
+            'total_sacos': total_sacos,
+            'divisoes': divisoes,
+        }])
+
+    def adicionar_dias_producao(self, producao_id: int, dias: List[Dict]) -> bool:
+        """
+        Adiciona vários dias de produção numa única transação (importação
+        de planilha, reprocessamento de uma safra).
+        dias = [{'data_producao': '2024-05-01', 'total_sacos': 100,
+                 'divisoes': [...mesmo formato de adicionar_dia_producao...]}]
+        Um executemany para os participantes e um único delta nos totais,
+        em vez de um INSERT e um upsert por participante.
+        """
+        if not dias:
+            return True
         try:
             cursor = self.conn.cursor()
-            
-            # Busca valor do saco da produção
+
             cursor.execute("SELECT valor_saco FROM producoes WHERE id = ?", (producao_id,))
             result = cursor.fetchone()
             if not result:
                 raise ValueError(f"Produção {producao_id} não encontrada")
             valor_saco = result[0]
 
-            cursor.execute(
-                """INSERT INTO producao_dias
-                   (producao_id, data_producao, total_sacos_dia, valor_saco)
-                   VALUES (?, ?, ?, ?)""",
-                (producao_id, data_producao, total_sacos, valor_saco)
-            )
-            dia_id = cursor.lastrowid
-
-            for divisao in divisoes:
+            # Dias e divisões são poucos: um INSERT cada, com o id vindo de
+            # lastrowid. Os participantes vão todos num executemany.
+            linhas_participantes = []
+            participacoes = {}
+            total_sacos = 0
+            for dia in dias:
                 cursor.execute(
-                    """INSERT INTO producao_divisoes
-                       (producao_dia_id, quantidade_sacos, descricao)
-                       VALUES (?, ?, ?)""",
-                    (dia_id, divisao['quantidade_sacos'], divisao.get('descricao', ''))
+                    """INSERT INTO producao_dias
+                       (producao_id, data_producao, total_sacos_dia, valor_saco)
+                       VALUES (?, ?, ?, ?)""",
+                    (producao_id, dia['data_producao'], dia['total_sacos'], valor_saco)
                 )
-                divisao_id = cursor.lastrowid
-
-                for participante in divisao['participantes']:
-                    valor_receber = participante['valor_receber']
+                dia_id = cursor.lastrowid
+                total_sacos += dia['total_sacos'] or 0
 
+                for divisao in dia['divisoes']:
                     cursor.execute(
-                        """INSERT INTO producao_participantes
-                           (producao_divisao_id, diarista_id, valor_receber)
+                        """INSERT INTO producao_divisoes
+                           (producao_dia_id, quantidade_sacos, descricao)
                            VALUES (?, ?, ?)""",
-                        (divisao_id, participante['diarista_id'], valor_receber)
-                    )
-
-                    # Atualiza totais do diarista na produção
-                    cursor.execute(
-                        """INSERT INTO producao_totais_diarista
-                           (producao_id, diarista_id, total_sacos, valor_total)
-                           VALUES (?, ?, 0, ?)
-                           ON CONFLICT(producao_id, diarista_id)
-                           DO UPDATE SET valor_total = valor_total + ?""",
-                        (producao_id, participante['diarista_id'],
-                         valor_receber, valor_receber)
+                        (dia_id, divisao['quantidade_sacos'], divisao.get('descricao', ''))
                     )
+                    divisao_id = cursor.lastrowid
+
+                    for participante in divisao['participantes']:
+                        valor_receber = participante['valor_receber']
+                        linhas_participantes.append(
+                            (divisao_id, participante['diarista_id'], valor_receber))
+
+                        total = participacoes.setdefault(participante['diarista_id'], [0.0, 0])
+                        total[0] += valor_receber
+                        total[1] += 1
+
+            cursor.executemany(
+                """INSERT INTO producao_participantes
+                   (producao_divisao_id, diarista_id, valor_receber)
+                   VALUES (?, ?, ?)""",
+                linhas_participantes
+            )
 
+            self._somar_totais(cursor, producao_id, total_sacos,
+                               total_sacos * valor_saco, participacoes)
             self.conn.commit()
             return True
         except Exception as e:
+            self.conn.rollback()
             print(f"Erro ao adicionar dia de produção: {e}")
             import traceback
             traceback.print_exc()
@@ -339,42 +403,180 @@ class ProducaoDAO:
         return resultado
 
     def deletar_dia_producao(self, dia_id: int) -> bool:
-        """Remove um dia de produção e recalcula totais"""
+        """Remove um dia de produção (com divisões e participantes) e
+        desconta dos totais apenas o que era desse dia"""
         try:
             cursor = self.conn.cursor()
 
-            cursor.execute("SELECT producao_id FROM producao_dias WHERE id = ?", (dia_id,))
+            cursor.execute(
+                "SELECT producao_id, total_sacos_dia, valor_saco FROM producao_dias WHERE id = ?",
+                (dia_id,))
             result = cursor.fetchone()
             if not result:
                 return False
-            producao_id = result[0]
-
-            cursor.execute("DELETE FROM producao_dias WHERE id = ?", (dia_id,))
+            producao_id, total_sacos_dia, valor_saco = result
 
             cursor.execute(
-                "DELETE FROM producao_totais_diarista WHERE producao_id = ?", (producao_id,))
-
-            # Recalcula totais apenas pelo valor_receber
-            cursor.execute(
-                """INSERT INTO producao_totais_diarista
-                       (producao_id, diarista_id, total_sacos, valor_total)
-                   SELECT ?, pp.diarista_id, 0, SUM(pp.valor_receber)
+                """SELECT pp.diarista_id, SUM(pp.valor_receber), COUNT(*)
                    FROM producao_participantes pp
-                   JOIN producao_divisoes pd   ON pd.id   = pp.producao_divisao_id
-                   JOIN producao_dias pdia     ON pdia.id = pd.producao_dia_id
-                   WHERE pdia.producao_id = ?
+                   JOIN producao_divisoes pd ON pd.id = pp.producao_divisao_id
+                   WHERE pd.producao_dia_id = ?
                    GROUP BY pp.diarista_id""",
-                (producao_id, producao_id)
+                (dia_id,)
             )
+            participacoes = {
+                diarista_id: [-(valor or 0.0), -qtd]
+                for diarista_id, valor, qtd in cursor.fetchall()
+            }
+            total_sacos_dia = total_sacos_dia or 0
+            self._somar_totais(cursor, producao_id, -total_sacos_dia,
+                               -(total_sacos_dia * (valor_saco or 0.0)), participacoes)
+
+            cursor.execute(
+                """DELETE FROM producao_participantes
+                   WHERE producao_divisao_id IN
+                         (SELECT id FROM producao_divisoes WHERE producao_dia_id = ?)""",
+                (dia_id,))
+            cursor.execute("DELETE FROM producao_divisoes WHERE producao_dia_id = ?", (dia_id,))
+            cursor.execute("DELETE FROM producao_dias WHERE id = ?", (dia_id,))
 
             self.conn.commit()
             return True
         except Exception as e:
+            # O delta dos totais já foi aplicado na transação: desfaz junto
+            self.conn.rollback()
             print(f"Erro ao deletar dia de produção: {e}")
             import traceback
             traceback.print_exc()
             return False
 
+
+    # ==================== TOTAIS ====================
+
+    def _somar_totais(self, cursor, producao_id: int, sacos: int, valor: float,
+                      participacoes: Dict[int, list]):
+        """
+        Aplica um delta nos totais da produção e dos diaristas (sem commit).
+        participacoes = {diarista_id: [valor, qtd_participacoes]}, com sinal
+        negativo para descontar. Diarista que fica sem participação sai dos totais.
+        """
+        cursor.execute(
+            """UPDATE producoes
+               SET total_sacos = COALESCE(total_sacos, 0) + ?,
+                   valor_total = COALESCE(valor_total, 0) + ?
+               WHERE id = ?""",
+            (sacos, valor, producao_id)
+        )
+        if not participacoes:
+            return
+        cursor.executemany(
+            """INSERT INTO producao_totais_diarista
+               (producao_id, diarista_id, total_sacos, valor_total, qtd_participacoes)
+               VALUES (?, ?, 0, ?, ?)
+               ON CONFLICT(producao_id, diarista_id)
+               DO UPDATE SET valor_total = valor_total + excluded.valor_total,
+                             qtd_participacoes = qtd_participacoes + excluded.qtd_participacoes""",
+            [(producao_id, diarista_id, valor_d, qtd)
+             for diarista_id, (valor_d, qtd) in participacoes.items()]
+        )
+        cursor.execute(
+            "DELETE FROM producao_totais_diarista WHERE producao_id = ? AND qtd_participacoes <= 0",
+            (producao_id,)
+        )
+
+    def _recalcular_totais(self, cursor, producao_id: int):
+        """Reconstrói do zero os totais de uma produção (sem commit)"""
+        cursor.execute(
+            "DELETE FROM producao_totais_diarista WHERE producao_id = ?", (producao_id,))
+        cursor.execute(
+            """INSERT INTO producao_totais_diarista
+                   (producao_id, diarista_id, total_sacos, valor_total, qtd_participacoes)
+               SELECT ?, pp.diarista_id, 0, SUM(pp.valor_receber), COUNT(*)
+               FROM producao_participantes pp
+               JOIN producao_divisoes pd   ON pd.id   = pp.producao_divisao_id
+               JOIN producao_dias pdia     ON pdia.id = pd.producao_dia_id
+               WHERE pdia.producao_id = ?
+               GROUP BY pp.diarista_id""",
+            (producao_id, producao_id)
+        )
+        cursor.execute(
+            """UPDATE producoes SET
+                   total_sacos = (SELECT COALESCE(SUM(total_sacos_dia), 0)
+                                  FROM producao_dias WHERE producao_id = ?),
+                   valor_total = (SELECT COALESCE(SUM(total_sacos_dia * valor_saco), 0)
+                                  FROM producao_dias WHERE producao_id = ?)
+               WHERE id = ?""",
+            (producao_id, producao_id, producao_id)
+        )
+
+    def verificar_totais(self, producao_id: int = None, corrigir: bool = False,
+                         tolerancia: float = 0.005) -> List[Dict]:
+        """
+        Recalcula os totais a partir dos dias lançados e compara com os
+        gravados. Retorna as divergências:
+        [{'producao_id', 'diarista_id' (None = total da produção), 'campo',
+          'gravado', 'calculado'}, ...]
+        Com corrigir=True reconstrói os totais das produções divergentes.
+        """
+        cursor = self.conn.cursor()
+        filtro = " WHERE p.id = ?" if producao_id else ""
+        params = [producao_id] if producao_id else []
+        divergencias = []
+
+        cursor.execute(
+            """SELECT p.id, COALESCE(p.total_sacos, 0), COALESCE(p.valor_total, 0),
+                      COALESCE(SUM(pd.total_sacos_dia), 0),
+                      COALESCE(SUM(pd.total_sacos_dia * pd.valor_saco), 0)
+               FROM producoes p
+               LEFT JOIN producao_dias pd ON pd.producao_id = p.id""" + filtro +
+            " GROUP BY p.id",
+            params
+        )
+        for pid, sacos, valor, sacos_calc, valor_calc in cursor.fetchall():
+            if sacos != sacos_calc:
+                divergencias.append({'producao_id': pid, 'diarista_id': None,
+                                     'campo': 'total_sacos',
+                                     'gravado': sacos, 'calculado': sacos_calc})
+            if abs(valor - valor_calc) > tolerancia:
+                divergencias.append({'producao_id': pid, 'diarista_id': None,
+                                     'campo': 'valor_total',
+                                     'gravado': valor, 'calculado': valor_calc})
+
+        # qtd_participacoes também é conferido: _somar_totais depende dele
+        # para tirar dos totais o diarista que ficou sem participação
+        filtro = " WHERE producao_id = ?" if producao_id else ""
+        cursor.execute(
+            """SELECT producao_id, diarista_id, SUM(gravado), SUM(calculado),
+                      SUM(qtd_gravada), SUM(qtd_calculada)
+               FROM (
+                   SELECT producao_id, diarista_id, valor_total AS gravado, 0 AS calculado,
+                          qtd_participacoes AS qtd_gravada, 0 AS qtd_calculada
+                   FROM producao_totais_diarista
+                   UNION ALL
+                   SELECT pdia.producao_id, pp.diarista_id, 0, pp.valor_receber, 0, 1
+                   FROM producao_participantes pp
+                   JOIN producao_divisoes pd   ON pd.id   = pp.producao_divisao_id
+                   JOIN producao_dias pdia     ON pdia.id = pd.producao_dia_id
+               )""" + filtro +
+            " GROUP BY producao_id, diarista_id",
+            params
+        )
+        for pid, diarista_id, gravado, calculado, qtd, qtd_calc in cursor.fetchall():
+            if abs((gravado or 0.0) - (calculado or 0.0)) > tolerancia:
+                divergencias.append({'producao_id': pid, 'diarista_id': diarista_id,
+                                     'campo': 'valor_total',
+                                     'gravado': gravado, 'calculado': calculado})
+            if (qtd or 0) != (qtd_calc or 0):
+                divergencias.append({'producao_id': pid, 'diarista_id': diarista_id,
+                                     'campo': 'qtd_participacoes',
+                                     'gravado': qtd, 'calculado': qtd_calc})
+
+        if corrigir and divergencias:
+            for pid in sorted({d['producao_id'] for d in divergencias}):
+                self._recalcular_totais(cursor, pid)
+            self.conn.commit()
+        return divergencias
+
     # ─── Relatórios ───────────────────────────────────────────────────────────
 
     def relatorio_por_centro_custo(self,
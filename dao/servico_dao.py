@@ -1,6 +1,9 @@
 from database.empresa_conexao import get_conn_empresa
 from typing import List, Dict, Optional
 
+# Ids por consulta IN — abaixo do limite de 999 parâmetros de SQLites antigos
+_LOTE_IN = 500
+
 
 class ServicoDAO:
     def __init__(self):
@@ -88,26 +91,32 @@ class ServicoDAO:
 
     def listar(self, filtro_data_inicio: str = None, filtro_data_fim: str = None,
                filtro_diarista_id: int = None,
-               filtro_centro_custo_id: int = None) -> List[Dict]:
+               filtro_centro_custo_id: int = None,
+               com_participantes: bool = True) -> List[Dict]:
         """
         Lista serviços com filtros opcionais.
-        Cada item retornado contém os dados do serviço + lista de participantes.
+        Cada item retornado contém os dados do serviço + lista de participantes
+        (carregada em lote, não uma consulta por serviço).
+
+        com_participantes=False devolve 'diaristas': None e só a contagem em
+        'qtd_diaristas'; os participantes são buscados depois, sob demanda,
+        com carregar_participantes().
         """
         cursor = self.conn.cursor()
 
         query = """
-            SELECT DISTINCT
+            SELECT
                 s.id,
                 s.data_servico,
                 cc.centro      AS centro_custo,
                 s.valor,
                 s.descricao,
                 s.observacoes,
-                s.centro_custo_id
+                s.centro_custo_id,
+                (SELECT COUNT(*) FROM servico_diaristas sd
+                 WHERE sd.servico_id = s.id) AS qtd_diaristas
             FROM servicos s
             JOIN centros_custo cc      ON cc.id = s.centro_custo_id
-            LEFT JOIN servico_diaristas sd ON sd.servico_id = s.id
-            LEFT JOIN diaristas d       ON d.id  = sd.diarista_id
             WHERE 1=1
         """
         params = []
@@ -121,7 +130,8 @@ class ServicoDAO:
             params.append(filtro_data_fim)
 
         if filtro_diarista_id:
-            query += " AND sd.diarista_id = ?"
+            query += """ AND s.id IN (SELECT servico_id FROM servico_diaristas
+                                      WHERE diarista_id = ?)"""
             params.append(filtro_diarista_id)
 
         if filtro_centro_custo_id:
@@ -131,11 +141,8 @@ class ServicoDAO:
         query += " ORDER BY s.data_servico DESC, s.id DESC"
 
         cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        servicos = []
-        for row in rows:
-            servico = {
+        servicos = [
+            {
                 'id':             row[0],
                 'data_servico':   row[1],
                 'centro_custo':   row[2],
@@ -143,12 +150,37 @@ class ServicoDAO:
                 'descricao':      row[4],
                 'observacoes':    row[5],
                 'centro_custo_id':row[6],
-                'diaristas':      self._get_participantes(row[0])
+                'qtd_diaristas':  row[7],
+                'diaristas':      None
             }
-            servicos.append(servico)
+            for row in cursor.fetchall()
+        ]
 
+        if com_participantes:
+            self.carregar_participantes(servicos)
         return servicos
 
+    def carregar_participantes(self, servicos: List[Dict]) -> List[Dict]:
+        """Preenche 'diaristas' dos serviços que ainda não os têm."""
+        pendentes = [s for s in servicos if s.get('diaristas') is None]
+        participantes = self._get_participantes_lote([s['id'] for s in pendentes])
+        for servico in pendentes:
+            servico['diaristas'] = participantes.get(servico['id'], [])
+        return servicos
+
+    def ids_por_participante(self, termo: str) -> set:
+        """Ids dos serviços com algum participante cujo nome ou CPF contém `termo`."""
+        cursor = self.conn.cursor()
+        like = f"%{termo}%"
+        cursor.execute(
+            """SELECT DISTINCT sd.servico_id
+               FROM diaristas d
+               JOIN servico_diaristas sd ON sd.diarista_id = d.id
+               WHERE d.nome LIKE ? OR d.cpf LIKE ?""",
+            (like, like)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
     def buscar(self, servico_id: int) -> Optional[Dict]:
         """Retorna um serviço completo com seus participantes."""
         cursor = self.conn.cursor()
@@ -197,6 +229,25 @@ class ServicoDAO:
             for r in cursor.fetchall()
         ]
 
+    def _get_participantes_lote(self, servico_ids: List[int]) -> Dict[int, List[Dict]]:
+        """{servico_id: participantes}, em consultas IN de até _LOTE_IN ids."""
+        resultado = {}
+        cursor = self.conn.cursor()
+        for inicio in range(0, len(servico_ids), _LOTE_IN):
+            lote = servico_ids[inicio:inicio + _LOTE_IN]
+            cursor.execute(
+                f"""SELECT sd.servico_id, d.id, d.nome, d.cpf, sd.valor_rateio
+                    FROM servico_diaristas sd
+                    JOIN diaristas d ON d.id = sd.diarista_id
+                    WHERE sd.servico_id IN ({", ".join("?" * len(lote))})
+                    ORDER BY d.nome""",
+                lote
+            )
+            for servico_id, *r in cursor.fetchall():
+                resultado.setdefault(servico_id, []).append(
+                    {'id': r[0], 'nome': r[1], 'cpf': r[2], 'valor_rateio': r[3]})
+        return resultado
+
     # ─────────────────────────────────────────────────────────────────────────
     # TOTAIS
     # ─────────────────────────────────────────────────────────────────────────
@@ -274,10 +325,11 @@ class ServicoDAO:
             (data_inicio, data_fim)
         )
         servicos = cursor.fetchall()
+        participantes = self._get_participantes_lote([s[0] for s in servicos])
 
         resultado = []
         for s in servicos:
-            partic = self._get_participantes(s[0])
+            partic = participantes.get(s[0], [])
             nomes  = ", ".join(p['nome'] for p in partic)
             cpfs   = ", ".join(p['cpf']  for p in partic)
             resultado.append((s[1], nomes, cpfs, s[2], s[3], s[4]))
@@ -1,97 +1,24 @@
 import hashlib
-from utils.constantes import VERSAO_ATUAL, CAMINHO_EXE_ATUALIZADO
 from database.conexao import garantir_banco
 
-class UsuarioDAO:
-    def __init__(self):
-        self.conn = garantir_banco()
-        self.criar_tabelas()
-        self.criar_admin_inicial()
-        self.criar_configuracoes_padrao()
-
-    # ==========================
-    # TABELAS
-    # ==========================
-    def criar_tabelas(self):
-        cur = self.conn.cursor()
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL UNIQUE,
-                senha TEXT NOT NULL,
-                admin INTEGER DEFAULT 0
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS permissoes (
-                usuario_id INTEGER,
-                modulo TEXT,
-                permitido INTEGER DEFAULT 0,
-                FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS configuracoes (
-                chave TEXT PRIMARY KEY,
-                valor TEXT NOT NULL
-            )
-        """)
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS empresa (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                razao_social TEXT NOT NULL,
-                nome_fantasia TEXT,
-                cnpj TEXT NOT NULL UNIQUE,
-                inscricao_estadual TEXT,
-                endereco TEXT,
-                cep TEXT,
-                cidade TEXT,
-                uf TEXT,
-                contato TEXT
-            )
-        """)
-
-
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS usuario_empresas (
-                usuario_id INTEGER,
-                empresa_id INTEGER,
-                FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
-                FOREIGN KEY (empresa_id) REFERENCES empresa(id),
-                UNIQUE(usuario_id, empresa_id)
-            )
-        """)
+_dao_compartilhado = None
 
 
-        self.conn.commit()
+def get_usuario_dao():
+    """Instância única do UsuarioDAO, compartilhada pelas telas."""
+    global _dao_compartilhado
+    if _dao_compartilhado is None:
+        _dao_compartilhado = UsuarioDAO()
+    return _dao_compartilhado
 
-    # ==========================
-    # Configurações padrão
-    # ==========================
-    def criar_configuracoes_padrao(self):
-        configs = {
-            "versao_atual": VERSAO_ATUAL,
-            "atualizacao_liberada": "NAO",
-            "sistema_bloqueado": "NAO",
-            "mensagem_update": "Atualização disponível",
-            "exe_atualizacao": CAMINHO_EXE_ATUALIZADO
-        }
 
-        cur = self.conn.cursor()
-
-        for chave, valor in configs.items():
-            cur.execute("""
-                INSERT INTO configuracoes (chave, valor)
-                VALUES (?, ?)
-                ON CONFLICT(chave) DO NOTHING
-            """, (chave, valor))
-
-        self.conn.commit()
+class UsuarioDAO:
+    """Acesso ao banco central. O esquema, o admin inicial e as configurações
+    padrão são criados uma única vez no startup (database.esquema_central);
+    as telas usam a instância compartilhada de get_usuario_dao()."""
 
+    def __init__(self):
+        self.conn = garantir_banco()
 
     def get_config(self, chave, default=None):
         cur = self.conn.cursor()
@@ -124,52 +51,10 @@ class UsuarioDAO:
     # ==========================
     # HASH
     # ==========================
-    def hash_senha(self, senha):
+    @staticmethod
+    def hash_senha(senha):
         return hashlib.sha256(senha.encode("utf-8")).hexdigest()
 
-    # ==========================
-    # ADMIN PADRÃO
-    # ==========================
-    def criar_admin_inicial(self):
-        cur = self.conn.cursor()
-
-        # Verifica se já existe algum admin
-        cur.execute("SELECT COUNT(*) FROM usuarios WHERE admin = 1")
-        existe_admin = cur.fetchone()[0]
-
-        if existe_admin == 0:
-            senha_hash = self.hash_senha("123456")
-
-            cur.execute("""
-                INSERT INTO usuarios (nome, senha, admin)
-                VALUES (?, ?, 1)
-            """, ("admin", senha_hash))
-
-            admin_id = cur.lastrowid
-
-            # Concede todas as permissões
-            modulos = [
-                "abrir_extrator",
-                "abrir_comparador",
-                "abrir_triagem",
-                "abrir_extrator_pdf",
-                "abrir_diaristas",
-                "abrir_centros_custo",
-                "abrir_diarias",
-                "abrir_servicos",
-                "abrir_producao",
-                "abrir_notas_fiscais",
-                "usuarios_admin"
-            ]
-
-            for modulo in modulos:
-                cur.execute("""
-                    INSERT INTO permissoes (usuario_id, modulo, permitido)
-                    VALUES (?, ?, 1)
-                """, (admin_id, modulo))
-
-            self.conn.commit()
-
     # ==========================
     # AUTENTICAÇÃO
     # ==========================
@@ -0,0 +1,623 @@
+"""
+Medições de desempenho dos DAOs contra um banco de empresa temporário.
+
+Cada medição monta uma massa de dados sintética, executa a operação e
+informa o tempo e quantos comandos SQL foram enviados ao SQLite (contador
+"comandos" do gerenciador de conexões). No compartilhamento de rede cada
+comando é uma ida e volta ao servidor, então o número de comandos é o que
+mais pesa para o usuário. As medições que não tocam o banco (conciliação
+de planilhas) mostram 0 comandos e valem pelo tempo.
+
+Uso:
+
+    python -m database.benchmarks                    # todas as medições
+    python -m database.benchmarks excluir_producao   # só uma
+    python -m database.benchmarks ler_sped=2048      # com outro tamanho
+
+O número depois de "=" substitui o primeiro parâmetro da medição (a
+quantidade de dias, notas, arquivos... ou, no ler_sped, os MB do EFD).
+Os tamanhos padrão rodam em segundos.
+"""
+import os
+import sys
+import tempfile
+import time
+
+
+def _medir(descricao, funcao):
+    from database.empresa_conexao import get_gerenciador_empresa
+
+    # Sem empresa conectada (medição chamada fora de main) não há contador
+    gerenciador = get_gerenciador_empresa()
+    if gerenciador is not None:
+        gerenciador.zerar_estatisticas()
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    if gerenciador is None:
+        comandos = None
+        print(f"  {descricao:<50} {'—':>8}           {duracao * 1000:>9.1f} ms")
+    else:
+        comandos = gerenciador.estatisticas()["comandos"]
+        print(f"  {descricao:<50} {comandos:>8} comandos  {duracao * 1000:>9.1f} ms")
+    return comandos, duracao
+
+
+def _diaristas(conn, quantidade):
+    conn.execute("INSERT INTO centros_custo (centro) VALUES ('Benchmark')")
+    conn.executemany(
+        "INSERT INTO diaristas (nome, cpf) VALUES (?, ?)",
+        [(f"Diarista {i}", f"{i:011d}") for i in range(1, quantidade + 1)]
+    )
+    conn.commit()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EXCLUSÃO DE PRODUÇÃO
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _producao_grande(dao, dias, divisoes, participantes):
+    producao_id = dao.criar_producao(1, "2024-01-01", 0.45)
+    for d in range(dias):
+        dao.adicionar_dia_producao(producao_id, f"2024-01-{d % 28 + 1:02d}", 100, [
+            {"quantidade_sacos": 100 // divisoes,
+             "participantes": [{"diarista_id": (v * participantes + p) % 50 + 1,
+                                "valor_receber": 10.0}
+                               for p in range(participantes)]}
+            for v in range(divisoes)
+        ])
+    return producao_id
+
+
+def _excluir_producao_por_linha(conn, producao_id):
+    """Algoritmo antigo de ProducaoDAO.excluir_producao (referência)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM producao_dias WHERE producao_id = ?", (producao_id,))
+    for (dia_id,) in cursor.fetchall():
+        cursor.execute("SELECT id FROM producao_divisoes WHERE producao_dia_id = ?", (dia_id,))
+        for (divisao_id,) in cursor.fetchall():
+            cursor.execute(
+                "DELETE FROM producao_participantes WHERE producao_divisao_id = ?", (divisao_id,))
+        cursor.execute("DELETE FROM producao_divisoes WHERE producao_dia_id = ?", (dia_id,))
+    cursor.execute("DELETE FROM producao_dias WHERE producao_id = ?", (producao_id,))
+    cursor.execute("DELETE FROM producao_totais_diarista WHERE producao_id = ?", (producao_id,))
+    cursor.execute("DELETE FROM producoes WHERE id = ?", (producao_id,))
+    conn.commit()
+
+
+def excluir_producao(dias=300, divisoes=3, participantes=4):
+    from dao.producao_dao import ProducaoDAO
+
+    dao = ProducaoDAO()
+    _diaristas(dao.conn, 50)
+    print(f"excluir_producao: {dias} dias × {divisoes} divisões × {participantes} participantes")
+
+    antiga = _producao_grande(dao, dias, divisoes, participantes)
+    nova = _producao_grande(dao, dias, divisoes, participantes)
+    _medir("antes (um SELECT/DELETE por dia e divisão)",
+           lambda: _excluir_producao_por_linha(dao.conn, antiga))
+    _medir("depois (DELETE por conjunto)",
+           lambda: dao.excluir_producao(nova))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LANÇAMENTO DE DIAS DE PRODUÇÃO
+# ─────────────────────────────────────────────────────────────────────────────
+
+def adicionar_dias(dias=300, divisoes=3, participantes=4):
+    from dao.producao_dao import ProducaoDAO
+
+    dao = ProducaoDAO()
+    _diaristas(dao.conn, 50)
+    print(f"adicionar_dias: {dias} dias × {divisoes} divisões × {participantes} participantes")
+
+    lote = [
+        {"data_producao": f"2024-01-{d % 28 + 1:02d}", "total_sacos": 100,
+         "divisoes": [
+             {"quantidade_sacos": 100 // divisoes,
+              "participantes": [{"diarista_id": (v * participantes + p) % 50 + 1,
+                                 "valor_receber": 10.0}
+                                for p in range(participantes)]}
+             for v in range(divisoes)
+         ]}
+        for d in range(dias)
+    ]
+    um_a_um = dao.criar_producao(1, "2024-01-01", 0.45)
+    em_lote = dao.criar_producao(1, "2024-01-01", 0.45)
+    _medir("um dia por chamada (adicionar_dia_producao)",
+           lambda: [dao.adicionar_dia_producao(um_a_um, d["data_producao"],
+                                               d["total_sacos"], d["divisoes"])
+                    for d in lote])
+    _medir("lote único (adicionar_dias_producao)",
+           lambda: dao.adicionar_dias_producao(em_lote, lote))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LISTAGEM DE SERVIÇOS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _listar_servicos_n_mais_1(dao):
+    """Algoritmo antigo de ServicoDAO.listar: DISTINCT com join nos
+    participantes e uma consulta de participantes por serviço (referência)."""
+    cursor = dao.conn.cursor()
+    cursor.execute("""
+        SELECT DISTINCT s.id, s.data_servico, cc.centro, s.valor,
+                        s.descricao, s.observacoes, s.centro_custo_id
+        FROM servicos s
+        JOIN centros_custo cc      ON cc.id = s.centro_custo_id
+        LEFT JOIN servico_diaristas sd ON sd.servico_id = s.id
+        LEFT JOIN diaristas d       ON d.id  = sd.diarista_id
+        ORDER BY s.data_servico DESC, s.id DESC
+    """)
+    return [(row, dao._get_participantes(row[0])) for row in cursor.fetchall()]
+
+
+def listar_servicos(servicos=10000, max_participantes=4):
+    import random
+    from dao.servico_dao import ServicoDAO
+
+    dao = ServicoDAO()
+    _diaristas(dao.conn, 200)
+    print(f"listar_servicos: {servicos} serviços com 1 a {max_participantes} diaristas")
+
+    aleatorio = random.Random(42)
+    dao.conn.executemany(
+        """INSERT INTO servicos (id, centro_custo_id, data_servico, valor, descricao)
+           VALUES (?, 1, ?, 100, 'Serviço')""",
+        [(i, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(1, servicos + 1)]
+    )
+    dao.conn.executemany(
+        "INSERT INTO servico_diaristas (servico_id, diarista_id, valor_rateio) VALUES (?, ?, 25)",
+        [(i, d) for i in range(1, servicos + 1)
+         for d in aleatorio.sample(range(1, 201), aleatorio.randint(1, max_participantes))]
+    )
+    dao.conn.commit()
+
+    _medir("antes (uma consulta de participantes por serviço)",
+           lambda: _listar_servicos_n_mais_1(dao))
+    _medir("depois (participantes em lote)",
+           lambda: dao.listar())
+    _medir("sob demanda (sem participantes)",
+           lambda: dao.listar(com_participantes=False))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# IMPORTAÇÃO EM LOTE DE NFS-e
+# ─────────────────────────────────────────────────────────────────────────────
+
+_XML_NFSE = """<?xml version="1.0" encoding="UTF-8"?>
+<NFSe xmlns="http://www.sped.fazenda.gov.br/nfse">
+  <infNFSe Id="NFS{chave:044d}">
+    <nNFSe>{numero}</nNFSe>
+    <dhProc>2024-05-10T10:00:00-03:00</dhProc>
+    <emit><CNPJ>{cnpj:014d}</CNPJ><xNome>Fornecedor {fornecedor}</xNome></emit>
+    <valores><vLiq>{valor:.2f}</vLiq></valores>
+    <DPS><infDPS>
+      <dhEmi>2024-05-{dia:02d}T10:00:00-03:00</dhEmi>
+      <dCompet>2024-05-01</dCompet>
+      <serv><cServ><xDescServ>Serviço {numero}</xDescServ></cServ></serv>
+    </infDPS></DPS>
+  </infNFSe>
+</NFSe>
+"""
+
+
+def _importar_nfse_por_arquivo(dao, paths):
+    """Algoritmo antigo de ImportacaoLoteNFDialog: parse, busca de
+    duplicata, upsert do fornecedor e INSERT com commit, arquivo a arquivo
+    (referência)."""
+    from services.nfse_importer import importar_nfse_xml
+
+    for path in paths:
+        dados = importar_nfse_xml(path)
+        if dados["_problemas"] or dao.buscar_nota_duplicada(
+                dados["numero"], dados["emitente"], dados.get("_chave_acesso")):
+            continue
+        forn_id = dao.upsert_fornecedor_auto(dados["emitente"], dados["cnpj_cpf"])
+        dao.inserir_nota({
+            "fornecedor_id": forn_id,
+            "numero": dados["numero"],
+            "emitente": dados["emitente"],
+            "cnpj_cpf": dados["cnpj_cpf"],
+            "descricao_servico": dados["descricao_servico"],
+            "valor": dados["valor"],
+            "data_emissao": dados["data_emissao"],
+            "competencia": dados["competencia"],
+            "chave_acesso": dados.get("_chave_acesso") or "",
+        })
+
+
+def importar_nfse_lote(arquivos=1000, fornecedores=40):
+    from dao.notas_fiscais_dao import NotasFiscaisDAO
+    from services.importacao_lote_nfse import analisar_arquivos, importar_itens
+
+    dao = NotasFiscaisDAO()
+    print(f"importar_nfse_lote: {arquivos} XMLs de {fornecedores} fornecedores")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        def gerar(prefixo, deslocamento):
+            paths = []
+            for i in range(1, arquivos + 1):
+                path = os.path.join(pasta, f"{prefixo}_{i}.xml")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(_XML_NFSE.format(
+                        chave=deslocamento + i, numero=deslocamento + i,
+                        cnpj=i % fornecedores + 1, fornecedor=i % fornecedores + 1,
+                        valor=100 + i, dia=i % 28 + 1))
+                paths.append(path)
+            return paths
+
+        antigos = gerar("antigo", 0)
+        novos = gerar("novo", arquivos)
+        _medir("antes (um arquivo por vez, commit por nota)",
+               lambda: _importar_nfse_por_arquivo(dao, antigos))
+        _medir("depois (pipeline em lote, 1 transação)",
+               lambda: importar_itens(dao, analisar_arquivos(novos, dao)))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CONCILIAÇÃO SEFAZ × SISTEMA
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _planilhas_conciliacao(notas, fornecedores):
+    """SEFAZ com valores em texto no formato brasileiro e CNPJ formatado;
+    Sistema com 80% das notas, parte com valor ou CNPJ trocado."""
+    import numpy as np
+    import pandas as pd
+
+    aleatorio = np.random.default_rng(42)
+    numeros = np.arange(1, notas + 1)
+    cnpjs = aleatorio.integers(1, fornecedores + 1, notas) * 1000001
+    centavos = aleatorio.integers(1000, 10_000_000, notas)
+
+    def brl(c):
+        return f"R$ {c // 100:,}".replace(",", ".") + f",{c % 100:02d}"
+
+    sefaz = pd.DataFrame({
+        "Número": [f"{n:09d}" for n in numeros],
+        "CNPJ": [f"{c:014d}" for c in cnpjs],
+        "Valor Total": [brl(int(c)) for c in centavos],
+    })
+    lancadas = aleatorio.random(notas) < 0.8
+    sistema = pd.DataFrame({
+        "Numero": numeros[lancadas],
+        "CNPJ": cnpjs[lancadas],
+        "Valor": centavos[lancadas] / 100,
+    })
+    trocar = aleatorio.random(len(sistema)) < 0.02
+    sistema.loc[trocar, "Valor"] += 1
+    trocar = aleatorio.random(len(sistema)) < 0.01
+    sistema.loc[trocar, "CNPJ"] += 1
+    return sefaz, sistema
+
+
+def _conciliar_por_celula(sefaz, sistema):
+    """Algoritmo antigo de ComparadorNotasEmbed.comparar: .apply por
+    célula no valor, chave "numero|cnpj|valor" montada como texto e um
+    .apply por linha contra o conjunto (referência)."""
+    import pandas as pd
+
+    def limpar_valor_br(valor):
+        if pd.isna(valor):
+            return 0.0
+        valor_str = str(valor).replace("R$", "").strip().replace(" ", "").replace(",", ".")
+        partes = valor_str.split(".")
+        if len(partes) > 1:
+            valor_str = "".join(partes[:-1]) + "." + partes[-1]
+        try:
+            return float(valor_str)
+        except ValueError:
+            return 0.0
+
+    def numero(serie):
+        return serie.astype(str).str.strip().str.replace(r"\.0$", "", regex=True).str.lstrip("0")
+
+    def cnpj(serie):
+        return serie.astype(str).str.replace(r"\D", "", regex=True).str.zfill(14)
+
+    valor_sefaz = sefaz["Valor Total"].apply(limpar_valor_br).round(2).apply(lambda x: f"{x:.2f}")
+    valor_sistema = (pd.to_numeric(sistema["Valor"], errors="coerce").fillna(0.0).round(2)
+                     .apply(lambda x: f"{x:.2f}"))
+    chave = numero(sefaz["Número"]) + "|" + cnpj(sefaz["CNPJ"]) + "|" + valor_sefaz
+    sistema_chaves = set(numero(sistema["Numero"]) + "|" + cnpj(sistema["CNPJ"]) + "|" + valor_sistema)
+    return chave.apply(lambda x: "LANÇADO" if x in sistema_chaves else "NÃO LANÇADO")
+
+
+def _conferir_celulas_vazias():
+    """Número e CNPJ em branco (linha vazia ou de totais na exportação)
+    dos dois lados, com e sem a coluna CNPJ: uma célula vazia não pode
+    fazer nota nenhuma conferir."""
+    import numpy as np
+    import pandas as pd
+    from services.conciliacao_notas import conciliar
+
+    casos = [
+        # (SEFAZ, Sistema, Status esperados)
+        ({"Número": ["1", "2", "3"], "Valor Total": ["10,00", "20,00", "30,00"]},
+         {"Numero": ["1", np.nan], "Valor": ["10.00", "99"]},
+         ["LANÇADO", "NÃO LANÇADO", "NÃO LANÇADO"]),
+        ({"Número": ["1", np.nan, "3"], "Valor Total": ["10,00", "20,00", "30,00"]},
+         {"Numero": ["1", np.nan, "7"], "Valor": ["10.00", "5", "30"]},
+         ["LANÇADO", "NÃO LANÇADO", "NÃO LANÇADO"]),
+        ({"Número": ["1", "2", "3", np.nan], "Valor Total": ["10", "20", "30", "40"],
+          "CNPJ": ["11.111.111/0001-11", np.nan, "22.222.222/0001-22", "33"]},
+         {"Numero": ["1", "2", np.nan, "3"], "Valor": ["10", "20", "40", "31"],
+          "CNPJ": [np.nan, "44.444.444/0001-44", "33", "22.222.222/0001-22"]},
+         ["CNPJ DIVERGENTE", "CNPJ DIVERGENTE", "VALOR DIVERGENTE", "NÃO LANÇADO"]),
+    ]
+    for sefaz, sistema, esperado in casos:
+        obtido = list(conciliar(pd.DataFrame(sefaz), pd.DataFrame(sistema))[0]["Status"])
+        if obtido != esperado:
+            raise AssertionError(f"Células vazias: esperado {esperado}, obtido {obtido}")
+    print("  células vazias (número/CNPJ em branco): OK")
+
+
+def conciliar_notas(notas=500_000, fornecedores=300):
+    from services.conciliacao_notas import conciliar
+
+    print(f"conciliar_notas: {notas} notas da SEFAZ de {fornecedores} fornecedores")
+    _conferir_celulas_vazias()
+    sefaz, sistema = _planilhas_conciliacao(notas, fornecedores)
+    _medir("antes (.apply por célula, chave em texto)",
+           lambda: _conciliar_por_celula(sefaz, sistema))
+    _medir("depois (vetorizado, códigos fatorados)",
+           lambda: print(f"    {conciliar(sefaz, sistema)[1]}"))
+
+
+def _exportar_preenchendo_celulas(resultado, caminho):
+    """Exportação antiga do comparador: to_excel, reabrir com openpyxl e
+    preencher célula a célula (referência)."""
+    from openpyxl import load_workbook
+    from openpyxl.styles import PatternFill
+
+    resultado.to_excel(caminho, index=False)
+    wb = load_workbook(caminho)
+    ws = wb.active
+    col_status = [c.value for c in ws[1]].index("Status") + 1
+    verde = PatternFill("solid", fgColor="C6EFCE")
+    vermelho = PatternFill("solid", fgColor="F4CCCC")
+    for r in range(2, ws.max_row + 1):
+        cor = verde if ws.cell(r, col_status).value == "LANÇADO" else vermelho
+        for c in range(1, ws.max_column + 1):
+            ws.cell(r, c).fill = cor
+    wb.save(caminho)
+
+
+def exportar_conciliacao(notas=20_000, fornecedores=300):
+    from services.conciliacao_notas import conciliar, exportar
+
+    print(f"exportar_conciliacao: {notas} notas")
+    sefaz, sistema = _planilhas_conciliacao(notas, fornecedores)
+    resultado, _resumo = conciliar(sefaz, sistema)
+    with tempfile.TemporaryDirectory() as pasta:
+        _medir("antes (to_excel + openpyxl célula a célula)",
+               lambda: _exportar_preenchendo_celulas(resultado, os.path.join(pasta, "antes.xlsx")))
+        _medir("depois (.xlsx numa passada, formatação condicional)",
+               lambda: exportar(resultado, os.path.join(pasta, "depois.xlsx")))
+        _medir("depois (.csv)",
+               lambda: exportar(resultado, os.path.join(pasta, "depois.csv")))
+
+
+def _comparar_arquivos_inteiros(caminho_sefaz, caminho_sistema):
+    """Leitura antiga do comparador: as duas planilhas inteiras, copiadas
+    antes de normalizar (referência; CSV no lugar do read_excel)."""
+    import pandas as pd
+    from services.conciliacao_notas import conciliar
+
+    sefaz = pd.read_csv(caminho_sefaz, sep=";", dtype=str)
+    sistema = pd.read_csv(caminho_sistema, sep=";", dtype=str)
+    return conciliar(sefaz.copy(), sistema.copy())
+
+
+def ler_planilhas_conciliacao(notas=300_000, fornecedores=300):
+    import tracemalloc
+    from services.conciliacao_notas import comparar_arquivos
+
+    print(f"ler_planilhas_conciliacao: {notas} notas em CSV, Sistema com 8 colunas")
+    sefaz, sistema = _planilhas_conciliacao(notas, fornecedores)
+    sefaz["Situação"] = "Autorizada"
+    for coluna in ("Emitente", "Descrição", "Competência", "Observação", "Usuário"):
+        sistema[coluna] = [f"{coluna} {i % 997}" for i in range(len(sistema))]
+
+    def medir_pico(descricao, funcao):
+        tracemalloc.start()
+        try:
+            _medir(descricao, funcao)
+            print(f"    pico de memória: {tracemalloc.get_traced_memory()[1] / 2 ** 20:.0f} MB")
+        finally:
+            tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_sefaz = os.path.join(pasta, "sefaz.csv")
+        caminho_sistema = os.path.join(pasta, "sistema.csv")
+        sefaz.to_csv(caminho_sefaz, sep=";", index=False)
+        sistema.to_csv(caminho_sistema, sep=";", index=False)
+        medir_pico("antes (arquivos inteiros + .copy())",
+                   lambda: _comparar_arquivos_inteiros(caminho_sefaz, caminho_sistema))
+        medir_pico("depois (colunas necessárias, Sistema em blocos)",
+                   lambda: comparar_arquivos(caminho_sefaz, caminho_sistema))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LEITURA DE SPED E DO LIVRO FISCAL
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _gerar_sped(caminho, megabytes):
+    """EFD sintético: por documento um C100 com 5 itens (C170) e 2 C190; a
+    cada 10, um CT-e (D100 + D190). Devolve quantos C100 e D100."""
+    alvo = megabytes * 1024 * 1024
+    notas = ctes = 0
+    with open(caminho, "w", encoding="latin-1", newline="\r\n") as f:
+        f.write("|0000|017|0|01012024|31122024|EMPRESA BENCHMARK|00000000000191|||\n")
+        while f.tell() < alvo:
+            bloco = []
+            for _ in range(1000):
+                notas += 1
+                bloco.append(
+                    f"|C100|0|1|F{notas % 500}|55|00|1|{notas}|{notas:044d}|10012024|10012024|"
+                    f"1500,00|0|0,00|0,00|1500,00|9|0,00|0,00|0,00|1500,00|270,00|0,00|0,00|0,00|"
+                    f"0,00|0,00|0,00|0,00|\n")
+                for item in range(1, 6):
+                    bloco.append(
+                        f"|C170|{item}|PROD{item}|Produto {item}|10|UN|300,00|0,00|0|000|1102|"
+                        f"1102|300,00|18,00|54,00|0,00|0,00|0,00|0|||0,00|0,00|0,00|50|"
+                        f"|0,00|0,00|0,00|0,00|50||0,00|0,00|0,00|0,00|||\n")
+                bloco.append("|C190|000|1102|18,00|1500,00|1500,00|270,00|0,00|0,00|0,00|0|\n")
+                bloco.append("|C190|000|1556|0,00|0,00|0,00|0,00|0,00|0,00|0,00|0|\n")
+                if notas % 10 == 0:
+                    ctes += 1
+                    bloco.append(
+                        f"|D100|0|1|T{ctes % 50}|57|00|1||{ctes}|{ctes + 10 ** 40:044d}|10012024|"
+                        f"10012024|0||350,00|0,00|1|350,00|350,00|42,00|0,00||||\n")
+                    bloco.append("|D190|000|1353|12,00|350,00|350,00|42,00||\n")
+            f.write("".join(bloco))
+        f.write("|9999|0|\n")
+    return notas, ctes
+
+
+def _extrair_chaves_por_linha(caminho):
+    """Algoritmo antigo de TriagemSPEDEmbed.extrair_chaves (referência)."""
+    nf, cte = [], []
+    with open(caminho, "r", encoding="latin-1") as f:
+        for linha in f:
+            c = linha.split("|")
+            if len(c) > 10:
+                if c[1] == "C100" and c[9].isdigit():
+                    nf.append(c[9])
+                if c[1] == "D100" and c[10].isdigit():
+                    cte.append(c[10])
+    return nf, cte
+
+
+def ler_sped(megabytes=64):
+    from services.leitor_sped import chaves_documentos
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "efd.txt")
+        notas, ctes = _gerar_sped(caminho, megabytes)
+        print(f"ler_sped: EFD de {os.path.getsize(caminho) / 2 ** 20:.0f} MB, "
+              f"{notas} C100 e {ctes} D100")
+        _medir("antes (split completo de toda linha)",
+               lambda: _extrair_chaves_por_linha(caminho))
+        _medir("depois (regex compilada por bloco, só os campos)",
+               lambda: chaves_documentos(caminho))
+
+
+def _livro_por_linha(caminho):
+    """Algoritmo antigo de ExtratorFiscalAppEmbed.processar, sem o Excel
+    (referência)."""
+    import re
+
+    dados = []
+    nota_atual = None
+    with open(caminho, "r", encoding="latin-1") as f:
+        for linha in f:
+            linha = linha.rstrip()
+            partes = [p.strip() for p in linha.split("|")]
+            if len(partes) < 9:
+                continue
+            try:
+                valor = float(partes[8].replace(".", "").replace(",", "."))
+            except ValueError:
+                valor = 0.0
+            if re.match(r"^\|\d{2}/\d{2}/\d{2}\|", linha):
+                nota_atual = {"Numero": partes[4].lstrip("0"),
+                              "Data de Emissao": partes[5], "Valor": valor}
+                dados.append(nota_atual)
+            elif nota_atual and valor > 0:
+                nota_atual["Valor"] += valor
+    return dados
+
+
+def _livro_em_streaming(caminho):
+    from services.leitor_sped import lancamentos_livro
+
+    dados = []
+    nota_atual = None
+    for documento, numero, data, valor in lancamentos_livro(caminho):
+        if documento:
+            nota_atual = [numero, data, valor]
+            dados.append(nota_atual)
+        elif nota_atual and valor > 0:
+            nota_atual[2] += valor
+    return dados
+
+
+def ler_livro_fiscal(documentos=500_000):
+    print(f"ler_livro_fiscal: {documentos} documentos, 1 complemento a cada 3")
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "livro.txt")
+        with open(caminho, "w", encoding="latin-1") as f:
+            for i in range(1, documentos + 1):
+                f.write(f"|{i % 28 + 1:02d}/01/24|NFE|1|{i:09d}|{i % 28 + 1:02d}/01/24|SP|"
+                        f"1102|{i % 9000 + 1:>6},{i % 100:02d} |  18,00 | 0,00 | 0,00 |\n")
+                if i % 3 == 0:
+                    f.write(f"|        |   | |         |        |  |"
+                            f"1556|    12,50 |   0,00 | 0,00 | 0,00 |\n")
+        _medir("antes (split e strip de todos os campos, regex por linha)",
+               lambda: _livro_por_linha(caminho))
+        _medir("depois (split limitado, só os campos usados)",
+               lambda: _livro_em_streaming(caminho))
+
+
+def localizar_pdfs_triagem(chaves=10_000, sem_pdf=500):
+    """Só a localização dos PDFs (a mescla depende do PyPDF2). O ganho é
+    no compartilhamento de rede, onde cada os.path.exists é uma ida ao
+    servidor e a listagem é uma só. Em pasta local no Linux a listagem
+    ainda faz um stat por arquivo para o tamanho (no Windows ele vem na
+    própria listagem), então aqui os tempos ficam parecidos."""
+    from services.triagem_sped import indexar_pasta, planejar
+
+    print(f"localizar_pdfs_triagem: {chaves} chaves, {sem_pdf} sem PDF")
+    todas = [f"3524{i % 12 + 1:02d}{i:038d}" for i in range(chaves)]
+    with tempfile.TemporaryDirectory() as pasta:
+        for chave in todas[sem_pdf:]:
+            open(os.path.join(pasta, f"{chave}.pdf"), "wb").close()
+
+        _medir("antes (os.path.exists por chave)",
+               lambda: [c for c in todas if os.path.exists(os.path.join(pasta, f"{c}.pdf"))])
+        _medir("depois (uma listagem da pasta + índice)",
+               lambda: planejar({"NFe": todas}, indexar_pasta(pasta)))
+
+
+MEDICOES = {
+    "excluir_producao": excluir_producao,
+    "adicionar_dias": adicionar_dias,
+    "listar_servicos": listar_servicos,
+    "importar_nfse_lote": importar_nfse_lote,
+    "conciliar_notas": conciliar_notas,
+    "exportar_conciliacao": exportar_conciliacao,
+    "ler_planilhas_conciliacao": ler_planilhas_conciliacao,
+    "ler_sped": ler_sped,
+    "ler_livro_fiscal": ler_livro_fiscal,
+    "localizar_pdfs_triagem": localizar_pdfs_triagem,
+}
+
+
+def main(argv):
+    from database.empresa_conexao import conectar_empresa, desconectar_empresa
+    from database.esquema_empresa import criar_banco_empresa
+
+    pedidas = []
+    for arg in argv[1:] or list(MEDICOES):
+        nome, _, tamanho = arg.partition("=")
+        pedidas.append((nome, [int(tamanho)] if tamanho.isdigit() else []))
+    desconhecidas = [n for n, _ in pedidas if n not in MEDICOES]
+    if desconhecidas:
+        print(f"Medições desconhecidas: {', '.join(desconhecidas)}")
+        print(f"Disponíveis: {', '.join(MEDICOES)}")
+        return 1
+
+    for nome, args in pedidas:
+        with tempfile.TemporaryDirectory() as pasta:
+            db_path = criar_banco_empresa(os.path.join(pasta, f"{nome}.db"))
+            conectar_empresa(db_path, cache_local=False)
+            try:
+                MEDICOES[nome](*args)
+            finally:
+                desconectar_empresa()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,221 @@
+"""
+Cache local de leitura para o banco da empresa.
+
+O banco oficial fica no compartilhamento de rede (T:\\MTSistem\\db\\empresas)
+e, em filiais com link lento, cada consulta paga vários round-trips SMB.
+Neste modo o sistema mantém uma cópia do banco em pasta_dados_app()/cache:
+
+- SELECTs são servidos pela cópia local;
+- INSERT/UPDATE/DELETE/PRAGMA continuam indo direto para o arquivo do
+  compartilhamento (fonte da verdade);
+- leituras feitas no meio de uma transação de escrita também vão para o
+  compartilhamento, para a tela enxergar o que acabou de gravar;
+- depois de um commit próprio, ou quando outro usuário altera o banco
+  (detectado por PRAGMA data_version + mtime/tamanho do arquivo), a cópia
+  local é atualizada via API de backup do SQLite antes da próxima leitura.
+
+A conexão exposta imita a interface de sqlite3.Connection usada pelos DAOs
+(cursor, execute, commit, rollback, close), então nenhum DAO precisa mudar.
+As duas pontas usam database.gerenciador_conexoes (uma conexão por thread).
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from database.gerenciador_conexoes import (
+    GerenciadorConexoes, PRAGMAS_LOCAL, PRAGMAS_REDE
+)
+
+# Intervalo mínimo entre duas verificações de alteração feita por outros
+# usuários — evita um stat/PRAGMA na rede a cada SELECT de uma mesma tela.
+INTERVALO_VERIFICACAO = 2.0
+
+_PREFIXOS_LEITURA = ("SELECT", "WITH")
+
+
+def _eh_leitura(sql):
+    return sql.lstrip().upper().startswith(_PREFIXOS_LEITURA)
+
+
+def caminho_cache_local(db_path):
+    """Caminho da cópia local de um banco de empresa."""
+    from utils.auxiliares import pasta_dados_app
+    pasta = os.path.join(pasta_dados_app(), "cache")
+    os.makedirs(pasta, exist_ok=True)
+    return os.path.join(pasta, os.path.basename(db_path))
+
+
+class _CursorRoteado:
+    """Cursor que decide, a cada execute, se vai para a cópia local ou para
+    o banco do compartilhamento."""
+
+    def __init__(self, conexao):
+        self._conexao = conexao
+        self._cursor = None
+
+    def execute(self, sql, params=()):
+        self._cursor = self._conexao._conexao_para(sql).cursor()
+        self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_params):
+        self._cursor = self._conexao.origem.conexao().cursor()
+        self._cursor.executemany(sql, seq_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._cursor.fetchmany()
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description if self._cursor else None
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid if self._cursor else None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount if self._cursor else -1
+
+    def close(self):
+        if self._cursor:
+            self._cursor.close()
+
+
+class ConexaoCacheLocal:
+    """Par de bancos (compartilhamento + cópia local) com roteamento de
+    leituras e sincronização por detecção de mudança. Segura para uso por
+    várias threads: cada uma recebe suas próprias conexões dos gerenciadores."""
+
+    def __init__(self, db_path, caminho_local=None,
+                 intervalo_verificacao=INTERVALO_VERIFICACAO):
+        self.db_path = db_path
+        self.caminho_local = caminho_local or caminho_cache_local(db_path)
+        self.intervalo_verificacao = intervalo_verificacao
+
+        self._lock = threading.RLock()
+        self._desatualizado = True
+        self._assinatura = None
+        self._ultima_verificacao = 0.0
+        self._sincronizacoes = 0
+
+        # Conexão dedicada à detecção de mudança e à origem do backup:
+        # PRAGMA data_version só é comparável dentro da mesma conexão.
+        self._monitor = sqlite3.connect(db_path, check_same_thread=False,
+                                        timeout=PRAGMAS_REDE["busy_timeout"] / 1000)
+        page_size = self._monitor.execute("PRAGMA page_size").fetchone()[0]
+
+        # A cópia é sempre recriada: evita reaproveitar um arquivo de outra
+        # sessão com page_size diferente (o backup falha em destino WAL).
+        for sufixo in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.caminho_local + sufixo)
+            except FileNotFoundError:
+                pass
+
+        self.origem = GerenciadorConexoes(db_path, PRAGMAS_REDE)
+        self.local = GerenciadorConexoes(
+            self.caminho_local, {"page_size": page_size, **PRAGMAS_LOCAL})
+        self._sincronizar()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # DETECÇÃO DE MUDANÇA
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _assinatura_origem(self):
+        try:
+            st = os.stat(self.db_path)
+            arquivo = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            arquivo = None
+        versao = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+        return versao, arquivo
+
+    def _sincronizar(self):
+        """Copia o banco do compartilhamento para a cópia local."""
+        destino = self.local.conexao()
+        destino.commit()
+        self._monitor.backup(destino)
+        self._assinatura = self._assinatura_origem()
+        self._ultima_verificacao = time.monotonic()
+        self._desatualizado = False
+        self._sincronizacoes += 1
+
+    def _garantir_atualizado(self):
+        with self._lock:
+            if not self._desatualizado:
+                agora = time.monotonic()
+                if agora - self._ultima_verificacao < self.intervalo_verificacao:
+                    return
+                self._ultima_verificacao = agora
+                if self._assinatura_origem() == self._assinatura:
+                    return
+            self._sincronizar()
+
+    def marcar_desatualizado(self):
+        """Força a recópia do banco antes da próxima leitura."""
+        self._desatualizado = True
+
+    def _conexao_para(self, sql):
+        origem = self.origem.conexao()
+        if _eh_leitura(sql) and not origem.in_transaction:
+            self._garantir_atualizado()
+            return self.local.conexao()
+        return origem
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # INTERFACE DE sqlite3.Connection USADA PELOS DAOs
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def cursor(self):
+        return _CursorRoteado(self)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_params):
+        return self.cursor().executemany(sql, seq_params)
+
+    @property
+    def in_transaction(self):
+        return self.origem.conexao().in_transaction
+
+    def commit(self):
+        origem = self.origem.conexao()
+        houve_escrita = origem.in_transaction
+        origem.commit()
+        if houve_escrita:
+            self._desatualizado = True
+
+    def rollback(self):
+        self.origem.conexao().rollback()
+
+    def estatisticas(self):
+        return {
+            "origem": self.origem.estatisticas(),
+            "local": self.local.estatisticas(),
+            "sincronizacoes": self._sincronizacoes,
+        }
+
+    def liberar_thread(self):
+        """Fecha as conexões da thread atual com os dois bancos."""
+        self.origem.liberar_thread()
+        self.local.liberar_thread()
+
+    def close(self):
+        self.origem.fechar()
+        self.local.fechar()
+        self._monitor.close()
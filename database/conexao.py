@@ -1,15 +1,26 @@
 import os
-import sqlite3
+
+from database.gerenciador_conexoes import GerenciadorConexoes, PRAGMAS_REDE
 
 DB_DIR = r"T:\MTSistem\db"
 #DB_DIR = r"C:\Users\Mateus\Documents\Miquéias\MTSistem-Sistema-Fiscal\db"
 
 DB_PATH = os.path.join(DB_DIR, "sistemafiscal.db")
 
+_gerenciador_central = None
 
-def garantir_banco():
-    if not os.path.exists(DB_DIR):
-        os.makedirs(DB_DIR, exist_ok=True)
 
-    conn = sqlite3.connect(DB_PATH)
-    return conn
\ No newline at end of file
+def get_gerenciador_central():
+    global _gerenciador_central
+
+    if _gerenciador_central is None:
+        if not os.path.exists(DB_DIR):
+            os.makedirs(DB_DIR, exist_ok=True)
+        _gerenciador_central = GerenciadorConexoes(DB_PATH, PRAGMAS_REDE)
+    return _gerenciador_central
+
+
+def garantir_banco():
+    """Conexão com o banco central. Não abre um arquivo novo a cada chamada:
+    devolve um proxy para a conexão da thread atual do gerenciador."""
+    return get_gerenciador_central().proxy()
@@ -1,16 +1,82 @@
-import sqlite3
-import os
+from database.gerenciador_conexoes import (
+    ConexaoThread, GerenciadorConexoes, PRAGMAS_REDE
+)
+from database.esquema_empresa import migrar_banco_empresa
+from utils.constantes import CACHE_LOCAL_EMPRESA
 
-_conn_empresa = None
+# Gerenciador (ou cache local) do banco da empresa selecionada na sessão.
+_banco_empresa = None
 
-def conectar_empresa(db_path):
-    global _conn_empresa
 
-    if _conn_empresa:
-        _conn_empresa.close()
+def _conexao_atual():
+    if _banco_empresa is None:
+        raise RuntimeError("Nenhuma empresa conectada.")
+    if isinstance(_banco_empresa, GerenciadorConexoes):
+        return _banco_empresa.conexao()
+    return _banco_empresa
+
+
+# Os DAOs guardam este objeto; cada uso resolve a conexão da thread atual
+# no banco da empresa conectada no momento.
+_conn_empresa = ConexaoThread(_conexao_atual)
+
+
+def conectar_empresa(db_path, cache_local=None):
+    """Abre o banco da empresa e aplica as migrações pendentes do esquema.
+    Com cache_local (padrão: CACHE_LOCAL_EMPRESA) as leituras passam a ser
+    servidas por uma cópia em pasta_dados_app()."""
+    global _banco_empresa
+
+    desconectar_empresa()
+
+    if cache_local is None:
+        cache_local = CACHE_LOCAL_EMPRESA
+
+    if cache_local:
+        from database.cache_local import ConexaoCacheLocal
+        _banco_empresa = ConexaoCacheLocal(db_path)
+    else:
+        _banco_empresa = GerenciadorConexoes(db_path, PRAGMAS_REDE)
+
+    if migrar_banco_empresa(get_gerenciador_empresa().conexao(), db_path) and cache_local:
+        _banco_empresa.marcar_desatualizado()
+
+
+def desconectar_empresa():
+    """Fecha as conexões (de todas as threads) com o banco da empresa."""
+    global _banco_empresa
+
+    if _banco_empresa is not None:
+        if isinstance(_banco_empresa, GerenciadorConexoes):
+            _banco_empresa.fechar()
+        else:
+            _banco_empresa.close()
+        _banco_empresa = None
 
-    _conn_empresa = sqlite3.connect(db_path)
 
 def get_conn_empresa():
     return _conn_empresa
 
+
+def liberar_thread_empresa():
+    """Fecha as conexões da thread atual com o banco da empresa. Chame no
+    fim de uma thread própria que usou DAOs (as do ExecutorTk são
+    reaproveitadas e ficam com as suas)."""
+    if _banco_empresa is not None:
+        _banco_empresa.liberar_thread()
+
+
+def get_gerenciador_empresa():
+    """Gerenciador das conexões que gravam no banco da empresa — use para
+    registrar ganchos (ao_abrir/ao_fechar) ou ler estatísticas."""
+    if isinstance(_banco_empresa, GerenciadorConexoes):
+        return _banco_empresa
+    if _banco_empresa is not None:
+        return _banco_empresa.origem
+    return None
+
+
+def estatisticas_empresa():
+    if _banco_empresa is None:
+        return None
+    return _banco_empresa.estatisticas()
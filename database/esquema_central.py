@@ -0,0 +1,112 @@
+"""
+Esquema do banco central (sistemafiscal.db): usuários, permissões,
+configurações e cadastro de empresas.
+
+Roda uma única vez no startup (app.abrir_login) em vez de a cada
+UsuarioDAO() — abrir uma tela não executa mais DDL nem seeds.
+"""
+from database.conexao import garantir_banco
+from database.migracoes import adicionar_coluna, aplicar_migracoes
+from utils.constantes import VERSAO_ATUAL, CAMINHO_EXE_ATUALIZADO
+
+MODULOS_ADMIN = [
+    "abrir_extrator",
+    "abrir_comparador",
+    "abrir_triagem",
+    "abrir_extrator_pdf",
+    "abrir_diaristas",
+    "abrir_centros_custo",
+    "abrir_diarias",
+    "abrir_servicos",
+    "abrir_producao",
+    "abrir_notas_fiscais",
+    "usuarios_admin"
+]
+
+
+def _colunas_posteriores(cur):
+    # Colunas que os bancos em produção receberam depois da criação inicial.
+    adicionar_coluna(cur, "usuarios", "is_active", "INTEGER DEFAULT 1")
+    adicionar_coluna(cur, "empresa", "nome_exibicao", "TEXT")
+    adicionar_coluna(cur, "empresa", "caminho_banco", "TEXT")
+    adicionar_coluna(cur, "empresa", "ativo", "INTEGER DEFAULT 1")
+
+
+def _admin_inicial(cur):
+    from dao.usuario_dao import UsuarioDAO
+
+    cur.execute("SELECT COUNT(*) FROM usuarios WHERE admin = 1")
+    if cur.fetchone()[0]:
+        return
+
+    cur.execute(
+        "INSERT INTO usuarios (nome, senha, admin) VALUES (?, ?, 1)",
+        ("admin", UsuarioDAO.hash_senha("123456"))
+    )
+    admin_id = cur.lastrowid
+
+    # Concede todas as permissões
+    for modulo in MODULOS_ADMIN:
+        cur.execute(
+            "INSERT INTO permissoes (usuario_id, modulo, permitido) VALUES (?, ?, 1)",
+            (admin_id, modulo)
+        )
+
+
+def _configuracoes_padrao(cur):
+    configs = {
+        "versao_atual": VERSAO_ATUAL,
+        "atualizacao_liberada": "NAO",
+        "sistema_bloqueado": "NAO",
+        "mensagem_update": "Atualização disponível",
+        "exe_atualizacao": CAMINHO_EXE_ATUALIZADO
+    }
+    for chave, valor in configs.items():
+        cur.execute("""
+            INSERT INTO configuracoes (chave, valor)
+            VALUES (?, ?)
+            ON CONFLICT(chave) DO NOTHING
+        """, (chave, valor))
+
+
+MIGRACOES_CENTRAL = [
+    (1, "tabelas iniciais", [
+        """CREATE TABLE IF NOT EXISTS usuarios (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               nome TEXT NOT NULL UNIQUE,
+               senha TEXT NOT NULL,
+               admin INTEGER DEFAULT 0
+           )""",
+        """CREATE TABLE IF NOT EXISTS permissoes (
+               usuario_id INTEGER,
+               modulo TEXT,
+               permitido INTEGER DEFAULT 0,
+               FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+           )""",
+        """CREATE TABLE IF NOT EXISTS configuracoes (
+               chave TEXT PRIMARY KEY,
+               valor TEXT NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS empresa (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               nome_exibicao TEXT NOT NULL,
+               caminho_banco TEXT,
+               ativo INTEGER DEFAULT 1
+           )""",
+        """CREATE TABLE IF NOT EXISTS usuario_empresas (
+               usuario_id INTEGER,
+               empresa_id INTEGER,
+               FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+               FOREIGN KEY (empresa_id) REFERENCES empresa(id),
+               UNIQUE(usuario_id, empresa_id)
+           )""",
+    ]),
+    (2, "colunas is_active, nome_exibicao, caminho_banco e ativo", _colunas_posteriores),
+    (3, "administrador inicial", _admin_inicial),
+    (4, "configurações padrão", _configuracoes_padrao),
+]
+
+
+def preparar_banco_central():
+    """Aplica as migrações pendentes do banco central. Retorna quantas rodaram."""
+    return aplicar_migracoes(garantir_banco(), MIGRACOES_CENTRAL)
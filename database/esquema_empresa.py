@@ -0,0 +1,396 @@
+"""
+Esquema dos bancos de empresa (T:\\MTSistem\\db\\empresas\\{id}.db).
+
+Antes cada empresa nascia como cópia de modelo_empresa.db, e bancos já
+existentes nunca recebiam colunas ou índices novos. Agora o esquema é
+uma lista de migrações numeradas aplicada por conectar_empresa() na
+primeira abertura de cada banco na sessão: a migração 1 cria as tabelas
+de um banco novo (e não altera nada num banco copiado do modelo) e as
+seguintes evoluem todos os {id}.db do compartilhamento automaticamente.
+
+Para evoluir o esquema, acrescente uma tupla ao fim de MIGRACOES_EMPRESA
+com o próximo número — nunca altere uma migração já publicada.
+"""
+import os
+import sqlite3
+
+from database.migracoes import adicionar_coluna, aplicar_migracoes
+
+
+def _chave_fornecedor(cur):
+    adicionar_coluna(cur, "fornecedores", "nome_norm", "TEXT")
+    adicionar_coluna(cur, "notas_fiscais", "fornecedor_id",
+                     "INTEGER REFERENCES fornecedores(id)")
+    cur.execute("UPDATE fornecedores SET nome_norm = LOWER(TRIM(nome))")
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fornecedores_nome_norm_ins
+        AFTER INSERT ON fornecedores
+        BEGIN
+            UPDATE fornecedores SET nome_norm = LOWER(TRIM(NEW.nome)) WHERE id = NEW.id;
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fornecedores_nome_norm_upd
+        AFTER UPDATE OF nome ON fornecedores
+        BEGIN
+            UPDATE fornecedores SET nome_norm = LOWER(TRIM(NEW.nome)) WHERE id = NEW.id;
+        END
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_nome_norm_col "
+                "ON fornecedores (nome_norm, cnpj_cpf)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_nf_fornecedor "
+                "ON notas_fiscais (fornecedor_id, data_emissao)")
+    # Backfill único de todas as notas
+    vincular_notas_orfas(cur)
+
+
+# Valores por consulta IN — abaixo do limite de 999 parâmetros de SQLites antigos
+_LOTE_IN = 500
+
+
+def vincular_notas_orfas(cur, nomes_norm=None):
+    """Preenche fornecedor_id das notas sem vínculo com o fornecedor de
+    mesmo nome, preferindo o de mesmo CNPJ/CPF quando houver homônimos
+    (sem commit).
+
+    Sem `nomes_norm` percorre todas as notas órfãs (migração 3); com eles,
+    só as desses emitentes (já normalizados como LOWER(TRIM())), como ao
+    cadastrar fornecedores novos."""
+    sql = """
+        UPDATE notas_fiscais SET fornecedor_id = COALESCE(
+            (SELECT MIN(f.id) FROM fornecedores f
+             WHERE f.nome_norm = LOWER(TRIM(notas_fiscais.emitente))
+               AND COALESCE(f.cnpj_cpf,'') = COALESCE(notas_fiscais.cnpj_cpf,'')),
+            (SELECT MIN(f.id) FROM fornecedores f
+             WHERE f.nome_norm = LOWER(TRIM(notas_fiscais.emitente)))
+        )
+        WHERE fornecedor_id IS NULL
+    """
+    if nomes_norm is None:
+        cur.execute(sql)
+        return
+    nomes_norm = sorted(set(nomes_norm))
+    for i in range(0, len(nomes_norm), _LOTE_IN):
+        bloco = nomes_norm[i:i + _LOTE_IN]
+        cur.execute(sql + f" AND LOWER(TRIM(emitente)) IN ({','.join('?' * len(bloco))})",
+                    bloco)
+
+
+# Situação da nota na tela de Notas Fiscais (ver NotasFiscaisDAO.listar_notas)
+_STATUS_NOTA = """CASE WHEN {t}.pago = 1 THEN 'pago'
+                       WHEN {t}.qtd_recibos > 0 THEN 'ok'
+                       ELSE 'pendente' END"""
+
+
+def _status_notas(cur):
+    adicionar_coluna(cur, "notas_fiscais", "qtd_recibos", "INTEGER NOT NULL DEFAULT 0")
+    adicionar_coluna(cur, "notas_fiscais", "status", "TEXT NOT NULL DEFAULT 'pendente'")
+    cur.execute("""
+        UPDATE notas_fiscais
+        SET qtd_recibos = (SELECT COUNT(*) FROM recibos r WHERE r.nota_id = notas_fiscais.id)
+    """)
+    cur.execute(f"UPDATE notas_fiscais SET status = {_STATUS_NOTA.format(t='notas_fiscais')}")
+
+    # Recibos mantêm o contador; pago/contador mantêm o status. Assim
+    # qualquer caminho de gravação (DAO, exclusão em cascata) fica coerente.
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_recibos_qtd_ins
+        AFTER INSERT ON recibos
+        BEGIN
+            UPDATE notas_fiscais SET qtd_recibos = qtd_recibos + 1 WHERE id = NEW.nota_id;
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_recibos_qtd_del
+        AFTER DELETE ON recibos
+        BEGIN
+            UPDATE notas_fiscais SET qtd_recibos = MAX(qtd_recibos - 1, 0) WHERE id = OLD.nota_id;
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_notas_status_ins
+        AFTER INSERT ON notas_fiscais
+        BEGIN
+            UPDATE notas_fiscais SET status = {_STATUS_NOTA.format(t='NEW')} WHERE id = NEW.id;
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_notas_status_upd
+        AFTER UPDATE OF pago, qtd_recibos ON notas_fiscais
+        WHEN NEW.status IS NOT {_STATUS_NOTA.format(t='NEW')}
+        BEGIN
+            UPDATE notas_fiscais SET status = {_STATUS_NOTA.format(t='NEW')} WHERE id = NEW.id;
+        END
+    """)
+    # Filtro por situação + período e cards de totais (cobre o valor)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_nf_status_data "
+                "ON notas_fiscais (status, data_emissao, valor)")
+
+
+def _totais_producao(cur):
+    adicionar_coluna(cur, "producao_totais_diarista", "qtd_participacoes",
+                     "INTEGER NOT NULL DEFAULT 0")
+    # deletar_dia_producao apagava só o dia (foreign_keys desligado):
+    # divisões e participantes órfãos não entram mais em nenhum total.
+    # Os participantes das divisões órfãs também ficam órfãos, então a
+    # contagem é feita antes de apagar e o que sai é informado.
+    cur.execute("""
+        SELECT COUNT(*), COUNT(DISTINCT producao_dia_id),
+               (SELECT COUNT(*) FROM producao_participantes
+                WHERE producao_divisao_id NOT IN
+                      (SELECT id FROM producao_divisoes
+                       WHERE producao_dia_id IN (SELECT id FROM producao_dias)))
+        FROM producao_divisoes
+        WHERE producao_dia_id NOT IN (SELECT id FROM producao_dias)
+    """)
+    divisoes, dias, participantes = cur.fetchone()
+    cur.execute("""
+        DELETE FROM producao_divisoes
+        WHERE producao_dia_id NOT IN (SELECT id FROM producao_dias)
+    """)
+    cur.execute("""
+        DELETE FROM producao_participantes
+        WHERE producao_divisao_id NOT IN (SELECT id FROM producao_divisoes)
+    """)
+    if divisoes or participantes:
+        print(f"Migração 5: removidos registros órfãos de produção — {divisoes} divisões "
+              f"(de {dias} dias já excluídos) e {participantes} participantes")
+    # Ponto de partida dos totais incrementais (ProducaoDAO._somar_totais)
+    cur.execute("DELETE FROM producao_totais_diarista")
+    cur.execute("""
+        INSERT INTO producao_totais_diarista
+            (producao_id, diarista_id, total_sacos, valor_total, qtd_participacoes)
+        SELECT pdia.producao_id, pp.diarista_id, 0, SUM(pp.valor_receber), COUNT(*)
+        FROM producao_participantes pp
+        JOIN producao_divisoes pd ON pd.id   = pp.producao_divisao_id
+        JOIN producao_dias pdia   ON pdia.id = pd.producao_dia_id
+        GROUP BY pdia.producao_id, pp.diarista_id
+    """)
+    cur.execute("""
+        UPDATE producoes SET
+            total_sacos = (SELECT COALESCE(SUM(total_sacos_dia), 0)
+                           FROM producao_dias WHERE producao_id = producoes.id),
+            valor_total = (SELECT COALESCE(SUM(total_sacos_dia * valor_saco), 0)
+                           FROM producao_dias WHERE producao_id = producoes.id)
+    """)
+
+
+MIGRACOES_EMPRESA = [
+    (1, "tabelas iniciais (modelo_empresa.db)", [
+        """CREATE TABLE IF NOT EXISTS empresa (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               razao_social TEXT NOT NULL,
+               nome_fantasia TEXT,
+               cnpj TEXT NOT NULL UNIQUE,
+               inscricao_estadual TEXT,
+               endereco TEXT,
+               cep TEXT,
+               cidade TEXT,
+               uf TEXT,
+               contato TEXT
+           )""",
+        """CREATE TABLE IF NOT EXISTS diaristas (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               nome TEXT NOT NULL,
+               cpf TEXT UNIQUE,
+               ativo INTEGER DEFAULT 1,
+               data_admissao TEXT
+           )""",
+        """CREATE TABLE IF NOT EXISTS centros_custo (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               centro TEXT NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS valores_diaria (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               valor_padrao REAL,
+               valor_diferente REAL,
+               valor_hora_extra REAL,
+               horas_por_diaria REAL
+           )""",
+        """CREATE TABLE IF NOT EXISTS diarias (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               tipo_diaria TEXT,
+               diarista TEXT,
+               cpf TEXT,
+               qtd_diarias REAL,
+               tipo_valor TEXT,
+               vlr_diaria_hora REAL,
+               vlr_horas_extras REAL,
+               qtd_horas REAL,
+               vlr_unitario REAL,
+               centro_custo TEXT,
+               vlr_total REAL,
+               descricao TEXT,
+               data_emissao TEXT,
+               caminho_arquivo TEXT
+           )""",
+        """CREATE TABLE IF NOT EXISTS servicos (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               centro_custo_id INTEGER NOT NULL,
+               data_servico TEXT NOT NULL,
+               valor REAL NOT NULL,
+               descricao TEXT,
+               observacoes TEXT,
+               FOREIGN KEY (centro_custo_id) REFERENCES centros_custo(id)
+           )""",
+        """CREATE TABLE IF NOT EXISTS servico_diaristas (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               servico_id INTEGER NOT NULL,
+               diarista_id INTEGER NOT NULL,
+               valor_rateio REAL NOT NULL,
+               FOREIGN KEY (servico_id) REFERENCES servicos(id) ON DELETE CASCADE,
+               FOREIGN KEY (diarista_id) REFERENCES diaristas(id)
+           )""",
+        """CREATE TABLE IF NOT EXISTS producoes (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               centro_custo_id INTEGER NOT NULL,
+               data_inicio TEXT NOT NULL,
+               data_fim TEXT,
+               status TEXT DEFAULT 'aberta',
+               valor_saco REAL DEFAULT 0.45,
+               total_sacos INTEGER DEFAULT 0,
+               valor_total REAL DEFAULT 0,
+               observacoes TEXT,
+               created_at TEXT DEFAULT (datetime('now','localtime')),
+               FOREIGN KEY (centro_custo_id) REFERENCES centros_custo(id)
+           )""",
+        """CREATE TABLE IF NOT EXISTS producao_dias (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               producao_id INTEGER NOT NULL,
+               data_producao TEXT NOT NULL,
+               total_sacos_dia INTEGER DEFAULT 0,
+               valor_saco REAL,
+               observacoes TEXT,
+               FOREIGN KEY (producao_id) REFERENCES producoes(id) ON DELETE CASCADE
+           )""",
+        """CREATE TABLE IF NOT EXISTS producao_divisoes (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               producao_dia_id INTEGER NOT NULL,
+               quantidade_sacos INTEGER DEFAULT 0,
+               descricao TEXT,
+               FOREIGN KEY (producao_dia_id) REFERENCES producao_dias(id) ON DELETE CASCADE
+           )""",
+        """CREATE TABLE IF NOT EXISTS producao_participantes (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               producao_divisao_id INTEGER NOT NULL,
+               diarista_id INTEGER NOT NULL,
+               valor_receber REAL DEFAULT 0,
+               FOREIGN KEY (producao_divisao_id) REFERENCES producao_divisoes(id) ON DELETE CASCADE,
+               FOREIGN KEY (diarista_id) REFERENCES diaristas(id)
+           )""",
+        """CREATE TABLE IF NOT EXISTS producao_totais_diarista (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               producao_id INTEGER NOT NULL,
+               diarista_id INTEGER NOT NULL,
+               total_sacos INTEGER DEFAULT 0,
+               valor_total REAL DEFAULT 0,
+               UNIQUE (producao_id, diarista_id),
+               FOREIGN KEY (producao_id) REFERENCES producoes(id) ON DELETE CASCADE,
+               FOREIGN KEY (diarista_id) REFERENCES diaristas(id)
+           )""",
+        """CREATE TABLE IF NOT EXISTS fornecedores (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               nome TEXT NOT NULL,
+               cnpj_cpf TEXT DEFAULT '',
+               email TEXT,
+               telefone TEXT,
+               observacoes TEXT,
+               criado_em TEXT DEFAULT (datetime('now','localtime')),
+               atualizado_em TEXT,
+               UNIQUE (nome, cnpj_cpf)
+           )""",
+        """CREATE TABLE IF NOT EXISTS notas_fiscais (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               numero TEXT NOT NULL,
+               emitente TEXT NOT NULL,
+               cnpj_cpf TEXT,
+               descricao_servico TEXT,
+               valor REAL DEFAULT 0,
+               data_emissao TEXT,
+               competencia TEXT,
+               data_vencimento TEXT,
+               pago INTEGER DEFAULT 0,
+               data_pagamento TEXT,
+               observacoes TEXT,
+               chave_acesso TEXT DEFAULT '',
+               criado_em TEXT DEFAULT (datetime('now','localtime')),
+               atualizado_em TEXT
+           )""",
+        """CREATE TABLE IF NOT EXISTS recibos (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               nota_id INTEGER NOT NULL,
+               arquivo TEXT NOT NULL,
+               nome_arquivo TEXT,
+               criado_em TEXT DEFAULT (datetime('now','localtime')),
+               FOREIGN KEY (nota_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE
+           )""",
+    ]),
+    (2, "índices das consultas mais frequentes", [
+        # Notas fiscais: listagem por período/status, filtro por emitente e
+        # checagem de duplicidade na importação
+        "CREATE INDEX IF NOT EXISTS idx_nf_data_emissao ON notas_fiscais (data_emissao, id)",
+        "CREATE INDEX IF NOT EXISTS idx_nf_pago_data ON notas_fiscais (pago, data_emissao)",
+        "CREATE INDEX IF NOT EXISTS idx_nf_emitente_norm ON notas_fiscais (LOWER(TRIM(emitente)), data_emissao)",
+        "CREATE INDEX IF NOT EXISTS idx_nf_duplicidade ON notas_fiscais (LOWER(TRIM(emitente)), LOWER(TRIM(numero)))",
+        "CREATE INDEX IF NOT EXISTS idx_nf_chave_acesso ON notas_fiscais (chave_acesso)",
+        "CREATE INDEX IF NOT EXISTS idx_recibos_nota ON recibos (nota_id, criado_em)",
+        "CREATE INDEX IF NOT EXISTS idx_fornecedores_nome_norm ON fornecedores (LOWER(TRIM(nome)), LOWER(TRIM(COALESCE(cnpj_cpf,''))))",
+        # Produção: dias → divisões → participantes
+        "CREATE INDEX IF NOT EXISTS idx_producoes_data_inicio ON producoes (data_inicio, centro_custo_id)",
+        "CREATE INDEX IF NOT EXISTS idx_producoes_created_at ON producoes (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_producao_dias_producao ON producao_dias (producao_id, data_producao)",
+        "CREATE INDEX IF NOT EXISTS idx_producao_divisoes_dia ON producao_divisoes (producao_dia_id)",
+        "CREATE INDEX IF NOT EXISTS idx_producao_participantes_divisao ON producao_participantes (producao_divisao_id, diarista_id, valor_receber)",
+        # Serviços e rateios
+        "CREATE INDEX IF NOT EXISTS idx_servicos_data ON servicos (data_servico, id)",
+        "CREATE INDEX IF NOT EXISTS idx_servicos_centro_data ON servicos (centro_custo_id, data_servico)",
+        "CREATE INDEX IF NOT EXISTS idx_servico_diaristas_servico ON servico_diaristas (servico_id, diarista_id, valor_rateio)",
+        "CREATE INDEX IF NOT EXISTS idx_servico_diaristas_diarista ON servico_diaristas (diarista_id, servico_id)",
+        # Diárias: os relatórios filtram por date(data_emissao)
+        "CREATE INDEX IF NOT EXISTS idx_diarias_data_emissao ON diarias (data_emissao)",
+        "CREATE INDEX IF NOT EXISTS idx_diarias_data_emissao_date ON diarias (date(data_emissao))",
+        "ANALYZE",
+    ]),
+    (3, "fornecedor_id em notas_fiscais e nome_norm em fornecedores", _chave_fornecedor),
+    (4, "qtd_recibos e status materializados em notas_fiscais", _status_notas),
+    (5, "totais de produção incrementais", _totais_producao),
+    (6, "índices das colunas ordenáveis nas listagens", [
+        # Cabeçalhos clicáveis refazem a consulta com ORDER BY coluna, id;
+        # o id é o rowid, já presente em todo índice
+        "CREATE INDEX IF NOT EXISTS idx_nf_valor ON notas_fiscais (valor)",
+        "CREATE INDEX IF NOT EXISTS idx_nf_emitente ON notas_fiscais (emitente COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_nf_numero ON notas_fiscais (numero)",
+        "CREATE INDEX IF NOT EXISTS idx_producoes_status ON producoes (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_producoes_data_fim ON producoes (data_fim)",
+        "CREATE INDEX IF NOT EXISTS idx_producoes_total_sacos ON producoes (total_sacos)",
+        "CREATE INDEX IF NOT EXISTS idx_producoes_valor_total ON producoes (valor_total)",
+        "CREATE INDEX IF NOT EXISTS idx_diarias_diarista ON diarias (diarista COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_diarias_vlr_total ON diarias (vlr_total)",
+    ]),
+]
+
+# Bancos já migrados nesta sessão — trocar de empresa e voltar não repete
+# nem a consulta de versão.
+_migrados = set()
+
+
+def migrar_banco_empresa(conn, db_path):
+    """Aplica as migrações pendentes no banco aberto em `conn`."""
+    chave = os.path.normcase(os.path.abspath(db_path))
+    if chave in _migrados:
+        return 0
+    aplicadas = aplicar_migracoes(conn, MIGRACOES_EMPRESA)
+    _migrados.add(chave)
+    return aplicadas
+
+
+def criar_banco_empresa(db_path):
+    """Cria (ou atualiza, se já existir) o arquivo de banco de uma empresa
+    aplicando todas as migrações."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        aplicar_migracoes(conn, MIGRACOES_EMPRESA)
+    finally:
+        conn.close()
+    return db_path
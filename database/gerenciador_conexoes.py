@@ -0,0 +1,183 @@
+"""
+Gerenciador de conexões SQLite.
+
+Cada banco (central ou da empresa) tem um GerenciadorConexoes que:
+
+- abre uma conexão por thread, sob demanda, para que workers em segundo
+  plano consultem sem disputar a conexão da thread do Tk;
+- aplica os PRAGMAs de desempenho/concorrência na abertura (journal_mode,
+  synchronous, cache_size, mmap_size, temp_store, busy_timeout);
+- expõe ganchos de abertura/fechamento/execução e estatísticas (aberturas,
+  fechamentos, comandos executados, tempo gasto abrindo conexões).
+
+Os DAOs recebem um ConexaoThread, que tem a mesma interface de
+sqlite3.Connection mas resolve a conexão da thread atual a cada uso.
+
+Sobre o journal_mode: o modo WAL depende de memória compartilhada (arquivo
+-shm) e não é suportado pelo SQLite em compartilhamentos de rede, por isso
+os bancos do T:\\ continuam em rollback journal (DELETE) e quem evita o
+"database is locked" é o busy_timeout. WAL fica para cópias locais
+(database.cache_local), onde leitores e a sincronização não se bloqueiam.
+"""
+import sqlite3
+import threading
+import time
+
+# Bancos no compartilhamento de rede (T:\MTSistem\db)
+PRAGMAS_REDE = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -16000,      # KiB (negativo) → ~16 MB por conexão
+    "mmap_size": 0,            # mmap sobre SMB não é coerente entre máquinas
+    "temp_store": "MEMORY",
+    "busy_timeout": 15000,     # ms esperando o lock de outro usuário
+}
+
+# Bancos em disco local (cópias de cache)
+PRAGMAS_LOCAL = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -32000,
+    "mmap_size": 268435456,    # 256 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+class GerenciadorConexoes:
+    """Conexões por thread para um arquivo SQLite."""
+
+    def __init__(self, caminho, pragmas=None):
+        self.caminho = caminho
+        self.pragmas = dict(PRAGMAS_REDE if pragmas is None else pragmas)
+
+        self._lock = threading.Lock()
+        self._thread_local = threading.local()
+        self._conexoes = {}
+        self._ao_abrir = []
+        self._ao_fechar = []
+        self._ao_executar = []
+        self._stats = {
+            "aberturas": 0,
+            "fechamentos": 0,
+            "comandos": 0,
+            "tempo_abertura": 0.0,
+        }
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # GANCHOS
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def ao_abrir(self, callback):
+        """Registra callback(conn) chamado logo após abrir uma conexão."""
+        self._ao_abrir.append(callback)
+
+    def ao_fechar(self, callback):
+        """Registra callback(conn) chamado antes de fechar uma conexão."""
+        self._ao_fechar.append(callback)
+
+    def ao_executar(self, callback):
+        """Registra callback(sql) chamado a cada comando executado (SQL já
+        com os parâmetros expandidos). Devolve uma função que remove o gancho."""
+        self._ao_executar.append(callback)
+        return lambda: self._ao_executar.remove(callback)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # CONEXÕES
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def conexao(self):
+        """Conexão da thread atual (aberta na primeira chamada)."""
+        conn = getattr(self._thread_local, "conn", None)
+        if conn is None:
+            conn = self._abrir()
+        return conn
+
+    def proxy(self):
+        return ConexaoThread(self.conexao)
+
+    def _abrir(self):
+        inicio = time.perf_counter()
+        timeout = self.pragmas.get("busy_timeout", 5000) / 1000
+        conn = sqlite3.connect(self.caminho, timeout=timeout,
+                               check_same_thread=False)
+        for nome, valor in self.pragmas.items():
+            conn.execute(f"PRAGMA {nome} = {valor}")
+        conn.set_trace_callback(self._contar_comando)
+
+        with self._lock:
+            self._conexoes[threading.get_ident()] = conn
+            self._stats["aberturas"] += 1
+            self._stats["tempo_abertura"] += time.perf_counter() - inicio
+        self._thread_local.conn = conn
+
+        for callback in self._ao_abrir:
+            callback(conn)
+        return conn
+
+    def _contar_comando(self, sql):
+        with self._lock:
+            self._stats["comandos"] += 1
+        for callback in self._ao_executar:
+            callback(sql)
+
+    def _fechar_conexao(self, conn):
+        for callback in self._ao_fechar:
+            callback(conn)
+        conn.close()
+        with self._lock:
+            self._stats["fechamentos"] += 1
+
+    def liberar_thread(self):
+        """Fecha a conexão da thread atual (ex.: ao encerrar um worker)."""
+        conn = getattr(self._thread_local, "conn", None)
+        if conn is None:
+            return
+        self._thread_local.conn = None
+        with self._lock:
+            self._conexoes.pop(threading.get_ident(), None)
+        self._fechar_conexao(conn)
+
+    def fechar(self):
+        """Fecha as conexões de todas as threads."""
+        with self._lock:
+            conexoes = list(self._conexoes.values())
+            self._conexoes.clear()
+            self._thread_local = threading.local()
+        for conn in conexoes:
+            self._fechar_conexao(conn)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # ESTATÍSTICAS
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["conexoes_ativas"] = len(self._conexoes)
+        stats["caminho"] = self.caminho
+        return stats
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            for chave in self._stats:
+                self._stats[chave] = 0
+
+
+class ConexaoThread:
+    """Mesma interface de sqlite3.Connection, delegando para a conexão
+    devolvida por `obter()` na thread atual."""
+
+    __slots__ = ("_obter",)
+
+    def __init__(self, obter):
+        self._obter = obter
+
+    def __getattr__(self, nome):
+        return getattr(self._obter(), nome)
+
+    def __enter__(self):
+        return self._obter().__enter__()
+
+    def __exit__(self, *exc):
+        return self._obter().__exit__(*exc)
@@ -0,0 +1,85 @@
+"""
+Motor de migrações versionadas para os bancos SQLite.
+
+Cada banco tem uma tabela `schema_version` com uma linha por migração
+aplicada. Uma migração é uma tupla (versao, descricao, passos), onde
+`passos` é uma lista de comandos SQL ou uma função que recebe o cursor.
+
+aplicar_migracoes() é barata quando o banco já está em dia (uma única
+consulta) e segura com vários usuários abrindo o mesmo arquivo no
+compartilhamento: as migrações pendentes rodam sob BEGIN IMMEDIATE e a
+versão é relida depois de obter o lock, então só uma máquina as aplica.
+"""
+
+
+def _tem_tabela_versao(cur):
+    cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_version'"
+    )
+    return cur.fetchone() is not None
+
+
+def versao_schema(conn):
+    """Maior versão aplicada no banco (0 se nunca migrado)."""
+    cur = conn.cursor()
+    if not _tem_tabela_versao(cur):
+        return 0
+    cur.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+
+def _executar_passos(cur, passos):
+    if callable(passos):
+        passos(cur)
+    else:
+        for sql in passos:
+            cur.execute(sql)
+
+
+def aplicar_migracoes(conn, migracoes):
+    """Aplica, em ordem e numa única transação, as migrações com versão
+    maior que a do banco. Retorna quantas foram aplicadas."""
+    ultima = max(versao for versao, _, _ in migracoes)
+    if versao_schema(conn) >= ultima:
+        return 0
+
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                aplicada_em TEXT DEFAULT (datetime('now','localtime'))
+            )
+        """)
+        atual = versao_schema(conn)
+
+        aplicadas = 0
+        for versao, descricao, passos in sorted(migracoes, key=lambda m: m[0]):
+            if versao <= atual:
+                continue
+            _executar_passos(cur, passos)
+            cur.execute(
+                "INSERT INTO schema_version (versao, descricao) VALUES (?, ?)",
+                (versao, descricao)
+            )
+            aplicadas += 1
+
+        conn.commit()
+        return aplicadas
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def colunas_tabela(cur, tabela):
+    cur.execute(f"PRAGMA table_info({tabela})")
+    return {row[1] for row in cur.fetchall()}
+
+
+def adicionar_coluna(cur, tabela, coluna, definicao):
+    """ALTER TABLE ... ADD COLUMN somente se a coluna ainda não existir
+    (bancos antigos podem já tê-la recebido manualmente)."""
+    if coluna not in colunas_tabela(cur, tabela):
+        cur.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
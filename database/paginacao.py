@@ -0,0 +1,62 @@
+"""
+Paginação por chave (keyset) para as listagens das telas.
+
+Em vez de OFFSET, que obriga o SQLite a percorrer e descartar todas as
+linhas anteriores, a página seguinte começa logo depois da última linha
+já exibida: "ORDER BY data_emissao DESC, id DESC" continua com
+"data_emissao < última OR (data_emissao = última AND id < último_id)".
+Com o índice da ordenação, cada página custa o mesmo, seja a primeira ou
+a centésima.
+
+O id entra sempre como desempate, para a ordem ser total mesmo com
+valores repetidos na coluna.
+"""
+
+
+def condicao_apos(coluna, valor, ultimo_id, coluna_id="id", descendente=True):
+    """Cláusula " AND (...)" e parâmetros que selecionam as linhas depois de
+    (valor, ultimo_id) em "ORDER BY coluna [DESC], coluna_id [DESC]".
+
+    Segue a ordenação do SQLite para NULL (menor que qualquer valor): os
+    NULL vêm por último em DESC e primeiro em ASC.
+    """
+    if descendente:
+        if valor is None:
+            return f" AND ({coluna} IS NULL AND {coluna_id} < ?)", [ultimo_id]
+        return (f" AND ({coluna} < ? OR {coluna} IS NULL"
+                f" OR ({coluna} = ? AND {coluna_id} < ?))"), [valor, valor, ultimo_id]
+
+    if valor is None:
+        return f" AND ({coluna} IS NOT NULL OR {coluna_id} > ?)", [ultimo_id]
+    return (f" AND ({coluna} > ?"
+            f" OR ({coluna} = ? AND {coluna_id} > ?))"), [valor, valor, ultimo_id]
+
+
+def clausula_ordem(colunas, ordem, descendente=True, apos=None, coluna_id="id"):
+    """Ordenação escolhida pela tela, já com a condição da próxima página.
+
+    colunas: campo → expressão SQL (lista branca: o nome da coluna vem do
+    cabeçalho clicado e não pode ir direto para o SQL). Colunas de texto
+    levam "COLLATE NOCASE" na própria expressão, e assim a condição da
+    próxima página compara com a mesma collation do ORDER BY.
+    apos: (valor do campo, id) da última linha exibida, ou None.
+
+    Devolve (condição " AND ...", parâmetros, " ORDER BY ...").
+    """
+    if ordem not in colunas:
+        raise ValueError(f"Ordenação não permitida: {ordem!r}")
+    expressao = colunas[ordem]
+    direcao = "DESC" if descendente else "ASC"
+
+    if expressao == coluna_id:
+        # Ordenação pelo próprio id: não precisa de desempate
+        if apos is None:
+            return "", [], f" ORDER BY {coluna_id} {direcao}"
+        return (f" AND {coluna_id} {'<' if descendente else '>'} ?", [apos[1]],
+                f" ORDER BY {coluna_id} {direcao}")
+
+    condicao, params = "", []
+    if apos is not None:
+        condicao, params = condicao_apos(expressao, apos[0], apos[1],
+                                         coluna_id=coluna_id, descendente=descendente)
+    return condicao, params, f" ORDER BY {expressao} {direcao}, {coluna_id} {direcao}"
@@ -0,0 +1,176 @@
+"""
+Verificação dos planos de consulta (EXPLAIN QUERY PLAN) dos DAOs.
+
+Executa as consultas de leitura mais usadas pelas telas contra um banco
+de empresa já migrado, captura o SQL real emitido (gancho ao_executar do
+gerenciador de conexões) e reprova qualquer consulta cujo plano tenha uma
+varredura completa (SCAN sem índice) de uma tabela que pode crescer.
+
+Uso, depois de mexer em DAOs ou em MIGRACOES_EMPRESA:
+
+    python -m database.plano_consultas            # banco temporário novo
+    python -m database.plano_consultas T:\\...\\3.db  # banco existente
+
+Sai com código 1 e lista as consultas problemáticas se houver regressão.
+"""
+import os
+import re
+import sys
+import tempfile
+
+# Cadastros pequenos: varrê-los inteiros é esperado
+TABELAS_PEQUENAS = {"centros_custo", "valores_diaria", "empresa", "schema_version"}
+
+_RE_SCAN = re.compile(r"^SCAN (\w+)$")
+_RE_TABELA = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NAO_ALIAS = {"WHERE", "LEFT", "INNER", "JOIN", "ON", "GROUP", "ORDER", "LIMIT", "USING"}
+
+
+def _aliases(sql):
+    """alias → tabela, para traduzir os nomes que aparecem no plano."""
+    mapa = {}
+    for tabela, alias in _RE_TABELA.findall(sql):
+        mapa[tabela] = tabela
+        if alias and alias.upper() not in _NAO_ALIAS:
+            mapa[alias] = tabela
+    return mapa
+
+
+def _chamadas_dao():
+    """(descrição, função, tabelas cuja varredura é inerente à consulta)."""
+    from dao.diaria_dao import DiariaDAO
+    from dao.notas_fiscais_dao import NotasFiscaisDAO
+    from dao.producao_dao import ProducaoDAO
+    from dao.servico_dao import ServicoDAO
+
+    nf = NotasFiscaisDAO()
+    prod = ProducaoDAO()
+    serv = ServicoDAO()
+    diaria = DiariaDAO()
+    ini, fim = "2024-01-01", "2024-12-31"
+
+    return [
+        ("NotasFiscaisDAO.listar_notas (período)",
+         lambda: nf.listar_notas(data_ini=ini, data_fim=fim), set()),
+        ("NotasFiscaisDAO.listar_notas (pagas no período)",
+         lambda: nf.listar_notas(filtro_status="pago", data_ini=ini, data_fim=fim), set()),
+        ("NotasFiscaisDAO.listar_notas (por emitente)",
+         lambda: nf.listar_notas(emitente_id=1), set()),
+        ("NotasFiscaisDAO.buscar_nota_duplicada",
+         lambda: nf.buscar_nota_duplicada("123", "Fornecedor", "3524"), set()),
+        ("NotasFiscaisDAO.buscar_notas_duplicadas (lote)",
+         lambda: nf.buscar_notas_duplicadas(
+             [{"numero": "1", "emitente": "Fornecedor", "_chave_acesso": "3524"},
+              {"numero": "2", "emitente": "Outro", "_chave_acesso": ""}]), set()),
+        ("NotasFiscaisDAO.upsert_fornecedor_auto (busca)",
+         lambda: nf.conn.execute(
+             """SELECT id FROM fornecedores
+                WHERE nome_norm = LOWER(TRIM(?))
+                AND LOWER(TRIM(COALESCE(cnpj_cpf,''))) = LOWER(TRIM(COALESCE(?,'')))""",
+             ("Fornecedor", "")).fetchall(), set()),
+        ("NotasFiscaisDAO.listar_fornecedores",
+         lambda: nf.listar_fornecedores(), {"fornecedores"}),
+        ("NotasFiscaisDAO.listar_recibos (da nota)",
+         lambda: nf.listar_recibos(1), set()),
+        ("NotasFiscaisDAO.listar_notas (pendentes)",
+         lambda: nf.listar_notas(filtro_status="pendente"), set()),
+        ("NotasFiscaisDAO.get_stats",
+         lambda: nf.get_stats(), set()),
+        ("NotasFiscaisDAO.get_stats (período)",
+         lambda: nf.get_stats(data_ini=ini, data_fim=fim), set()),
+        ("NotasFiscaisDAO.listar_notas (ordem por valor, página)",
+         lambda: nf.listar_notas(ordem="valor", apos=(100.0, 10), limite=200), set()),
+        ("ProducaoDAO.listar_producoes (página)",
+         lambda: prod.listar_producoes(limite=200), set()),
+        ("ProducaoDAO.listar_producoes (abertas, por valor)",
+         lambda: prod.listar_producoes(status="aberta", ordem="valor_total",
+                                       descendente=False, limite=200), set()),
+        ("ProducaoDAO.listar_dias_producao",
+         lambda: prod.listar_dias_producao(1), set()),
+        ("ProducaoDAO.get_totais_diaristas",
+         lambda: prod.get_totais_diaristas(1), set()),
+        ("ProducaoDAO.get_detalhamento_dia",
+         lambda: prod.get_detalhamento_dia(1), set()),
+        ("ProducaoDAO.relatorio_geral",
+         lambda: prod.relatorio_geral(ini, fim), set()),
+        ("ProducaoDAO.relatorio_por_diarista",
+         lambda: prod.relatorio_por_diarista(ini, fim), set()),
+        ("ServicoDAO.listar (período)",
+         lambda: serv.listar(ini, fim), set()),
+        ("ServicoDAO.listar (por diarista)",
+         lambda: serv.listar(filtro_diarista_id=1), set()),
+        ("ServicoDAO.relatorio_por_diarista",
+         lambda: serv.relatorio_por_diarista(ini, fim), set()),
+        ("DiariaDAO.listar_diarias (período)",
+         lambda: diaria.listar_diarias(data_inicio=ini, data_fim=fim), set()),
+        ("DiariaDAO.listar_diarias (por diarista, página)",
+         lambda: diaria.listar_diarias(ordem="diarista", descendente=False,
+                                       apos=("Fulano", 10), limite=200), set()),
+        ("DiariaDAO.relatorio_por_diarista",
+         lambda: diaria.relatorio_por_diarista(ini, fim), set()),
+    ]
+
+
+def _varreduras(conn, sql):
+    """Tabelas varridas por completo (sem índice) no plano de `sql`."""
+    aliases = _aliases(sql)
+    tabelas = set()
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall():
+        m = _RE_SCAN.match(row[3])
+        if m:
+            tabelas.add(aliases.get(m.group(1), m.group(1)))
+    return tabelas
+
+
+def verificar_planos(db_path):
+    """Retorna [(descrição, sql, tabelas_varridas)] das consultas reprovadas."""
+    from database.empresa_conexao import (
+        conectar_empresa, desconectar_empresa, get_gerenciador_empresa
+    )
+
+    conectar_empresa(db_path, cache_local=False)
+    try:
+        gerenciador = get_gerenciador_empresa()
+        conn = gerenciador.conexao()
+        problemas = []
+
+        for descricao, chamada, permitidas in _chamadas_dao():
+            capturados = []
+            remover = gerenciador.ao_executar(capturados.append)
+            try:
+                chamada()
+            finally:
+                remover()
+
+            for sql in capturados:
+                if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                    continue
+                varridas = _varreduras(conn, sql) - TABELAS_PEQUENAS - permitidas
+                if varridas:
+                    problemas.append((descricao, sql, varridas))
+        return problemas
+    finally:
+        desconectar_empresa()
+
+
+def main(argv):
+    if len(argv) > 1:
+        return _relatar(verificar_planos(argv[1]))
+
+    from database.esquema_empresa import criar_banco_empresa
+    with tempfile.TemporaryDirectory() as pasta:
+        return _relatar(verificar_planos(criar_banco_empresa(os.path.join(pasta, "plano.db"))))
+
+
+def _relatar(problemas):
+    if not problemas:
+        print("OK: nenhuma consulta dos DAOs faz varredura completa.")
+        return 0
+    for descricao, sql, varridas in problemas:
+        print(f"✖ {descricao}: SCAN em {', '.join(sorted(varridas))}")
+        print("   " + " ".join(sql.split()))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,127 @@
+"""
+Cache em disco da leitura de DANFSe em PDF.
+
+Rasterizar a página e rodar o Tesseract leva segundos; reimportar o mesmo
+PDF (ou só pré-visualizá-lo de novo no formulário) repetia tudo. Aqui o
+resultado (texto extraído e campos) fica em pasta_dados_app()/cache/nfse,
+endereçado pelo conteúdo: a chave é o SHA-256 dos bytes do PDF junto com a
+configuração da extração, então renomear ou copiar o arquivo não invalida
+o cache, e mudar o OCR ou o parser invalida tudo de uma vez.
+
+Uma entrada por arquivo JSON. O mtime marca o último uso e, ao passar de
+TAMANHO_MAXIMO, as entradas usadas há mais tempo saem primeiro (LRU). A
+pasta só é percorrida quando a estimativa do tamanho (o total da última
+limpeza mais o que este processo gravou depois) passa do limite, e não a
+cada gravação.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+TAMANHO_MAXIMO = 50 * 1024 * 1024   # bytes
+# Ao limpar, desce até esta fração do máximo para não limpar a cada gravação
+FRACAO_APOS_LIMPEZA = 0.8
+
+_BLOCO_LEITURA = 1024 * 1024
+
+# Tamanho estimado da pasta (None = ainda não medido neste processo)
+_tamanho_estimado = None
+
+
+def pasta_cache():
+    from utils.auxiliares import pasta_dados_app
+    pasta = os.path.join(pasta_dados_app(), "cache", "nfse")
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def chave_arquivo(path, configuracao):
+    """SHA-256 da configuração + conteúdo do arquivo."""
+    h = hashlib.sha256(repr(configuracao).encode("utf-8"))
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(_BLOCO_LEITURA), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _caminho(chave):
+    return os.path.join(pasta_cache(), chave + ".json")
+
+
+def obter(chave):
+    """Resultado guardado para `chave`, ou None."""
+    caminho = _caminho(chave)
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            resultado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        os.utime(caminho)  # último uso, para o LRU
+    except OSError:
+        pass
+    return resultado
+
+
+def guardar(chave, resultado):
+    """Grava o resultado (escrita atômica) e aplica o limite de tamanho.
+    Falhas (disco, resultado que não vira JSON) não interrompem a
+    importação: o cache é opcional."""
+    global _tamanho_estimado
+    temporario = None
+    try:
+        pasta = pasta_cache()
+        fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False)
+            gravados = f.tell()
+        os.replace(temporario, _caminho(chave))
+        temporario = None
+
+        if _tamanho_estimado is not None:
+            _tamanho_estimado += gravados
+        if _tamanho_estimado is None or _tamanho_estimado > TAMANHO_MAXIMO:
+            limpar()
+    except Exception as e:
+        print(f"Erro ao gravar cache da NFS-e: {e}")
+        if temporario:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+
+
+def limpar(tamanho_maximo=TAMANHO_MAXIMO):
+    """Remove as entradas usadas há mais tempo até caber no limite."""
+    entradas = []
+    total = 0
+    with os.scandir(pasta_cache()) as it:
+        for entrada in it:
+            if not entrada.name.endswith(".json"):
+                continue
+            try:
+                st = entrada.stat()
+            except OSError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, entrada.path))
+            total += st.st_size
+
+    global _tamanho_estimado
+    _tamanho_estimado = total
+    if total <= tamanho_maximo:
+        return 0
+
+    removidas = 0
+    alvo = tamanho_maximo * FRACAO_APOS_LIMPEZA
+    for _mtime, tamanho, caminho in sorted(entradas):
+        if total <= alvo:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue  # outro processo já removeu
+        total -= tamanho
+        removidas += 1
+    _tamanho_estimado = total
+    return removidas
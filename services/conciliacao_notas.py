@@ -0,0 +1,526 @@
+"""
+Conciliação das notas da SEFAZ com as lançadas no Sistema.
+
+Sem Tk aqui: a tela do comparador (telas.tela_comparador) só escolhe os
+arquivos, chama conciliar() e exporta. Tudo é vetorizado no pandas: a
+limpeza dos valores usa o acessor .str e to_numeric, os valores são
+comparados em centavos inteiros (sem montar strings "numero|valor") e o
+cruzamento usa códigos inteiros (pd.factorize) em vez de um .apply por
+linha contra um conjunto de chaves em texto.
+
+A exportação (exportar) grava o resultado numa passada: em .xlsx as cores
+por status são regras de formatação condicional sobre a coluna Status,
+não um preenchimento célula a célula, e as linhas vão para o arquivo em
+fatias; .csv e .parquet ficam como opção para conciliações grandes demais
+para o Excel.
+
+Cada nota da SEFAZ recebe um Status:
+
+- LANÇADO: número, valor (e CNPJ, se as duas planilhas têm) conferem.
+- VALOR DIVERGENTE: a nota está no Sistema com o mesmo número (e CNPJ),
+  mas com outro valor.
+- CNPJ DIVERGENTE: mesmo número e valor, mas lançada com outro CNPJ.
+- NÃO LANÇADO: nenhuma nota do Sistema com esse número confere.
+"""
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+LANCADO = "LANÇADO"
+VALOR_DIVERGENTE = "VALOR DIVERGENTE"
+CNPJ_DIVERGENTE = "CNPJ DIVERGENTE"
+NAO_LANCADO = "NÃO LANÇADO"
+STATUS = (LANCADO, VALOR_DIVERGENTE, CNPJ_DIVERGENTE, NAO_LANCADO)
+
+COLUNA_STATUS = "Status"
+
+# Nomes aceitos para cada coluna, em ordem de preferência
+COLUNAS_NUMERO_SEFAZ = ("Número", "Numero", "número", "numero")
+COLUNAS_NUMERO_SISTEMA = ("Numero", "Número", "numero", "número")
+COLUNAS_VALOR_SEFAZ = ("Valor Total", "Valor", "valor", "valor total")
+COLUNAS_VALOR_SISTEMA = ("Valor", "valor", "Valor Total", "valor total")
+COLUNA_CNPJ = "CNPJ"
+
+
+def localizar_coluna(colunas, candidatos, descricao, origem):
+    """Primeiro dos `candidatos` presente em `colunas`; ValueError se
+    nenhum estiver."""
+    for col in candidatos:
+        if col in colunas:
+            return col
+    raise ValueError(
+        f"Coluna de {descricao} não encontrada no {origem}. "
+        f"Colunas disponíveis: {list(colunas)}"
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# NORMALIZAÇÃO
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _por_distinto(serie, funcao):
+    """Aplica `funcao` (vetorizada) só aos valores distintos e espalha o
+    resultado: CNPJ e valores se repetem muito numa exportação, e as
+    operações de texto custam por elemento."""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    if len(unicos) == len(serie):
+        return funcao(serie)
+    convertidos = funcao(pd.Series(unicos, dtype=serie.dtype))
+    return pd.Series(convertidos.to_numpy()[codigos], index=serie.index)
+
+
+def _inteiros(serie):
+    """A coluna como int64 se for numérica e sem casas decimais, senão None."""
+    if not pd.api.types.is_numeric_dtype(serie) or serie.isna().any():
+        return None
+    if pd.api.types.is_integer_dtype(serie):
+        return serie.astype("int64")
+    inteiros = serie.round().astype("int64")
+    return inteiros if (inteiros == serie).all() else None
+
+
+def normalizar_numero(serie):
+    """Número da nota como texto sem zeros à esquerda ("000123", 123.0 → "123")."""
+    inteiros = _inteiros(serie)
+    if inteiros is not None:
+        return inteiros.astype(str).str.lstrip("0")
+    return (
+        serie.astype(str)
+        .fillna("")  # célula vazia: no pandas 3 o astype(str) mantém o NaN
+        .str.strip()
+        .str.removesuffix(".0")
+        .str.lstrip("0")
+    )
+
+
+def _valor_texto(serie):
+    texto = (
+        serie.astype(str)
+        .str.replace("R$", "", regex=False)
+        .str.replace(" ", "", regex=False)
+        .str.strip()
+        .str.replace(",", ".", regex=False)
+        .str.replace(r"\.(?=.*\.)", "", regex=True)
+    )
+    return pd.to_numeric(texto, errors="coerce").fillna(0.0).astype("float64")
+
+
+def valor_br(serie):
+    """Valores como float, aceitando o formato brasileiro ("R$ 19.454,00").
+
+    A vírgula vira ponto e, dos pontos, só o último fica (é o decimal);
+    o que não for número vira 0.0."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.to_numeric(serie, errors="coerce").fillna(0.0).astype("float64")
+    return _por_distinto(serie, _valor_texto)
+
+
+def centavos(valores):
+    """Valor em centavos inteiros: a comparação não depende de formatar
+    float em texto."""
+    return (valores * 100).round().astype("int64")
+
+
+def _cnpj_texto(serie):
+    return (
+        serie.astype(str)
+        .fillna("")
+        .str.removesuffix(".0")
+        .str.replace(r"\D", "", regex=True)
+        .str.zfill(14)
+    )
+
+
+def normalizar_cnpj(serie):
+    """Só os dígitos, com 14 posições (um CNPJ lido como número perde os
+    zeros à esquerda e ganha ".0")."""
+    inteiros = _inteiros(serie)
+    if inteiros is not None:
+        return inteiros.astype(str).str.zfill(14)
+    return _por_distinto(serie, _cnpj_texto)
+
+
+def chaves(df, col_numero, col_valor, com_cnpj):
+    """DataFrame com as colunas de comparação: numero, centavos e cnpj."""
+    saida = pd.DataFrame({
+        "numero": normalizar_numero(df[col_numero]),
+        "centavos": centavos(valor_br(df[col_valor])),
+    }, index=df.index)
+    if com_cnpj:
+        saida["cnpj"] = normalizar_cnpj(df[COLUNA_CNPJ])
+    return saida
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CRUZAMENTO
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _codigos(chaves_sefaz, chaves_sistema, coluna):
+    """Código inteiro de cada valor da coluna, comum às duas planilhas
+    (o mesmo texto ou valor recebe o mesmo código dos dois lados)."""
+    juntos = pd.concat([chaves_sefaz[coluna], chaves_sistema[coluna]], ignore_index=True)
+    # Sem o sentinela -1: ele indexaria a última posição da tabela de _contem
+    codigos, unicos = pd.factorize(juntos, use_na_sentinel=False)
+    return codigos.astype("int64"), len(unicos)
+
+
+def _combinar(codigos, colunas):
+    """Junta os códigos de várias colunas num código só por combinação."""
+    combinado, quantidade = codigos[colunas[0]]
+    for coluna in colunas[1:]:
+        outro, outros = codigos[coluna]
+        # < (linhas)² cabe no int64; refatorar mantém o próximo passo pequeno
+        combinado, unicos = pd.factorize(combinado * outros + outro)
+        quantidade = len(unicos)
+    return combinado, quantidade
+
+
+def _contem(codigos, n_sefaz, colunas):
+    """Máscara das linhas da SEFAZ cuja combinação de `colunas` existe no
+    Sistema: os códigos são densos, então basta uma tabela de booleanos."""
+    combinado, quantidade = _combinar(codigos, colunas)
+    presente = np.zeros(quantidade, dtype=bool)
+    presente[combinado[n_sefaz:]] = True
+    return presente[combinado[:n_sefaz]]
+
+
+def classificar(chaves_sefaz, chaves_sistema):
+    """Status de cada linha da SEFAZ (Categorical alinhado ao índice).
+
+    Em vez de montar chaves em texto ou tuplas, cada coluna é fatorada em
+    códigos inteiros e as combinações são cruzadas por indexação de array."""
+    com_cnpj = "cnpj" in chaves_sefaz.columns and "cnpj" in chaves_sistema.columns
+    # Linhas do Sistema sem número (em branco, totais) não conferem com nada
+    chaves_sistema = chaves_sistema[chaves_sistema["numero"] != ""]
+    colunas = ("numero", "centavos", "cnpj") if com_cnpj else ("numero", "centavos")
+    codigos = {c: _codigos(chaves_sefaz, chaves_sistema, c) for c in colunas}
+    n = len(chaves_sefaz)
+
+    if com_cnpj:
+        exato = _contem(codigos, n, ("numero", "cnpj", "centavos"))
+        mesmo_valor = _contem(codigos, n, ("numero", "centavos"))
+        mesma_nota = _contem(codigos, n, ("numero", "cnpj"))
+    else:
+        exato = _contem(codigos, n, ("numero", "centavos"))
+        mesmo_valor = exato
+        mesma_nota = _contem(codigos, n, ("numero",))
+
+    # Do menos para o mais específico: cada atribuição sobrescreve a anterior
+    status = np.full(n, STATUS.index(NAO_LANCADO), dtype="int8")
+    status[mesmo_valor] = STATUS.index(CNPJ_DIVERGENTE)
+    status[mesma_nota] = STATUS.index(VALOR_DIVERGENTE)
+    status[exato] = STATUS.index(LANCADO)
+    return pd.Series(pd.Categorical.from_codes(status, categories=list(STATUS)),
+                     index=chaves_sefaz.index, name=COLUNA_STATUS)
+
+
+def chaves_sistema(sistema, com_cnpj=True):
+    """Chaves distintas do Sistema (numero, centavos e, se houver, cnpj)."""
+    col_numero = localizar_coluna(sistema.columns, COLUNAS_NUMERO_SISTEMA, "número", "Sistema")
+    col_valor = localizar_coluna(sistema.columns, COLUNAS_VALOR_SISTEMA, "valor", "Sistema")
+    com_cnpj = com_cnpj and COLUNA_CNPJ in sistema.columns
+    return chaves(sistema, col_numero, col_valor, com_cnpj).drop_duplicates(ignore_index=True)
+
+
+def conciliar(sefaz, sistema):
+    """Cruza as planilhas já lidas.
+
+    Devolve (sefaz com a coluna Status, resumo), onde resumo tem o total
+    e a quantidade de notas em cada status. O CNPJ só entra na comparação
+    se as duas planilhas tiverem a coluna."""
+    return conciliar_chaves(sefaz, chaves_sistema(sistema, COLUNA_CNPJ in sefaz.columns))
+
+
+def conciliar_chaves(sefaz, chaves_do_sistema):
+    """Como conciliar(), com o Sistema já reduzido às chaves (ver
+    chaves_sistema e ler_chaves_sistema)."""
+    col_numero = localizar_coluna(sefaz.columns, COLUNAS_NUMERO_SEFAZ, "número", "SEFAZ")
+    col_valor = localizar_coluna(sefaz.columns, COLUNAS_VALOR_SEFAZ, "valor", "SEFAZ")
+    com_cnpj = COLUNA_CNPJ in sefaz.columns and "cnpj" in chaves_do_sistema.columns
+
+    status = classificar(chaves(sefaz, col_numero, col_valor, com_cnpj), chaves_do_sistema)
+    resultado = sefaz.assign(**{COLUNA_STATUS: status})
+    return resultado, resumir(status)
+
+
+def resumir(status):
+    """{"total": n, "LANÇADO": n, ...} a partir da coluna Status."""
+    contagem = status.value_counts()
+    resumo = {"total": int(len(status))}
+    for nome in STATUS:
+        resumo[nome] = int(contagem.get(nome, 0))
+    return resumo
+
+
+def comparar_arquivos(caminho_sefaz, caminho_sistema):
+    """Lê as duas planilhas (Excel ou CSV) e concilia (ver conciliar).
+
+    Do Sistema só as colunas de número, valor e CNPJ são lidas, e só as
+    chaves distintas ficam em memória."""
+    sefaz = ler_sefaz(caminho_sefaz)
+    chaves_do_sistema = ler_chaves_sistema(caminho_sistema, COLUNA_CNPJ in sefaz.columns)
+    return conciliar_chaves(sefaz, chaves_do_sistema)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LEITURA
+# ─────────────────────────────────────────────────────────────────────────────
+
+FORMATOS_ENTRADA = (
+    ("Planilhas (Excel ou CSV)", "*.xlsx *.xls *.csv"),
+    ("Arquivos Excel", "*.xlsx *.xls"),
+    ("CSV", "*.csv"),
+)
+
+# O cabeçalho é procurado nas primeiras linhas: exportações do portal
+# costumam vir com título, filtros e linhas em branco antes dele
+LINHAS_CABECALHO = 30
+# CSV é lido em blocos: a memória fica no tamanho das chaves, não do arquivo
+LINHAS_POR_BLOCO = 200_000
+_AMOSTRA_CSV = 64 * 1024
+
+
+def _eh_csv(caminho):
+    return caminho.lower().endswith(".csv")
+
+
+def _formato_csv(caminho):
+    """(codificação, separador) a partir do começo do arquivo. Sem BOM nem
+    UTF-8 válido, assume Latin-1 (o padrão dos sistemas em Windows)."""
+    with open(caminho, "rb") as f:
+        amostra = f.read(_AMOSTRA_CSV)
+    try:
+        texto = amostra.decode("utf-8-sig")
+        codificacao = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        if e.start < len(amostra) - 3:
+            texto = amostra.decode("latin-1")
+            codificacao = "latin-1"
+        else:  # a amostra cortou um caractere no meio
+            texto = amostra[:e.start].decode("utf-8-sig")
+            codificacao = "utf-8-sig"
+    if ";" in texto:
+        return codificacao, ";"
+    if "\t" in texto:
+        return codificacao, "\t"
+    return codificacao, ","
+
+
+def _primeiras_linhas(caminho):
+    """Até LINHAS_CABECALHO linhas cruas, como listas de textos."""
+    if _eh_csv(caminho):
+        codificacao, separador = _formato_csv(caminho)
+        with open(caminho, "r", encoding=codificacao, newline="") as f:
+            leitor = csv.reader(f, delimiter=separador)
+            return [linha for linha, _n in zip(leitor, range(LINHAS_CABECALHO))]
+    amostra = pd.read_excel(caminho, header=None, nrows=LINHAS_CABECALHO, dtype=str)
+    return [["" if pd.isna(v) else v for v in linha]
+            for linha in amostra.itertuples(index=False, name=None)]
+
+
+def cabecalho(caminho, candidatos):
+    """(índice da linha do cabeçalho, nomes das colunas): a primeira linha
+    que tem uma das colunas `candidatos`, ou a primeira de todas."""
+    linhas = _primeiras_linhas(caminho)
+    for i, linha in enumerate(linhas):
+        nomes = [str(v) for v in linha]
+        if any(c in nomes for c in candidatos):
+            return i, nomes
+    return 0, [str(v) for v in linhas[0]] if linhas else []
+
+
+def _blocos(caminho, linha, usecols=None, dtype=None):
+    """DataFrames com os dados a partir do cabeçalho na `linha`: um só para
+    Excel (o leitor do pandas já percorre a planilha em modo streaming), em
+    blocos de LINHAS_POR_BLOCO para CSV."""
+    if not _eh_csv(caminho):
+        yield pd.read_excel(caminho, header=linha, usecols=usecols, dtype=dtype)
+        return
+    codificacao, separador = _formato_csv(caminho)
+    # Em CSV tudo vem como texto: valor_br entende "1.234,56"
+    yield from pd.read_csv(
+        caminho, sep=separador, encoding=codificacao, skiprows=linha, header=0,
+        usecols=usecols, dtype=str, chunksize=LINHAS_POR_BLOCO,
+    )
+
+
+def compactar(df):
+    """Colunas de texto com muita repetição (CNPJ, emitente, situação)
+    viram category: cada texto distinto fica uma vez só na memória."""
+    for coluna in df.columns:
+        serie = df[coluna]
+        if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+            continue
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            continue
+        if serie.nunique(dropna=False) <= len(serie) // 2:
+            df[coluna] = serie.astype("category")
+    return df
+
+
+def ler_sefaz(caminho):
+    """A planilha da SEFAZ inteira (vai toda para o resultado), a partir do
+    cabeçalho detectado e com as colunas repetitivas compactadas."""
+    linha, _nomes = cabecalho(caminho, COLUNAS_NUMERO_SEFAZ)
+    blocos = list(_blocos(caminho, linha))
+    sefaz = blocos[0] if len(blocos) == 1 else pd.concat(blocos, ignore_index=True)
+    return compactar(sefaz)
+
+
+def ler_chaves_sistema(caminho, com_cnpj=True):
+    """Chaves distintas do Sistema lidas direto do arquivo: só as colunas
+    de número, valor e CNPJ, e em CSV bloco a bloco, descartando as chaves
+    repetidas a cada bloco."""
+    linha, nomes = cabecalho(caminho, COLUNAS_NUMERO_SISTEMA)
+    col_numero = localizar_coluna(nomes, COLUNAS_NUMERO_SISTEMA, "número", "Sistema")
+    col_valor = localizar_coluna(nomes, COLUNAS_VALOR_SISTEMA, "valor", "Sistema")
+    com_cnpj = com_cnpj and COLUNA_CNPJ in nomes
+    colunas = [col_numero, col_valor] + ([COLUNA_CNPJ] if com_cnpj else [])
+    # Número e CNPJ como texto: não passam por float nem perdem zeros
+    texto = {c: str for c in colunas if c != col_valor}
+
+    partes = [
+        chaves(bloco, col_numero, col_valor, com_cnpj).drop_duplicates()
+        for bloco in _blocos(caminho, linha, usecols=colunas, dtype=texto)
+    ]
+    if not partes:
+        return chaves(pd.DataFrame(columns=colunas), col_numero, col_valor, com_cnpj)
+    return pd.concat(partes, ignore_index=True).drop_duplicates(ignore_index=True)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EXPORTAÇÃO
+# ─────────────────────────────────────────────────────────────────────────────
+
+LIMITE_LINHAS_XLSX = 1_048_576 - 1  # sem contar o cabeçalho
+# Linhas convertidas para tuplas de cada vez ao gravar o .xlsx
+LINHAS_POR_FATIA = 50_000
+
+# Cor de fundo da linha inteira conforme o Status
+CORES_STATUS = {
+    LANCADO: "C6EFCE",
+    VALOR_DIVERGENTE: "FFEB9C",
+    CNPJ_DIVERGENTE: "FFEB9C",
+    NAO_LANCADO: "F4CCCC",
+}
+
+FORMATOS_EXPORTACAO = (
+    ("Arquivo Excel", "*.xlsx"),
+    ("CSV (separado por ;)", "*.csv"),
+    ("Parquet", "*.parquet"),
+)
+
+
+def exportar(resultado, caminho):
+    """Grava o resultado da conciliação conforme a extensão do caminho
+    (.xlsx, .csv ou .parquet)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".csv":
+        # ; e vírgula decimal: abre direto no Excel em português
+        resultado.to_csv(caminho, index=False, sep=";", decimal=",", encoding="utf-8-sig")
+    elif extensao == ".parquet":
+        try:
+            resultado.to_parquet(caminho, index=False)
+        except ImportError:
+            raise ValueError(
+                "Exportar em Parquet requer o pacote pyarrow. "
+                "Escolha .xlsx ou .csv."
+            )
+    else:
+        _exportar_xlsx(resultado, caminho)
+
+
+def _exportar_xlsx(resultado, caminho):
+    if len(resultado) > LIMITE_LINHAS_XLSX:
+        raise ValueError(
+            f"O resultado tem {len(resultado)} linhas, acima do limite do Excel "
+            f"({LIMITE_LINHAS_XLSX}). Exporte em .csv ou .parquet."
+        )
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        _exportar_xlsx_openpyxl(resultado, caminho)
+    else:
+        _exportar_xlsx_xlsxwriter(resultado, caminho)
+
+
+def _linhas(resultado, fatia=LINHAS_POR_FATIA):
+    """Linhas como tuplas, com None no lugar de NaN/NaT (célula vazia).
+
+    A conversão para object é feita por fatia: só `fatia` linhas de cada
+    vez ficam copiadas, e não o resultado inteiro."""
+    for inicio in range(0, len(resultado), fatia):
+        parte = resultado.iloc[inicio:inicio + fatia]
+        valores = parte.astype(object).where(parte.notna(), None)
+        yield from valores.itertuples(index=False, name=None)
+
+
+def _intervalo(resultado):
+    """(letra da coluna Status, intervalo dos dados "A2:F101") para as regras
+    de formatação condicional. A fórmula de cada regra é relativa à linha
+    2 e o Excel a desloca para as demais."""
+    from openpyxl.utils import get_column_letter
+
+    letra = get_column_letter(resultado.columns.get_loc(COLUNA_STATUS) + 1)
+    ultima = get_column_letter(len(resultado.columns))
+    return letra, f"A2:{ultima}{len(resultado) + 1}"
+
+
+def _exportar_xlsx_xlsxwriter(resultado, caminho):
+    """xlsxwriter em modo de memória constante: cada linha vai para o disco
+    ao ser escrita."""
+    import xlsxwriter
+
+    colunas = [str(c) for c in resultado.columns]
+    wb = xlsxwriter.Workbook(caminho, {
+        "constant_memory": True,
+        "default_date_format": "dd/mm/yyyy",
+    })
+    try:
+        ws = wb.add_worksheet()
+        ws.write_row(0, 0, colunas, wb.add_format({"bold": True}))
+        for r, linha in enumerate(_linhas(resultado), 1):
+            ws.write_row(r, 0, linha)
+
+        letra, intervalo = _intervalo(resultado)
+        for status, cor in CORES_STATUS.items() if len(resultado) else ():
+            ws.conditional_format(intervalo, {
+                "type": "formula",
+                "criteria": f'=${letra}2="{status}"',
+                "format": wb.add_format({"bg_color": "#" + cor}),
+            })
+        ws.freeze_panes(1, 0)
+    finally:
+        wb.close()
+
+
+def _exportar_xlsx_openpyxl(resultado, caminho):
+    """Sem xlsxwriter: openpyxl em modo somente escrita, também linha a
+    linha e com as mesmas regras condicionais."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import Font, PatternFill
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    negrito = Font(bold=True)
+    cabecalho = []
+    for nome in resultado.columns:
+        celula = WriteOnlyCell(ws, value=str(nome))
+        celula.font = negrito
+        cabecalho.append(celula)
+    ws.append(cabecalho)
+    for linha in _linhas(resultado):
+        ws.append(linha)
+
+    letra, intervalo = _intervalo(resultado)
+    for status, cor in CORES_STATUS.items() if len(resultado) else ():
+        ws.conditional_formatting.add(intervalo, FormulaRule(
+            formula=[f'${letra}2="{status}"'],
+            fill=PatternFill("solid", start_color=cor, end_color=cor),
+        ))
+    ws.freeze_panes = "A2"
+    wb.save(caminho)
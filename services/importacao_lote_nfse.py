@@ -0,0 +1,208 @@
+"""
+Pipeline da importação em lote de NFS-e (XML ou PDF).
+
+1. Leitura dos arquivos: os XML num pool de processos (o parse é CPU e não
+   anda em paralelo em threads por causa do GIL) e os PDF, um por vez,
+   numa thread só: o PyMuPDF não é thread-safe. O paralelismo dos PDF fica
+   no motor de OCR (services.motor_ocr), que reconhece as páginas já
+   rasterizadas enquanto as seguintes são lidas. Um XML de lote municipal
+   ou um PDF com várias DANFSe rende um item por nota. Cada item guarda o
+   método usado e os segundos gastos, para a tela mostrar o custo por
+   arquivo.
+2. Duplicidade resolvida em lote: uma consulta por bloco contra o banco
+   (NotasFiscaisDAO.buscar_notas_duplicadas) e um conjunto de chaves para
+   arquivos repetidos dentro do próprio lote.
+3. Gravação de todas as notas e fornecedores numa única transação
+   (NotasFiscaisDAO.inserir_notas_lote).
+
+Sem Tk aqui: a tela roda analisar_arquivos numa thread e recebe o
+progresso por callback.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from services.nfse_importer import NFSeImportError, iterar_nfse_pdf, iterar_nfse_xml
+
+# Deixa um núcleo livre para a interface
+PROCESSOS = max(1, min(8, (os.cpu_count() or 2) - 1))
+# Abaixo disso, subir os processos custa mais do que ler os arquivos
+MINIMO_PARA_PROCESSOS = 16
+
+
+def _eh_xml(path):
+    return path.lower().endswith(".xml")
+
+
+def _metodo(path, dados):
+    """Como o arquivo foi lido: "xml", "texto", "ocr" ou "cache"."""
+    if _eh_xml(path):
+        return "xml"
+    if dados.get("_cache"):
+        return "cache"
+    return dados.get("_metodo", "")
+
+
+def _novo_item(path, nota=None):
+    return {"path": path, "nota": nota, "dados": None, "status": "erro", "motivo": "",
+            "metodo": "xml" if _eh_xml(path) else "", "segundos": 0.0}
+
+
+def _classificar(item, dados):
+    item["dados"] = dados
+    item["metodo"] = _metodo(item["path"], dados)
+    if dados["_problemas"]:
+        item["status"] = "incompleta"
+        item["motivo"] = "; ".join(dados["_problemas"])
+    else:
+        item["status"] = "pronta"
+
+
+def _ler_arquivo(path):
+    """Lê um arquivo e classifica (roda no processo filho ou numa thread).
+
+    Devolve um item por nota: um XML de lote ou um PDF que junta várias
+    DANFSe rende vários, numerados em "nota" (None quando o arquivo tem uma
+    só). Se a leitura falhar no meio (XML grande corrompido, OCR de uma
+    página), as notas lidas até ali são mantidas e o defeito vira um item
+    de erro. O tempo do arquivo é dividido entre os itens."""
+    inicio = time.perf_counter()
+    lidas = []
+    erro = None
+    try:
+        for dados in (iterar_nfse_xml(path) if _eh_xml(path) else iterar_nfse_pdf(path)):
+            lidas.append(dados)
+    except NFSeImportError as e:
+        erro = str(e)
+    except Exception as e:
+        erro = f"Erro inesperado: {e}"
+
+    varias = len(lidas) + (erro is not None) > 1
+    itens = []
+    for n, dados in enumerate(lidas, 1):
+        item = _novo_item(path, n if varias else None)
+        _classificar(item, dados)
+        itens.append(item)
+    if erro is not None:
+        item = _novo_item(path, len(lidas) + 1 if varias else None)
+        item["motivo"] = erro
+        itens.append(item)
+
+    segundos = (time.perf_counter() - inicio) / len(itens)
+    for item in itens:
+        item["segundos"] = segundos
+    return itens
+
+
+def ler_arquivos(paths, ao_progredir=None, cancelado=None, processos=PROCESSOS):
+    """Itens (na ordem de `paths`, um por nota) com os dados lidos de cada
+    arquivo, ou None se `cancelado()` ficou verdadeiro no meio da leitura.
+
+    ao_progredir(lidos, total) é chamado a cada arquivo concluído."""
+    total = len(paths)
+    itens = [None] * total  # lista de itens de cada arquivo
+    xmls = [i for i, path in enumerate(paths) if _eh_xml(path)]
+    pdfs = [i for i, path in enumerate(paths) if not _eh_xml(path)]
+
+    if not pdfs and (processos <= 1 or total < MINIMO_PARA_PROCESSOS):
+        for i, path in enumerate(paths):
+            if cancelado and cancelado():
+                return None
+            itens[i] = _ler_arquivo(path)
+            if ao_progredir:
+                ao_progredir(i + 1, total)
+        return [item for do_arquivo in itens for item in do_arquivo]
+
+    pools = []
+    futuros = {}
+    try:
+        if xmls:
+            if processos > 1 and len(xmls) >= MINIMO_PARA_PROCESSOS:
+                pool = ProcessPoolExecutor(max_workers=min(processos, len(xmls)))
+            else:
+                pool = ThreadPoolExecutor(max_workers=1)
+            pools.append(pool)
+            futuros.update({pool.submit(_ler_arquivo, paths[i]): i for i in xmls})
+        if pdfs:
+            # Uma thread só: o PyMuPDF não aceita documentos abertos em
+            # várias threads; o OCR das páginas já roda em paralelo no motor
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nfse-pdf")
+            pools.append(pool)
+            futuros.update({pool.submit(_ler_arquivo, paths[i]): i for i in pdfs})
+
+        for lidos, futuro in enumerate(as_completed(futuros), 1):
+            if cancelado and cancelado():
+                return None
+            itens[futuros[futuro]] = futuro.result()
+            if ao_progredir:
+                ao_progredir(lidos, total)
+    finally:
+        # Cancelado: descarta os arquivos que ainda nem começaram
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+    return [item for do_arquivo in itens for item in do_arquivo]
+
+
+def estatisticas_leitura(itens):
+    """Por método de leitura: (arquivos, segundos somados, maior tempo)."""
+    por_metodo = {}
+    for item in itens:
+        metodo = item.get("metodo") or "erro"
+        qtd, soma, maior = por_metodo.get(metodo, (0, 0.0, 0.0))
+        por_metodo[metodo] = (qtd + 1, soma + item["segundos"], max(maior, item["segundos"]))
+    return por_metodo
+
+
+def marcar_duplicadas(itens, dao):
+    """Marca como "duplicada" as notas prontas que já estão no banco ou que
+    aparecem mais de uma vez no lote (mesmo XML selecionado duas vezes)."""
+    prontos = [i for i in itens if i["status"] == "pronta"]
+    existentes = dao.buscar_notas_duplicadas([i["dados"] for i in prontos])
+
+    chaves_vistas = set()
+    numeros_vistos = set()
+    for item, dup in zip(prontos, existentes):
+        dados = item["dados"]
+        if dup:
+            item["status"] = "duplicada"
+            item["motivo"] = f"Já existe NF nº {dup['numero']} de {dup['emitente']}"
+            continue
+
+        chave = dados.get("_chave_acesso")
+        numero = (dados["numero"].strip().lower(), dados["emitente"].strip().lower())
+        if (chave and chave in chaves_vistas) or numero in numeros_vistos:
+            item["status"] = "duplicada"
+            item["motivo"] = "Repetida neste lote"
+            continue
+        if chave:
+            chaves_vistas.add(chave)
+        numeros_vistos.add(numero)
+
+
+def analisar_arquivos(paths, dao, ao_progredir=None, cancelado=None):
+    """Etapas 1 e 2: lê os arquivos e resolve a duplicidade. None se cancelado."""
+    itens = ler_arquivos(paths, ao_progredir, cancelado)
+    if itens is None:
+        return None
+    marcar_duplicadas(itens, dao)
+    return itens
+
+
+def importar_itens(dao, itens):
+    """Etapa 3: grava as notas prontas numa transação. Devolve quantas."""
+    notas = []
+    for item in itens:
+        if item["status"] != "pronta":
+            continue
+        dados = item["dados"]
+        notas.append({
+            "numero": dados["numero"],
+            "emitente": dados["emitente"],
+            "cnpj_cpf": dados["cnpj_cpf"],
+            "descricao_servico": dados["descricao_servico"],
+            "valor": dados["valor"],
+            "data_emissao": dados["data_emissao"],
+            "competencia": dados["competencia"],
+            "chave_acesso": dados.get("_chave_acesso") or "",
+        })
+    return dao.inserir_notas_lote(notas)
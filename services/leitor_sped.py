@@ -0,0 +1,152 @@
+"""
+Leitura em streaming de arquivos fiscais em texto delimitado por "|".
+
+Usado pela Triagem SPED (chaves dos registros C100/D100 da EFD) e pelo
+Extrator TXT (livro fiscal exportado pelo sistema contábil). Um EFD de um
+ano passa de alguns GB com milhões de linhas, e quase todas são registros
+que não interessam (C170, C190, 0200…). Então:
+
+- O arquivo é lido em blocos binários e uma expressão regular compilada
+  para os registros e campos pedidos captura, de uma vez por bloco
+  (findall), só esses campos: as demais linhas nem viram str e as linhas
+  encontradas não passam por split em Python.
+- Só os campos pedidos são decodificados.
+- Tudo é gerador: quem chama decide o que guardar.
+
+Layout dos campos: no EFD a linha "|C100|0|1|...|" tem o registro no
+campo 1; os índices usados aqui são os do manual (o mesmo de
+linha.split("|")).
+"""
+import re
+
+ENCODING = "latin-1"
+TAMANHO_BLOCO = 8 * 1024 * 1024
+
+# Índice (no split por "|") da chave de acesso
+CAMPO_CHAVE = {
+    "C100": 9,    # CHV_NFE
+    "D100": 10,   # CHV_CTE
+}
+
+
+def _blocos(caminho, tamanho=TAMANHO_BLOCO):
+    """Blocos de bytes do arquivo terminando sempre em fim de linha."""
+    resto = b""
+    with open(caminho, "rb") as f:
+        while True:
+            bloco = f.read(tamanho)
+            if not bloco:
+                break
+            bloco = resto + bloco
+            corte = bloco.rfind(b"\n") + 1
+            if corte == 0:  # linha maior que o bloco: junta com o próximo
+                resto = bloco
+                continue
+            resto = bloco[corte:]
+            yield bloco[:corte]
+    if resto:
+        yield resto + b"\n"
+
+
+# Um campo: tudo até o próximo "|" ou o fim da linha
+_CAMPO = rb"[^|\r\n]*"
+
+
+def _compilar(campos):
+    """Expressão que acha, a partir de um "\n", as linhas dos registros
+    pedidos e já captura os campos (sem split em Python).
+
+    Devolve (padrao, layout), com layout = [(registro, grupo do nome,
+    grupos dos campos na ordem pedida)] para ler as tuplas do findall."""
+    alternativas = []
+    layout = []
+    grupo = 0
+    for registro, indices in campos.items():
+        ordem = sorted(set(indices))
+        if not ordem or ordem[0] < 2:
+            raise ValueError(f"Campos inválidos para {registro}: {indices}")
+        trecho = b"(" + re.escape(registro.encode("ascii")) + rb")\|"
+        atual = 2  # campo em que o trecho está posicionado
+        for n, indice in enumerate(ordem):
+            if n:
+                trecho += rb"\|"
+            trecho += rb"(?:" + _CAMPO + rb"\|){%d}(" % (indice - atual) + _CAMPO + b")"
+            atual = indice + 1
+        alternativas.append(trecho)
+        posicao = {indice: grupo + 1 + k for k, indice in enumerate(ordem)}
+        layout.append((registro, grupo, tuple(posicao[i] for i in indices)))
+        grupo += 1 + len(ordem)
+    padrao = re.compile(rb"\n\|(?:" + b"|".join(alternativas) + b")")
+    return padrao, layout
+
+
+def registros(caminho, campos):
+    """(registro, (valores...)) para cada linha dos registros pedidos, na
+    ordem do arquivo.
+
+    `campos` mapeia registro → índices desejados, p. ex.
+    {"C100": (9, 12), "D100": (10,)}. Linhas que não chegam ao maior
+    índice pedido (registro truncado) são ignoradas."""
+    padrao, layout = _compilar(campos)
+    for bloco in _blocos(caminho):
+        # O "\n" na frente deixa a primeira linha do bloco igual às demais
+        for achado in padrao.findall(b"\n" + bloco):
+            for registro, grupo, grupos in layout:
+                if achado[grupo]:
+                    yield registro, tuple(achado[g].decode(ENCODING) for g in grupos)
+                    break
+
+
+def chaves_documentos(caminho):
+    """(chaves de NF-e dos C100, chaves de CT-e dos D100), na ordem do
+    arquivo e sem repetição. Campos vazios ou não numéricos (documento
+    sem chave, emissão própria em papel) ficam de fora."""
+    nfe, cte = {}, {}
+    destino = {"C100": nfe, "D100": cte}
+    for registro, (chave,) in registros(caminho, {r: (i,) for r, i in CAMPO_CHAVE.items()}):
+        if chave.isdigit():
+            destino[registro][chave] = None
+    return list(nfe), list(cte)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LIVRO FISCAL (Extrator TXT)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Linha de documento: começa com a data "|dd/mm/aa|"; as demais linhas com
+# valor são complementos (outras alíquotas/CFOP) do documento anterior
+_LINHA_DOCUMENTO = re.compile(rb"\|\d{2}/\d{2}/\d{2}\|")
+_CAMPO_NUMERO = 4
+_CAMPO_DATA = 5
+_CAMPO_VALOR = 8
+
+
+def _campo(partes, indice):
+    return partes[indice].decode(ENCODING).strip()
+
+
+def _valor_br(texto):
+    try:
+        return float(texto.replace(".", "").replace(",", "."))
+    except ValueError:
+        return 0.0
+
+
+def lancamentos_livro(caminho):
+    """(documento, numero, data, valor) por linha do livro com pelo menos
+    9 campos.
+
+    documento é True na linha principal da nota (numero sem zeros à
+    esquerda e data "dd/mm/aa"); nas linhas complementares vem False, com
+    numero e data vazios, e o valor deve ser somado ao documento anterior."""
+    with open(caminho, "rb") as f:
+        for linha in f:
+            partes = linha.split(b"|", _CAMPO_VALOR + 1)
+            if len(partes) <= _CAMPO_VALOR:
+                continue
+            valor = _valor_br(_campo(partes, _CAMPO_VALOR))
+            if _LINHA_DOCUMENTO.match(linha):
+                yield (True, _campo(partes, _CAMPO_NUMERO).lstrip("0"),
+                       _campo(partes, _CAMPO_DATA), valor)
+            else:
+                yield False, "", "", valor
@@ -0,0 +1,215 @@
+"""
+Motor de OCR compartilhado: pool de N workers do Tesseract.
+
+Antes cada DANFSe digitalizada gravava um PNG e um .txt temporários e
+subia um `tesseract` novo, tentando os idiomas um a um. Aqui:
+
+- A imagem vai em memória pelo stdin e o texto volta pelo stdout
+  (`tesseract stdin stdout`), sem arquivos temporários.
+- Com o pacote opcional tesserocr instalado, cada worker mantém uma
+  instância da API do Tesseract com o modelo de idioma já carregado,
+  reaproveitada de arquivo em arquivo; sem ele, cai no executável.
+- Os reconhecimentos rodam num pool de `workers` threads (dimensionado
+  pelos núcleos). enviar() devolve um Future, para quem rasteriza as
+  páginas de um PDF seguir para a próxima enquanto o OCR roda; no máximo
+  2 × workers imagens ficam em memória, o resto espera vaga. Várias
+  threads podem usar o mesmo motor sem sobrecarregar a máquina: é o que
+  a importação em lote faz.
+- O primeiro idioma que funcionou é lembrado e tentado primeiro nas
+  próximas imagens, em vez de falhar no "por" a cada arquivo.
+
+Sem Tk e sem PyMuPDF aqui: recebe os bytes do PNG já rasterizado.
+"""
+import io
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Deixa um núcleo livre para a interface
+WORKERS_OCR = max(1, min(8, (os.cpu_count() or 2) - 1))
+TEMPO_LIMITE = 120  # s por imagem: um Tesseract travado não prende o worker
+
+# Sem janela de console piscando a cada chamada no executável do Windows
+_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+
+class ErroOCR(Exception):
+    pass
+
+
+class MotorOCR:
+    """Reconhecimento de texto com no máximo `workers` execuções simultâneas."""
+
+    def __init__(self, comando, idiomas, workers=WORKERS_OCR):
+        self.comando = comando
+        self.idiomas = tuple(idiomas)
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+        # Imagens na fila ou sendo lidas (cada PNG da página tem alguns MB)
+        self._vagas = threading.BoundedSemaphore(workers * 2)
+        self._lock = threading.Lock()
+        self._idioma = None        # primeiro idioma que funcionou
+        self._apis = None          # fila de instâncias do tesserocr, se houver
+        self.imagens = 0
+        self.segundos = 0.0
+
+    @property
+    def persistente(self):
+        """True quando os workers reaproveitam o modelo carregado (tesserocr)."""
+        return _tesserocr() is not None
+
+    def enviar(self, png):
+        """Agenda o OCR da imagem PNG (bytes) e devolve um Future com
+        (texto, idioma, segundos). Bloqueia se já houver 2 × workers
+        imagens pendentes."""
+        self._vagas.acquire()
+        try:
+            futuro = self._pool.submit(self._tarefa, png)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _f: self._vagas.release())
+        return futuro
+
+    def reconhecer(self, png):
+        """Como enviar(), esperando o resultado."""
+        return self.enviar(png).result()
+
+    def _tarefa(self, png):
+        inicio = time.perf_counter()
+        texto, idioma = self._reconhecer(png)
+        segundos = time.perf_counter() - inicio
+        with self._lock:
+            self.imagens += 1
+            self.segundos += segundos
+        return texto, idioma, segundos
+
+    def _ordem_idiomas(self):
+        if self._idioma is None:
+            return self.idiomas
+        return (self._idioma,) + tuple(i for i in self.idiomas if i != self._idioma)
+
+    def _reconhecer(self, png):
+        ultimo_erro = ""
+        for idioma in self._ordem_idiomas():
+            try:
+                if self.persistente:
+                    texto = self._reconhecer_api(png, idioma)
+                else:
+                    texto = self._reconhecer_processo(png, idioma)
+            except _IdiomaIndisponivel as e:
+                ultimo_erro = str(e)
+                continue
+            self._idioma = idioma
+            return texto, idioma
+        raise ErroOCR(
+            f"Tesseract falhou ao processar o PDF.\n{ultimo_erro}\n\n"
+            "Verifique se o pacote de idioma Português está instalado."
+        )
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # EXECUTÁVEL (stdin → stdout)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _reconhecer_processo(self, png, idioma):
+        try:
+            result = subprocess.run(
+                [self.comando, "stdin", "stdout", "-l", idioma],
+                input=png, capture_output=True, timeout=TEMPO_LIMITE,
+                creationflags=_FLAGS,
+            )
+        except FileNotFoundError:
+            raise ErroOCR(
+                f"Tesseract não encontrado em:\n{self.comando}\n\n"
+                "Reinstale e reinicie o aplicativo."
+            )
+        except subprocess.TimeoutExpired:
+            raise ErroOCR(f"Tesseract não respondeu em {TEMPO_LIMITE} s.")
+
+        if result.returncode != 0:
+            raise _IdiomaIndisponivel(result.stderr.decode("utf-8", "replace"))
+        if not result.stdout.strip():
+            raise ErroOCR("Tesseract não gerou saída. Tente reinstalar.")
+        return result.stdout.decode("utf-8", "replace")
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # TESSEROCR (modelo carregado uma vez por worker)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _reconhecer_api(self, png, idioma):
+        from PIL import Image
+
+        api = self._pegar_api(idioma)
+        try:
+            api.SetImage(Image.open(io.BytesIO(png)))
+            return api.GetUTF8Text()
+        finally:
+            self._devolver_api(idioma, api)
+
+    def _pegar_api(self, idioma):
+        with self._lock:
+            if self._apis is None:
+                self._apis = {}
+            fila = self._apis.setdefault(idioma, queue.SimpleQueue())
+        try:
+            return fila.get_nowait()
+        except queue.Empty:
+            pass
+        # Só as threads do pool chegam aqui: nunca passa de `workers` por idioma
+        try:
+            return _tesserocr().PyTessBaseAPI(lang=idioma)
+        except RuntimeError as e:
+            raise _IdiomaIndisponivel(str(e))
+
+    def _devolver_api(self, idioma, api):
+        with self._lock:
+            fila = self._apis.get(idioma) if self._apis is not None else None
+        if fila is None:
+            api.End()  # o motor foi fechado enquanto a imagem era lida
+        else:
+            fila.put(api)
+
+    def fechar(self):
+        """Encerra o pool (as imagens pendentes ainda são lidas) e libera as
+        instâncias da API."""
+        self._pool.shutdown(wait=False)
+        with self._lock:
+            apis, self._apis = self._apis or {}, None
+        for fila in apis.values():
+            while True:
+                try:
+                    fila.get_nowait().End()
+                except queue.Empty:
+                    break
+
+
+class _IdiomaIndisponivel(Exception):
+    """O Tesseract recusou o idioma: tenta o próximo da lista."""
+
+
+def _tesserocr():
+    try:
+        import tesserocr
+    except ImportError:
+        return None
+    return tesserocr
+
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def obter_motor(comando, idiomas):
+    """Motor único do processo (os workers e o idioma lembrado são
+    compartilhados entre o formulário e a importação em lote)."""
+    global _motor
+    with _motor_lock:
+        if _motor is None or _motor.comando != comando or _motor.idiomas != tuple(idiomas):
+            if _motor is not None:
+                _motor.fechar()
+            _motor = MotorOCR(comando, idiomas)
+        return _motor
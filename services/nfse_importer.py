@@ -1,13 +1,16 @@
 """
-Importador de NFS-e (DANFSe v1.0) via OCR (PDF) ou via XML estruturado.
+Importador de NFS-e (DANFSe v1.0) via PDF (camada de texto ou OCR) ou via
+XML estruturado.
 """
 import re
 import os
-import subprocess
-import tempfile
+import time
 import xml.etree.ElementTree as ET
+from collections import deque
 from datetime import datetime
 
+from services import cache_nfse, motor_ocr
+
 
 class NFSeImportError(Exception):
     pass
@@ -66,8 +69,7 @@ def tesseract_disponivel() -> bool:
     return False
 
 
-def _extrair_texto_ocr(pdf_path: str) -> str:
-    """Converte PDF para imagem em alta resolução e aplica OCR com Tesseract."""
+def _abrir_pdf(pdf_path: str):
     try:
         import fitz
     except ImportError:
@@ -83,45 +85,69 @@ def _extrair_texto_ocr(pdf_path: str) -> str:
 
     if len(doc) == 0:
         raise NFSeImportError("PDF vazio ou corrompido.")
+    return doc
 
-    tesseract_cmd = _encontrar_tesseract()
 
-    page = doc[0]
-    mat = fitz.Matrix(3, 3)  # 3x resolução para OCR de qualidade
-    pix = page.get_pixmap(matrix=mat)
+# Abaixo disso, numa página com imagem, a camada de texto não é útil (PDF
+# digitalizado)
+MIN_CARACTERES_TEXTO = 200
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        img_path = os.path.join(tmpdir, "nfse.png")
-        txt_path = os.path.join(tmpdir, "nfse")
-        pix.save(img_path)
 
-        ultimo_erro = ""
-        for lang in ["por", "por+eng", "eng"]:
-            try:
-                result = subprocess.run(
-                    [tesseract_cmd, img_path, txt_path, "-l", lang],
-                    capture_output=True, text=True
-                )
-                if result.returncode == 0:
-                    break
-                ultimo_erro = result.stderr
-            except FileNotFoundError:
-                raise NFSeImportError(
-                    f"Tesseract não encontrado em:\n{tesseract_cmd}\n\n"
-                    "Reinstale e reinicie o aplicativo."
-                )
-        else:
-            raise NFSeImportError(
-                f"Tesseract falhou ao processar o PDF.\n{ultimo_erro}\n\n"
-                "Verifique se o pacote de idioma Português está instalado."
-            )
+def _texto_nativo(page, ordenar=False) -> str:
+    """Camada de texto da página, sem OCR; vazio se ela não tem texto.
+
+    ordenar=False segue a ordem em que o gerador do PDF escreveu os blocos
+    (na DANFSe costuma ser rótulo e valor de cada campo em sequência);
+    ordenar=True usa a ordem visual, que acerta PDFs montados fora de ordem."""
+    try:
+        return page.get_text("text", sort=ordenar)
+    except Exception:
+        return ""
+
+
+def _precisa_ocr(page, texto) -> bool:
+    """Página digitalizada: pouco texto e alguma imagem. Uma página quase
+    vazia e sem imagem (verso em branco, continuação curta da descrição)
+    fica com o texto que tem, sem passar pelo Tesseract."""
+    if len(texto.strip()) >= MIN_CARACTERES_TEXTO:
+        return False
+    try:
+        return bool(page.get_images())
+    except Exception:
+        return True
+
+
+# Configuração do OCR (entra na chave do cache: mudar aqui invalida o cache)
+ESCALA_OCR = 3  # 3x resolução para OCR de qualidade
+IDIOMAS_OCR = ("por", "por+eng", "eng")
+# Suba ao mudar o parser dos campos, para não servir resultados antigos
+VERSAO_EXTRACAO = 4
 
-        output_file = txt_path + ".txt"
-        if not os.path.isfile(output_file):
-            raise NFSeImportError("Tesseract não gerou saída. Tente reinstalar.")
 
-        with open(output_file, "r", encoding="utf-8") as f:
-            return f.read()
+def _motor_ocr():
+    return motor_ocr.obter_motor(_encontrar_tesseract(), IDIOMAS_OCR)
+
+
+def _enviar_ocr(page, motor, tempos):
+    """Converte a página em imagem de alta resolução e a agenda no motor de
+    OCR (services.motor_ocr: pool compartilhado, imagem pelo stdin, sem
+    arquivos temporários). Devolve o Future do motor."""
+    import fitz
+
+    inicio = time.perf_counter()
+    mat = fitz.Matrix(ESCALA_OCR, ESCALA_OCR)
+    png = page.get_pixmap(matrix=mat).tobytes("png")
+    tempos["rasterizar"] = tempos.get("rasterizar", 0.0) + time.perf_counter() - inicio
+    return motor.enviar(png)
+
+
+def _texto_ocr(futuro, tempos) -> str:
+    try:
+        texto, _idioma, segundos = futuro.result()
+    except motor_ocr.ErroOCR as e:
+        raise NFSeImportError(str(e))
+    tempos["ocr"] = tempos.get("ocr", 0.0) + segundos
+    return texto
 
 
 def _limpar(s: str) -> str:
@@ -196,9 +222,283 @@ def _competencia_da_descricao(desc: str) -> str:
     return m.group(1) if m else ""
 
 
-def importar_nfse(pdf_path: str) -> dict:
-    """Lê um DANFSe v1.0 (via OCR) e retorna dict com campos para o banco."""
-    texto = _extrair_texto_ocr(pdf_path)
+# Rótulo do início de cada DANFSe. Uma exportação da prefeitura pode juntar
+# dezenas de notas num PDF, uma ou mais páginas por nota; página sem rótulo
+# continua a nota anterior (descrição longa que transbordou)
+_MARCA_NOTA = "chave de acesso"
+# Segundo rótulo do cabeçalho, para quando o OCR não lê o primeiro
+_MARCA_NUMERO = "número da nfs-e"
+
+
+def importar_nfse(pdf_path: str, usar_cache: bool = True) -> dict:
+    """Lê a (primeira) DANFSe v1.0 do PDF e retorna dict com campos para o
+    banco.
+
+    Extração em camadas: primeiro a camada de texto do PDF (milissegundos,
+    a maioria dos DANFSe municipais tem uma); só se ela faltar ou não
+    passar na validação dos campos cai para o OCR. `_metodo` informa qual
+    foi usada: "texto" ou "ocr". PDFs já lidos vêm do cache em disco
+    (services.cache_nfse), com `_cache` = True. `_tempos` traz os segundos
+    gastos ("total" e, quando houve OCR, "rasterizar" e "ocr").
+
+    Se o PDF junta várias notas, só as páginas da primeira são lidas e
+    `_problemas` avisa para usar a importação em lote (iterar_nfse_pdf)."""
+    inicio = time.perf_counter()
+    chave = None
+    if usar_cache:
+        chave = _chave_cache(pdf_path, _configuracao_extracao())
+        resultado = cache_nfse.obter(chave)
+        if resultado is not None:
+            resultado["_cache"] = True
+            resultado["_tempos"] = {"total": time.perf_counter() - inicio}
+            return resultado
+
+    doc = _abrir_pdf(pdf_path)
+    notas = _notas_pdf(doc)
+    try:
+        resultado, definitivo, tempos = next(notas)
+    finally:
+        notas.close()
+    if resultado["_paginas"][-1] < len(doc):
+        resultado["_problemas"].append(
+            f"O PDF tem {len(doc)} páginas e esta nota ocupa só "
+            f"{_descrever_paginas(resultado['_paginas'])}; use a Importação em Lote"
+        )
+        resultado["_sucesso"] = False
+
+    # O parcial de quando falta o Tesseract não vai para o cache: depois de
+    # instalá-lo, o mesmo PDF deve passar pelo OCR
+    if chave and definitivo:
+        cache_nfse.guardar(chave, resultado)
+    resultado["_cache"] = False
+    tempos["total"] = time.perf_counter() - inicio
+    resultado["_tempos"] = tempos
+    return resultado
+
+
+def iterar_nfse_pdf(pdf_path: str, usar_cache: bool = True):
+    """Gera um dict por DANFSe do PDF, na ordem das páginas, com os mesmos
+    campos de importar_nfse e `_paginas` (números das páginas da nota).
+
+    As páginas são lidas sob demanda: cada nota sai assim que as páginas
+    dela terminam, sem esperar o resto do arquivo. Páginas sem camada de
+    texto vão para o motor de OCR enquanto as seguintes já são lidas, então
+    uma exportação digitalizada de 200 páginas é reconhecida em paralelo.
+    O arquivo entra no cache quando lido até o fim sem OCR pendente."""
+    inicio = time.perf_counter()
+    chave = None
+    if usar_cache:
+        chave = _chave_cache(pdf_path, _configuracao_extracao() + ("lote",))
+        notas = cache_nfse.obter(chave)
+        if notas is not None:
+            segundos = (time.perf_counter() - inicio) / max(1, len(notas))
+            for resultado in notas:
+                resultado["_cache"] = True
+                resultado["_tempos"] = {"total": segundos}
+                yield resultado
+            return
+
+    doc = _abrir_pdf(pdf_path)
+    lidas = []
+    definitivas = True
+    for resultado, definitivo, tempos in _notas_pdf(doc):
+        definitivas = definitivas and definitivo
+        if chave:
+            lidas.append(dict(resultado))
+        resultado["_cache"] = False
+        resultado["_tempos"] = tempos
+        yield resultado
+    if chave and definitivas:
+        cache_nfse.guardar(chave, lidas)
+
+
+def _chave_cache(pdf_path, configuracao):
+    try:
+        return cache_nfse.chave_arquivo(pdf_path, configuracao)
+    except OSError as e:
+        raise NFSeImportError(f"Não foi possível abrir o PDF:\n{e}")
+
+
+def _configuracao_extracao():
+    return (VERSAO_EXTRACAO, ESCALA_OCR, IDIOMAS_OCR, MIN_CARACTERES_TEXTO,
+            _MARCA_NOTA, _MARCA_NUMERO)
+
+
+def _descrever_paginas(paginas):
+    if len(paginas) == 1:
+        return f"a página {paginas[0]}"
+    return f"as páginas {paginas[0]} a {paginas[-1]}"
+
+
+def _notas_pdf(doc):
+    """Gera (resultado, definitivo, tempos) de cada DANFSe do documento.
+    definitivo é False quando o OCR não pôde rodar e o resultado é o
+    parcial da camada de texto."""
+    inicio = time.perf_counter()
+    for partes in _segmentar(_textos_das_paginas(doc)):
+        resultado, definitivo, tempos = _ler_nota(doc, partes)
+        resultado["_paginas"] = sorted({p[0] + 1 for p in partes})
+        tempos["total"] = time.perf_counter() - inicio
+        yield resultado, definitivo, tempos
+        inicio = time.perf_counter()
+
+
+def _textos_das_paginas(doc):
+    """Gera (índice, texto, método, tempos) de cada página, em ordem.
+
+    Páginas digitalizadas (_precisa_ocr) são rasterizadas e enviadas ao
+    motor de OCR; a leitura segue para as próximas enquanto o motor
+    trabalha (ele mesmo limita quantas imagens ficam pendentes). O PyMuPDF
+    não é thread-safe, então o documento só é tocado nesta thread.
+
+    Sem Tesseract, ou se o OCR de uma página falhar, a página fica com a
+    camada de texto que tiver e o método "texto": _ler_nota valida o
+    resultado e, se não passar, entrega o parcial em vez de perder o PDF."""
+    pendentes = deque()
+    motor = None
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            texto = _texto_nativo(page)
+            ocr = _precisa_ocr(page, texto)
+            if ocr and motor is None:
+                try:
+                    motor = _motor_ocr()
+                except NFSeImportError:
+                    motor = False  # sem Tesseract: não tenta de novo nas próximas
+            if ocr and motor:
+                tempos = {}
+                pendentes.append((i, _enviar_ocr(page, motor, tempos), "ocr", tempos, texto))
+            else:
+                pendentes.append((i, texto, "texto", {}, texto))
+            while pendentes and (pendentes[0][2] == "texto" or pendentes[0][1].done()):
+                yield _resolver_pagina(pendentes.popleft())
+        while pendentes:
+            yield _resolver_pagina(pendentes.popleft())
+    finally:
+        # Leitura interrompida: o OCR das páginas que ainda esperam vaga
+        # não precisa mais rodar
+        for _i, futuro, metodo, _tempos, _texto in pendentes:
+            if metodo == "ocr":
+                futuro.cancel()
+
+
+def _resolver_pagina(pagina):
+    i, conteudo, metodo, tempos, texto = pagina
+    if metodo != "ocr":
+        return i, conteudo, metodo, tempos
+    try:
+        return i, _texto_ocr(conteudo, tempos), metodo, tempos
+    except NFSeImportError as e:
+        print(f"Erro no OCR da página {i + 1}: {e}")
+        return i, texto, "texto", tempos
+
+
+def _dividir_na_marca(texto):
+    """Partes de uma página com mais de uma DANFSe, cortada no rótulo de
+    início a partir do segundo (o cabeçalho antes do primeiro rótulo já é
+    da primeira nota da página)."""
+    linhas = texto.split("\n")
+    cortes = [n for n, linha in enumerate(linhas) if _MARCA_NOTA in linha.lower()][1:]
+    if not cortes:
+        return [texto]
+    limites = [0] + cortes + [len(linhas)]
+    return ["\n".join(linhas[a:b]) for a, b in zip(limites, limites[1:])]
+
+
+def _segmentar(paginas):
+    """Agrupa as páginas em notas. Gera, para cada nota, a lista de partes
+    (índice da página, número da parte na página, texto, método, tempos).
+    Páginas antes do primeiro rótulo (capa) ficam com a primeira nota; um
+    PDF sem rótulo algum vira uma nota só."""
+    atual = []
+    iniciada = False  # a nota atual já passou pelo rótulo de início
+    for i, texto, metodo, tempos in paginas:
+        minusculo = texto.lower()
+        # O segundo rótulo cobre o OCR que não leu o primeiro
+        if _MARCA_NOTA in minusculo or _MARCA_NUMERO in minusculo:
+            if iniciada:
+                yield atual
+                atual = []
+            iniciada = True
+        for n, parte in enumerate(_dividir_na_marca(texto)):
+            if n:
+                yield atual
+                atual = []
+            # O tempo da página conta uma vez, na primeira nota dela
+            atual.append((i, n, parte, metodo, tempos if not n else {}))
+    if atual:
+        yield atual
+
+
+def _parte(texto, n):
+    partes = _dividir_na_marca(texto)
+    return partes[n] if n < len(partes) else texto
+
+
+def _somar_tempos(partes):
+    tempos = {}
+    for _i, _n, _texto, _metodo, tempos_parte in partes:
+        for etapa, segundos in tempos_parte.items():
+            tempos[etapa] = tempos.get(etapa, 0.0) + segundos
+    return tempos
+
+
+def _ler_nota(doc, partes):
+    """(resultado, definitivo, tempos) de uma nota a partir das suas partes.
+
+    Camada de texto primeiro; se não passar na validação, tenta a ordem
+    visual e por fim o OCR das páginas da nota."""
+    tempos = _somar_tempos(partes)
+    ocr = any(p[3] == "ocr" for p in partes)
+    resultado = _extrair_campos("\n".join(p[2] for p in partes))
+    resultado["_metodo"] = "ocr" if ocr else "texto"
+    if ocr or _campos_validos(resultado):
+        return resultado, True, tempos
+
+    parcial = resultado
+    textos = [_parte(_texto_nativo(doc[i], ordenar=True), n) for i, n, *_ in partes]
+    if any(t.strip() for t in textos):
+        resultado = _extrair_campos("\n".join(textos))
+        resultado["_metodo"] = "texto"
+        if _campos_validos(resultado):
+            return resultado, True, tempos
+        if len(resultado["_problemas"]) < len(parcial["_problemas"]):
+            parcial = resultado
+
+    try:
+        motor = _motor_ocr()
+        indices = sorted({i for i, *_ in partes})
+        futuros = {i: _enviar_ocr(doc[i], motor, tempos) for i in indices}
+        textos = {i: _texto_ocr(futuro, tempos) for i, futuro in futuros.items()}
+    except NFSeImportError:
+        # Sem Tesseract: melhor entregar o que a camada de texto já achou
+        return parcial, False, tempos
+    resultado = _extrair_campos("\n".join(_parte(textos[i], n) for i, n, *_ in partes))
+    resultado["_metodo"] = "ocr"
+    return resultado, True, tempos
+
+
+def _campos_validos(resultado: dict) -> bool:
+    """Validação da camada de texto antes de dispensar o OCR: além de todos
+    os campos encontrados, formatos plausíveis (um texto fora de ordem
+    tende a pôr um rótulo onde deveria estar o valor)."""
+    if resultado["_problemas"]:
+        return False
+    if not re.search(r"\d", resultado["numero"]):
+        return False
+    if not resultado["valor"] or resultado["valor"] <= 0:
+        return False
+    try:
+        datetime.strptime(resultado["data_emissao"], "%Y-%m-%d")
+    except ValueError:
+        return False
+    chave = resultado["_chave_acesso"]
+    return not chave or bool(re.fullmatch(r"\d{44}", chave))
+
+
+def _extrair_campos(texto: str) -> dict:
+    """Campos da NFS-e a partir do texto da DANFSe (camada de texto ou OCR)."""
     lines = texto.split("\n")
 
     chave = ""
@@ -370,22 +670,14 @@ def _xml_local_tag(tag: str) -> str:
     return tag.split("}")[-1] if "}" in tag else tag
 
 
-def _xml_find(elem, tagname: str):
-    """Primeiro elemento (entre `elem` e seus descendentes) cujo nome local
-    é `tagname`, ignorando namespace."""
-    if elem is None:
-        return None
-    for node in elem.iter():
-        if _xml_local_tag(node.tag) == tagname:
-            return node
-    return None
+_XML_NOMES = {}  # tag com namespace → nome local (poucas tags distintas)
 
 
-def _xml_text(elem, tagname: str, default: str = "") -> str:
-    node = _xml_find(elem, tagname)
-    if node is not None and node.text:
-        return node.text.strip()
-    return default
+def _xml_nome(tag) -> str:
+    nome = _XML_NOMES.get(tag)
+    if nome is None:
+        nome = _XML_NOMES[tag] = _xml_local_tag(tag) if isinstance(tag, str) else ""
+    return nome
 
 
 def _formatar_cnpj_cpf(digits: str) -> str:
@@ -397,11 +689,214 @@ def _formatar_cnpj_cpf(digits: str) -> str:
     return digits
 
 
-def importar_nfse_xml(xml_path: str) -> dict:
-    """
-    Lê o XML estruturado de uma NFS-e (padrão nacional) e retorna dict com
-    os mesmos campos que `importar_nfse` (vindo do OCR).
-    """
+# Elemento que delimita cada nota num arquivo (um XML pode trazer um lote)
+_XML_TAG_NOTA = "NFSe"
+# Campos lidos em qualquer ponto da nota
+_XML_CAMPOS = {"nNFSe", "vLiq", "dhEmi", "dCompet", "xDescServ"}
+# Campos lidos só dentro do primeiro <emit> (o tomador também tem xNome/CNPJ)
+_XML_CAMPOS_EMIT = {"xNome", "CNPJ", "CPF"}
+_XML_TEXTOS = _XML_CAMPOS | _XML_CAMPOS_EMIT
+# Acima disso o arquivo é lido em streaming, sem montar a árvore
+_XML_LIMITE_ARVORE = 4 * 1024 * 1024
+# Tamanho dos pedaços entregues ao parser no streaming
+_XML_BLOCO = 64 * 1024
+
+
+class _NotaXML:
+    """Textos de uma nota coletados durante a leitura. Vale o primeiro
+    elemento de cada nome, na ordem do documento."""
+
+    __slots__ = ("textos", "emit", "vliq_valores", "tem_valores", "chave",
+                 "_emit_aberto", "_emit_visto", "_valores_aberto")
+
+    def __init__(self):
+        self.textos = {}
+        self.emit = {}
+        self.vliq_valores = None   # vLiq dentro do primeiro <valores>
+        self.tem_valores = False
+        self.chave = None          # Id do primeiro <infNFSe>
+        self._emit_aberto = 0
+        self._emit_visto = False
+        self._valores_aberto = 0
+
+    def abrir(self, nome, attrib):
+        if nome == "emit" and not self._emit_visto:
+            self._emit_aberto += 1
+        elif nome == "valores" and not self.tem_valores:
+            self._valores_aberto += 1
+        elif nome == "infNFSe" and self.chave is None:
+            self.chave = (attrib.get("Id") or "").strip()
+
+    def texto(self, nome, texto):
+        if self._emit_aberto and nome in _XML_CAMPOS_EMIT:
+            self.emit.setdefault(nome, texto)
+        if self._valores_aberto and nome == "vLiq" and self.vliq_valores is None:
+            self.vliq_valores = texto
+        if nome in _XML_CAMPOS:
+            self.textos.setdefault(nome, texto)
+
+    def fechar(self, nome):
+        if nome == "emit" and self._emit_aberto:
+            self._emit_aberto -= 1
+            self._emit_visto = not self._emit_aberto
+        elif nome == "valores" and self._valores_aberto:
+            self._valores_aberto -= 1
+            self.tem_valores = not self._valores_aberto
+
+    @classmethod
+    def da_arvore(cls, elem):
+        """Nota lida de um elemento já em memória, numa passada só (os
+        descendentes do primeiro <emit> e <valores> são revistos, mas são
+        poucos)."""
+        nota = cls()
+        for node in elem.iter():
+            nome = _xml_nome(node.tag)
+            if nome in _XML_CAMPOS:
+                nota.textos.setdefault(nome, node.text.strip() if node.text else "")
+            elif nome == "emit" and not nota._emit_visto:
+                nota._emit_visto = True
+                for filho in node.iter():
+                    nome_filho = _xml_nome(filho.tag)
+                    if nome_filho in _XML_CAMPOS_EMIT:
+                        nota.emit.setdefault(nome_filho, filho.text.strip() if filho.text else "")
+            elif nome == "valores" and not nota.tem_valores:
+                nota.tem_valores = True
+                for filho in node.iter():
+                    if _xml_nome(filho.tag) == "vLiq":
+                        nota.vliq_valores = filho.text.strip() if filho.text else ""
+                        break
+            elif nome == "infNFSe" and nota.chave is None:
+                nota.chave = (node.get("Id") or "").strip()
+        return nota
+
+    def resultado(self) -> dict:
+        """Dict no mesmo formato de `importar_nfse` (vindo do PDF)."""
+        numero = self.textos.get("nNFSe", "")
+        emitente = self.emit.get("xNome", "")
+        cnpj_cpf = _formatar_cnpj_cpf(self.emit.get("CNPJ") or self.emit.get("CPF", ""))
+
+        if self.tem_valores:
+            valor_txt = self.vliq_valores or ""
+        else:
+            valor_txt = self.textos.get("vLiq", "")
+        valor = None
+        if valor_txt:
+            try:
+                valor = float(valor_txt.replace(",", "."))
+            except ValueError:
+                valor = None
+
+        dh_emi = self.textos.get("dhEmi", "")
+        data_emissao = dh_emi[:10] if len(dh_emi) >= 10 else ""
+
+        d_compet = self.textos.get("dCompet", "")
+        competencia = ""
+        if d_compet:
+            try:
+                competencia = datetime.strptime(d_compet[:10], "%Y-%m-%d").strftime("%m/%Y")
+            except ValueError:
+                pass
+
+        resultado = {
+            "numero": numero,
+            "emitente": emitente,
+            "cnpj_cpf": cnpj_cpf,
+            "descricao_servico": _limpar(self.textos.get("xDescServ", "")),
+            "valor": valor,
+            "data_emissao": data_emissao,
+            "competencia": competencia,
+            "_chave_acesso": self.chave or "",
+        }
+
+        problemas = []
+        if not resultado["numero"]:
+            problemas.append("Número da NFS-e (nNFSe) não encontrado")
+        if not resultado["emitente"]:
+            problemas.append("Emitente (xNome) não encontrado")
+        if resultado["valor"] is None:
+            problemas.append("Valor líquido (vLiq) não encontrado")
+        if not resultado["data_emissao"]:
+            problemas.append("Data de emissão (dhEmi) não encontrada")
+        if not resultado["competencia"]:
+            problemas.append("Competência (dCompet) não encontrada")
+
+        resultado["_problemas"] = problemas
+        resultado["_sucesso"] = len(problemas) == 0
+        return resultado
+
+
+class _ColetorXML:
+    """Alvo do XMLParser: recebe abertura, texto e fechamento de cada
+    elemento direto do expat, sem montar a árvore."""
+
+    def __init__(self):
+        self.raiz = _NotaXML()   # campos fora de qualquer <NFSe>
+        self.nota = None
+        self.prontas = []        # notas fechadas ainda não entregues
+        self.total = 0
+        self._abertas = 0        # <NFSe> aninhadas contam como uma
+        self._texto = None       # pedaços do texto do campo aberto
+        self._capturando = False
+
+    def start(self, tag, attrib):
+        nome = _xml_nome(tag)
+        # Como elem.text: só o texto antes do primeiro filho
+        self._capturando = False
+        if nome == _XML_TAG_NOTA:
+            self._abertas += 1
+            if self.nota is None:
+                self.nota = _NotaXML()
+        elif nome in _XML_TEXTOS:
+            self._texto = []
+            self._capturando = True
+        else:
+            (self.nota or self.raiz).abrir(nome, attrib)
+
+    def data(self, dados):
+        if self._capturando:
+            self._texto.append(dados)
+
+    def end(self, tag):
+        nome = _xml_nome(tag)
+        self._capturando = False
+        atual = self.nota or self.raiz
+        if nome in _XML_TEXTOS:
+            atual.texto(nome, "".join(self._texto).strip() if self._texto else "")
+            self._texto = None
+        elif nome == _XML_TAG_NOTA:
+            self._abertas -= 1
+            if not self._abertas:
+                self.prontas.append(self.nota.resultado())
+                self.total += 1
+                self.nota = None
+        else:
+            atual.fechar(nome)
+
+    def close(self):
+        pass
+
+
+def iterar_nfse_xml(xml_path: str):
+    """Gera um dict por NFS-e do arquivo, na ordem em que aparecem.
+
+    Cada elemento é visto uma vez, em vez de uma varredura da árvore
+    inteira por campo. Arquivos pequenos (o caso comum, uma nota) são
+    montados pelo parser em C e percorridos numa passada; acima de
+    _XML_LIMITE_ARVORE, como os lotes municipais com milhares de notas, o
+    arquivo vai em blocos para o XMLParser sem montar a árvore: tempo
+    linear e memória de um bloco. Arquivo sem <NFSe> (só a DPS, por
+    exemplo) vale como uma nota só.
+
+    Lança NFSeImportError se o XML estiver corrompido; no streaming, as
+    notas anteriores ao defeito já terão sido geradas."""
+    try:
+        grande = os.path.getsize(xml_path) > _XML_LIMITE_ARVORE
+    except OSError as e:
+        raise NFSeImportError(f"Não foi possível abrir o XML:\n{e}")
+    if grande:
+        yield from _iterar_nfse_xml_streaming(xml_path)
+        return
+
     try:
         root = ET.parse(xml_path).getroot()
     except ET.ParseError as e:
@@ -409,65 +904,59 @@ def importar_nfse_xml(xml_path: str) -> dict:
     except Exception as e:
         raise NFSeImportError(f"Não foi possível abrir o XML:\n{e}")
 
-    numero = _xml_text(root, "nNFSe")
-
-    emit = _xml_find(root, "emit")
-    emitente = _xml_text(emit, "xNome")
-    cnpj_cpf = _xml_text(emit, "CNPJ") or _xml_text(emit, "CPF")
-    cnpj_cpf = _formatar_cnpj_cpf(cnpj_cpf)
-
-    valores = _xml_find(root, "valores")
-    valor_txt = _xml_text(valores, "vLiq") if valores is not None else _xml_text(root, "vLiq")
-    valor = None
-    if valor_txt:
-        try:
-            valor = float(valor_txt.replace(",", "."))
-        except ValueError:
-            valor = None
-
-    dh_emi = _xml_text(root, "dhEmi")
-    data_emissao = dh_emi[:10] if len(dh_emi) >= 10 else ""
+    notas = [e for e in root.iter() if _xml_nome(e.tag) == _XML_TAG_NOTA]
+    if not notas:
+        yield _NotaXML.da_arvore(root).resultado()
+        return
+    dentro = set()  # <NFSe> dentro de outra contam como parte dela
+    for elem in notas:
+        if elem in dentro:
+            continue
+        dentro.update(e for e in elem.iter() if e is not elem and _xml_nome(e.tag) == _XML_TAG_NOTA)
+        yield _NotaXML.da_arvore(elem).resultado()
+
+
+def _iterar_nfse_xml_streaming(xml_path: str):
+    coletor = _ColetorXML()
+    parser = ET.XMLParser(target=coletor)
+    try:
+        with open(xml_path, "rb") as f:
+            for bloco in iter(lambda: f.read(_XML_BLOCO), b""):
+                parser.feed(bloco)
+                yield from coletor.prontas
+                coletor.prontas.clear()
+        parser.close()
+    except ET.ParseError as e:
+        yield from coletor.prontas
+        raise NFSeImportError(f"Arquivo XML inválido ou corrompido:\n{e}")
+    except OSError as e:
+        raise NFSeImportError(f"Não foi possível abrir o XML:\n{e}")
 
-    d_compet = _xml_text(root, "dCompet")
-    competencia = ""
-    if d_compet:
-        try:
-            competencia = datetime.strptime(d_compet[:10], "%Y-%m-%d").strftime("%m/%Y")
-        except ValueError:
-            pass
+    yield from coletor.prontas
+    if not coletor.total:
+        yield coletor.raiz.resultado()
 
-    descricao = _limpar(_xml_text(root, "xDescServ"))
 
-    chave = ""
-    inf_nfse = _xml_find(root, "infNFSe")
-    if inf_nfse is not None:
-        chave = (inf_nfse.get("Id") or "").strip()
+def importar_nfse_xml_lote(xml_path: str) -> list:
+    """Todas as NFS-e do arquivo (uma ou várias), ver iterar_nfse_xml."""
+    return list(iterar_nfse_xml(xml_path))
 
-    resultado = {
-        "numero": numero,
-        "emitente": emitente,
-        "cnpj_cpf": cnpj_cpf,
-        "descricao_servico": descricao,
-        "valor": valor,
-        "data_emissao": data_emissao,
-        "competencia": competencia,
-        "_chave_acesso": chave,
-    }
 
-    problemas = []
-    if not resultado["numero"]:
-        problemas.append("Número da NFS-e (nNFSe) não encontrado")
-    if not resultado["emitente"]:
-        problemas.append("Emitente (xNome) não encontrado")
-    if resultado["valor"] is None:
-        problemas.append("Valor líquido (vLiq) não encontrado")
-    if not resultado["data_emissao"]:
-        problemas.append("Data de emissão (dhEmi) não encontrada")
-    if not resultado["competencia"]:
-        problemas.append("Competência (dCompet) não encontrada")
+def importar_nfse_xml(xml_path: str) -> dict:
+    """
+    Lê o XML estruturado de uma NFS-e (padrão nacional) e retorna dict com
+    os mesmos campos que `importar_nfse` (vindo do OCR).
 
-    resultado["_problemas"] = problemas
-    resultado["_sucesso"] = len(problemas) == 0
+    Num arquivo de lote devolve a primeira nota e avisa em `_problemas`
+    quantas havia: o lote deve ir pela importação em lote.
+    """
+    notas = importar_nfse_xml_lote(xml_path)
+    resultado = notas[0]
+    if len(notas) > 1:
+        resultado["_problemas"].append(
+            f"O arquivo tem {len(notas)} NFS-e; use a Importação em Lote"
+        )
+        resultado["_sucesso"] = False
     return resultado
 
 
@@ -0,0 +1,189 @@
+"""
+Triagem SPED → PDFs: localiza os DANFE/DACTE das chaves do SPED e mescla.
+
+Antes a tela testava os.path.exists na pasta (geralmente um compartilhamento
+de rede) uma vez por chave, mesclava tudo num PdfMerger só, em série e na
+thread do Tk. Aqui:
+
+- A pasta é listada uma vez (indexar_pasta): uma ida ao servidor em vez
+  de uma por chave, e o tamanho de cada PDF já vem da listagem.
+- planejar() cruza as chaves com o índice, aponta as chaves sem PDF e os
+  PDFs que não são de nenhuma chave, e divide a saída em volumes por mês
+  de emissão (tirado da própria chave: posições AAMM) e/ou por tamanho.
+- mesclar_volumes() roda numa thread da tela: os PDFs seguintes são lidos
+  da rede em paralelo enquanto o atual é mesclado, e o progresso volta por
+  callback. Um PDF corrompido é anotado e pulado, sem perder o resto.
+"""
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Leituras simultâneas na pasta de rede e quantos PDFs ficam lidos à frente
+LEITORES = 4
+LIDOS_A_FRENTE = 8
+
+TIPOS = ("NFe", "CTe")
+
+
+def indexar_pasta(pasta):
+    """{chave (nome sem .pdf, minúsculo): (caminho, tamanho em bytes)}."""
+    indice = {}
+    with os.scandir(pasta) as it:
+        for entrada in it:
+            nome, extensao = os.path.splitext(entrada.name)
+            if extensao.lower() != ".pdf" or not entrada.is_file():
+                continue
+            try:
+                tamanho = entrada.stat().st_size
+            except OSError:
+                tamanho = 0
+            indice[nome.lower()] = (entrada.path, tamanho)
+    return indice
+
+
+def mes_da_chave(chave):
+    """"AAAA-MM" de emissão (posições 3 a 6 da chave de acesso: AAMM)."""
+    if len(chave) != 44 or not chave.isdigit():
+        return "sem-data"
+    return f"20{chave[2:4]}-{chave[4:6]}"
+
+
+def _dividir(arquivos, por_mes, tamanho_maximo):
+    """[(sufixo, arquivos)] na ordem do SPED."""
+    grupos = {}
+    for arquivo in arquivos:
+        grupos.setdefault(mes_da_chave(arquivo[0]) if por_mes else "", []).append(arquivo)
+
+    volumes = []
+    for mes, do_grupo in grupos.items():
+        partes = [[]]
+        acumulado = 0
+        for arquivo in do_grupo:
+            if tamanho_maximo and partes[-1] and acumulado + arquivo[2] > tamanho_maximo:
+                partes.append([])
+                acumulado = 0
+            partes[-1].append(arquivo)
+            acumulado += arquivo[2]
+        for n, parte in enumerate(partes, 1):
+            sufixo = "_".join(filter(None, [mes, f"parte{n}" if len(partes) > 1 else ""]))
+            volumes.append((sufixo, parte))
+    return volumes
+
+
+def planejar(chaves_por_tipo, indice, por_mes=False, tamanho_maximo=None):
+    """Cruza as chaves ({"NFe": [...], "CTe": [...]}) com o índice da pasta.
+
+    Devolve um dict com:
+    - volumes: [{"tipo", "nome", "arquivos": [(chave, caminho, tamanho)]}];
+      sem divisão, o nome é "NFe_unico"/"CTe_unico", como sempre foi
+    - encontradas / faltantes: {tipo: [chaves]}
+    - extras: nomes dos PDFs da pasta que não são de nenhuma chave
+    """
+    plano = {"volumes": [], "encontradas": {}, "faltantes": {}, "extras": []}
+    usadas = set()
+    for tipo in TIPOS:
+        arquivos = []
+        faltantes = []
+        for chave in chaves_por_tipo.get(tipo, ()):
+            achado = indice.get(chave.lower())
+            if achado is None:
+                faltantes.append(chave)
+            else:
+                arquivos.append((chave, achado[0], achado[1]))
+                usadas.add(chave.lower())
+        plano["encontradas"][tipo] = [a[0] for a in arquivos]
+        plano["faltantes"][tipo] = faltantes
+        if not arquivos:
+            continue
+        for sufixo, do_volume in _dividir(arquivos, por_mes, tamanho_maximo):
+            plano["volumes"].append({
+                "tipo": tipo,
+                "nome": f"{tipo}_{sufixo or 'unico'}",
+                "arquivos": do_volume,
+            })
+
+    plano["extras"] = sorted(os.path.basename(caminho)
+                             for chave, (caminho, _t) in indice.items() if chave not in usadas)
+    return plano
+
+
+def _ler(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
+
+
+def mesclar_volumes(plano, pasta_saida, ao_progredir=None, cancelado=None):
+    """Grava um PDF por volume do plano em `pasta_saida`.
+
+    ao_progredir(feitos, total, nome_do_volume) é chamado a cada PDF
+    mesclado. Devolve (caminhos gravados, [(arquivo, erro)] dos PDFs que
+    não puderam ser lidos), ou None se `cancelado()` ficou verdadeiro."""
+    # Só a mescla precisa do PyPDF2: o índice e o plano funcionam sem ele
+    from PyPDF2 import PdfMerger
+
+    fila = [arquivo for volume in plano["volumes"] for arquivo in volume["arquivos"]]
+    total = len(fila)
+    gravados = []
+    com_erro = []
+
+    pool = ThreadPoolExecutor(max_workers=LEITORES, thread_name_prefix="triagem")
+    lendo = deque()
+    proximo = 0
+    feitos = 0
+    try:
+        for volume in plano["volumes"]:
+            merger = PdfMerger()
+            try:
+                for _arquivo in volume["arquivos"]:
+                    # Mantém LIDOS_A_FRENTE leituras de rede adiantadas
+                    while proximo < total and len(lendo) < LIDOS_A_FRENTE:
+                        lendo.append((fila[proximo], pool.submit(_ler, fila[proximo][1])))
+                        proximo += 1
+                    (_chave, caminho, _tamanho), futuro = lendo.popleft()
+                    if cancelado and cancelado():
+                        return None
+                    try:
+                        merger.append(io.BytesIO(futuro.result()))
+                    except Exception as e:
+                        com_erro.append((os.path.basename(caminho), str(e)))
+                    feitos += 1
+                    if ao_progredir:
+                        ao_progredir(feitos, total, volume["nome"])
+
+                if merger.pages:
+                    saida = os.path.join(pasta_saida, f"{volume['nome']}.pdf")
+                    merger.write(saida)
+                    gravados.append(saida)
+            finally:
+                merger.close()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return gravados, com_erro
+
+
+def gravar_pendencias(plano, com_erro, pasta_saida):
+    """Relatório texto das chaves sem PDF, PDFs que sobraram e PDFs com
+    erro. Devolve o caminho, ou None se não há pendências."""
+    linhas = []
+    for tipo in TIPOS:
+        faltantes = plano["faltantes"].get(tipo, [])
+        if faltantes:
+            linhas.append(f"{tipo} sem PDF na pasta ({len(faltantes)}):")
+            linhas.extend(f"  {chave}" for chave in faltantes)
+            linhas.append("")
+    if plano["extras"]:
+        linhas.append(f"PDFs da pasta que não estão no SPED ({len(plano['extras'])}):")
+        linhas.extend(f"  {nome}" for nome in plano["extras"])
+        linhas.append("")
+    if com_erro:
+        linhas.append(f"PDFs que não puderam ser mesclados ({len(com_erro)}):")
+        linhas.extend(f"  {nome}: {erro}" for nome, erro in com_erro)
+        linhas.append("")
+    if not linhas:
+        return None
+
+    caminho = os.path.join(pasta_saida, "Triagem_pendencias.txt")
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas))
+    return caminho
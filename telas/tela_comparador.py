@@ -1,11 +1,9 @@
 import os
-import pandas as pd
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
 from utils.constantes import CORES
 from utils.auxiliares import resource_path
+from services import conciliacao_notas
 
 # =====================================================
 # COMPARADOR DE NOTAS
@@ -172,7 +170,7 @@ class ComparadorNotasEmbed:
         
         ttk.Button(
             arquivo_frame,
-            text="📁 Selecionar Arquivo Excel",
+            text="📁 Selecionar Planilha (Excel ou CSV)",
             style='Secondary.TButton',
             command=comando
         ).pack(anchor="w")
@@ -201,7 +199,7 @@ class ComparadorNotasEmbed:
     def sel_sefaz(self):
         arquivo = filedialog.askopenfilename(
             title="Selecionar arquivo SEFAZ",
-            filetypes=[("Arquivos Excel", "*.xlsx *.xls")]
+            filetypes=list(conciliacao_notas.FORMATOS_ENTRADA)
         )
         if arquivo:
             self.sefaz = arquivo
@@ -210,7 +208,7 @@ class ComparadorNotasEmbed:
     def sel_sistema(self):
         arquivo = filedialog.askopenfilename(
             title="Selecionar arquivo Sistema",
-            filetypes=[("Arquivos Excel", "*.xlsx *.xls")]
+            filetypes=list(conciliacao_notas.FORMATOS_ENTRADA)
         )
         if arquivo:
             self.sistema = arquivo
@@ -231,177 +229,13 @@ class ComparadorNotasEmbed:
             )
             self.parent_frame.update_idletasks()
 
-            # Ler arquivos
-            sefaz = pd.read_excel(self.sefaz)
-            sistema = pd.read_excel(self.sistema)
-
-            # ===== VERIFICAR COLUNAS =====
-            print("\n=== DEBUG: COLUNAS ENCONTRADAS ===")
-            print(f"SEFAZ colunas: {sefaz.columns.tolist()}")
-            print(f"Sistema colunas: {sistema.columns.tolist()}")
-
-            # ===== NORMALIZAÇÃO =====
-            sefaz_aux = sefaz.copy()
-            sistema_aux = sistema.copy()
-
-            # ===== NORMALIZAR NÚMERO =====
-            # Verificar qual coluna existe no SEFAZ
-            col_numero_sefaz = None
-            for col in ['Número', 'Numero', 'número', 'numero']:
-                if col in sefaz_aux.columns:
-                    col_numero_sefaz = col
-                    break
-            
-            if not col_numero_sefaz:
-                raise ValueError(f"Coluna de número não encontrada no SEFAZ. Colunas disponíveis: {sefaz_aux.columns.tolist()}")
-
-            sefaz_aux["numero"] = (
-                sefaz_aux[col_numero_sefaz]
-                .astype(str)
-                .str.strip()
-                .str.replace(r"\.0$", "", regex=True)
-                .str.lstrip("0")
-            )
-
-            # Verificar qual coluna existe no Sistema
-            col_numero_sistema = None
-            for col in ['Numero', 'Número', 'numero', 'número']:
-                if col in sistema_aux.columns:
-                    col_numero_sistema = col
-                    break
-            
-            if not col_numero_sistema:
-                raise ValueError(f"Coluna de número não encontrada no Sistema. Colunas disponíveis: {sistema_aux.columns.tolist()}")
-
-            sistema_aux["numero"] = (
-                sistema_aux[col_numero_sistema]
-                .astype(str)
-                .str.strip()
-                .str.replace(r"\.0$", "", regex=True)
-                .str.lstrip("0")
-            )
-
-            # ===== NORMALIZAR VALOR =====
-            def limpar_valor_br(valor):
-                """Converte valor brasileiro (R$ 19.454,00) para float"""
-                if pd.isna(valor):
-                    return 0.0
-                valor_str = str(valor).strip()
-                # Remove R$ e espaços
-                valor_str = valor_str.replace("R$", "").strip()
-                # Remove espaços em branco
-                valor_str = valor_str.replace(" ", "")
-                # Substitui vírgula por ponto ANTES de remover pontos dos milhares
-                valor_str = valor_str.replace(",", ".")
-                # Agora remove TODOS os pontos EXCETO o último (que é o decimal)
-                partes = valor_str.split(".")
-                if len(partes) > 1:
-                    # Junta tudo antes do último ponto + último ponto + último valor
-                    valor_str = "".join(partes[:-1]) + "." + partes[-1]
-                try:
-                    return float(valor_str)
-                except:
-                    return 0.0
-
-            # Verificar coluna de valor SEFAZ
-            col_valor_sefaz = None
-            for col in ['Valor Total', 'Valor', 'valor', 'valor total']:
-                if col in sefaz_aux.columns:
-                    col_valor_sefaz = col
-                    break
-            
-            if not col_valor_sefaz:
-                raise ValueError(f"Coluna de valor não encontrada no SEFAZ. Colunas disponíveis: {sefaz_aux.columns.tolist()}")
-
-            sefaz_aux["valor"] = sefaz_aux[col_valor_sefaz].apply(limpar_valor_br).round(2)
-
-            # Verificar coluna de valor Sistema
-            col_valor_sistema = None
-            for col in ['Valor', 'valor', 'Valor Total', 'valor total']:
-                if col in sistema_aux.columns:
-                    col_valor_sistema = col
-                    break
-            
-            if not col_valor_sistema:
-                raise ValueError(f"Coluna de valor não encontrada no Sistema. Colunas disponíveis: {sistema_aux.columns.tolist()}")
-
-            sistema_aux["valor"] = pd.to_numeric(
-                sistema_aux[col_valor_sistema], errors="coerce"
-            ).fillna(0.0).round(2)
-
-            # Valor padronizado (string)
-            sefaz_aux["valor_str"] = sefaz_aux["valor"].apply(lambda x: f"{x:.2f}")
-            sistema_aux["valor_str"] = sistema_aux["valor"].apply(lambda x: f"{x:.2f}")
-
-            # ===== DEBUG: PRIMEIRAS LINHAS =====
-            print("\n=== DEBUG: PRIMEIRAS 3 LINHAS PROCESSADAS ===")
-            print("\nSEFAZ:")
-            print(sefaz_aux[["numero", "valor", "valor_str"]].head(3))
-            print("\nSISTEMA:")
-            print(sistema_aux[["numero", "valor", "valor_str"]].head(3))
-
-            # ===== CNPJ OPCIONAL =====
-            def normalizar_cnpj(df, coluna):
-                if coluna in df.columns:
-                    return (
-                        df[coluna]
-                        .astype(str)
-                        .str.replace(r"\D", "", regex=True)
-                        .str.zfill(14)
-                    )
-                return None
-
-            sefaz_cnpj = normalizar_cnpj(sefaz_aux, "CNPJ")
-            sistema_cnpj = normalizar_cnpj(sistema_aux, "CNPJ")
-
-            # ===== CHAVES =====
-            if sefaz_cnpj is not None and sistema_cnpj is not None:
-                sefaz_aux["chave"] = (
-                    sefaz_aux["numero"] + "|" +
-                    sefaz_cnpj + "|" +
-                    sefaz_aux["valor_str"]
-                )
-
-                sistema_chaves = set(
-                    sistema_aux["numero"] + "|" +
-                    sistema_cnpj + "|" +
-                    sistema_aux["valor_str"]
-                )
-            else:
-                sefaz_aux["chave"] = (
-                    sefaz_aux["numero"] + "|" +
-                    sefaz_aux["valor_str"]
-                )
-
-                sistema_chaves = set(
-                    sistema_aux["numero"] + "|" +
-                    sistema_aux["valor_str"]
-                )
-
-            # ===== DEBUG: CHAVES =====
-            print("\n=== DEBUG: CHAVES GERADAS ===")
-            print(f"\nPrimeiras 3 chaves SEFAZ:")
-            for chave in list(sefaz_aux["chave"].head(3)):
-                print(f"  '{chave}'")
-            
-            print(f"\nTodas as chaves SISTEMA ({len(sistema_chaves)} total):")
-            for chave in list(sistema_chaves):
-                print(f"  '{chave}'")
-
-            # ===== STATUS =====
-            sefaz["Status"] = sefaz_aux["chave"].apply(
-                lambda x: "LANÇADO" if x in sistema_chaves else "NÃO LANÇADO"
-            )
-
-            # ===== DEBUG: RESULTADO =====
-            print("\n=== DEBUG: RESULTADO DA COMPARAÇÃO ===")
-            print(sefaz[["Número" if "Número" in sefaz.columns else col_numero_sefaz, "Status"]].head(10))
+            sefaz, resumo = conciliacao_notas.comparar_arquivos(self.sefaz, self.sistema)
 
             # ===== EXPORTAÇÃO =====
             saida = filedialog.asksaveasfilename(
                 title="Salvar resultado da comparação",
                 defaultextension=".xlsx",
-                filetypes=[("Arquivo Excel", "*.xlsx")]
+                filetypes=list(conciliacao_notas.FORMATOS_EXPORTACAO)
             )
 
             if not saida:
@@ -411,37 +245,17 @@ class ComparadorNotasEmbed:
             self.status_label.config(text="💾 Salvando resultado...")
             self.parent_frame.update_idletasks()
 
-            sefaz.to_excel(saida, index=False)
-
-            # ===== FORMATAÇÃO =====
-            wb = load_workbook(saida)
-            ws = wb.active
-
-            col_status = list(ws[1]).index(
-                next(c for c in ws[1] if c.value == "Status")
-            ) + 1
-
-            verde = PatternFill("solid", fgColor="C6EFCE")
-            vermelho = PatternFill("solid", fgColor="F4CCCC")
-
-            for r in range(2, ws.max_row + 1):
-                cor = verde if ws.cell(r, col_status).value == "LANÇADO" else vermelho
-                for c in range(1, ws.max_column + 1):
-                    ws.cell(r, c).fill = cor
-
-            wb.save(saida)
+            conciliacao_notas.exportar(sefaz, saida)
 
             # ===== ESTATÍSTICAS =====
-            total = len(sefaz)
-            lancados = len(sefaz[sefaz["Status"] == "LANÇADO"])
-            nao_lancados = total - lancados
-
             messagebox.showinfo(
                 "✓ Comparação Concluída",
                 f"Resultado exportado com sucesso!\n\n"
-                f"Total de notas: {total}\n"
-                f"Lançadas: {lancados}\n"
-                f"Não lançadas: {nao_lancados}"
+                f"Total de notas: {resumo['total']}\n"
+                f"Lançadas: {resumo[conciliacao_notas.LANCADO]}\n"
+                f"Valor divergente: {resumo[conciliacao_notas.VALOR_DIVERGENTE]}\n"
+                f"CNPJ divergente: {resumo[conciliacao_notas.CNPJ_DIVERGENTE]}\n"
+                f"Não lançadas: {resumo[conciliacao_notas.NAO_LANCADO]}"
             )
 
             self.status_label.config(text="")
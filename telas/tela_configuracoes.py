@@ -1,14 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
-from dao.usuario_dao import UsuarioDAO
+from dao.usuario_dao import get_usuario_dao
 from utils.constantes import CORES, VERSAO_ATUAL
 from utils.auxiliares import resource_path
 
 
 class TelaConfiguracoesSistema:
     def __init__(self, parent):
-        self.dao = UsuarioDAO()
+        self.dao = get_usuario_dao()
 
         self.janela = tk.Toplevel(parent)
         self.janela.title("Configurações do Sistema")
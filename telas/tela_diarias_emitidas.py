@@ -4,6 +4,8 @@ import os
 from dao.diaria_dao import DiariaDAO
 from telas.tela_emitir_diaria import TelaEmitirDiaria
 from utils.auxiliares import CORES, resource_path
+from utils.tarefas_tk import ExecutorTk
+from utils.treeview_paginada import CabecalhosOrdenaveis, TreeviewPaginada
 from PIL import Image, ImageTk 
 from datetime import datetime, timedelta
 
@@ -13,6 +15,7 @@ class DiariasEmitidasEmbed:
         self.parent_frame = parent_frame
         self.sistema_fiscal = sistema_fiscal
         self.dao = DiariaDAO()
+        self.tarefas = ExecutorTk(self.parent_frame)
 
         self.criar_interface()
         self.atualizar_lista()
@@ -153,6 +156,15 @@ class DiariasEmitidasEmbed:
 
         self.combo_periodo.bind("<<ComboboxSelected>>", lambda e: self.atualizar_lista())
 
+        self.lbl_carregando = ttk.Label(
+            main_frame,
+            text="",
+            font=('Segoe UI', 8, 'italic'),
+            background=CORES['bg_main'],
+            foreground=CORES['text_light']
+        )
+        self.lbl_carregando.pack(anchor="w")
+
 
         # =====================================================
         # 🎨 Estilo do Treeview (Diárias)
@@ -240,6 +252,16 @@ class DiariasEmitidasEmbed:
 
         self.tree.bind("<Double-1>", self._duplo_clique)
 
+        self.paginas = TreeviewPaginada(self.tree, scroll_y, self._inserir_diaria,
+                                        executor=self.tarefas)
+        # Clique no cabeçalho reordena no banco
+        self.ordenacao = CabecalhosOrdenaveis(
+            self.tree,
+            {"nome": "diarista", "cpf": "cpf", "qtd_diarias": "qtd_diarias",
+             "valor": "vlr_total", "descricao": "descricao", "data": "data_emissao"},
+            self.atualizar_lista, ordem="id", descendente=True
+        )
+
 
     def _duplo_clique(self, event):
         item = self.tree.identify_row(event.y)
@@ -276,31 +298,63 @@ class DiariasEmitidasEmbed:
         filtro_nome = self.var_busca.get().strip()
         data_inicio, data_fim = self.get_filtro_periodo()
 
-        self.tree.delete(*self.tree.get_children())
+        ordem = self.ordenacao.ordem
+        descendente = self.ordenacao.descendente
 
-        for i, d in enumerate(
-            self.dao.listar_diarias(
+        # Consulta fora da thread do Tk; cada tecla cancela a busca anterior
+        def consultar():
+            diarias = self.dao.listar_diarias(
                 filtro_nome=filtro_nome,
                 data_inicio=data_inicio,
-                data_fim=data_fim
+                data_fim=data_fim,
+                ordem=ordem,
+                descendente=descendente,
+                limite=self.paginas.tamanho_pagina
             )
-        ):
-            tag_cor = "par" if i % 2 == 0 else "impar"
-
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    d["diarista"],
-                    d["cpf"],
-                    d["qtd_diarias"],
-                    f"R$ {d['vlr_total']:.2f}".replace(".", ","),
-                    d["descricao"],
-                    d["data_emissao"]
-                ),
-                tags=(tag_cor, str(d["id"]))
+            total = self.dao.contar_diarias(filtro_nome, data_inicio, data_fim)
+            return diarias, total
+
+        def proxima_pagina(ultima, limite):
+            return self.dao.listar_diarias(
+                filtro_nome=filtro_nome,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                ordem=ordem,
+                descendente=descendente,
+                apos=(ultima[ordem], ultima["id"]),
+                limite=limite
             )
 
+        self.tarefas.executar(
+            consultar,
+            lambda r: self._popular_lista(r, proxima_pagina),
+            chave="diarias",
+            indicador=self.lbl_carregando
+        )
+
+    def _popular_lista(self, resultado, proxima_pagina):
+        diarias, total = resultado
+        # Só a primeira página; as demais entram conforme a rolagem
+        self.paginas.exibir(diarias, proxima_pagina)
+        self.lbl_carregando.config(text=f"{total} diária(s)")
+
+    def _inserir_diaria(self, d, indice):
+        tag_cor = "par" if indice % 2 == 0 else "impar"
+
+        self.tree.insert(
+            "",
+            "end",
+            values=(
+                d["diarista"],
+                d["cpf"],
+                d["qtd_diarias"],
+                f"R$ {d['vlr_total']:.2f}".replace(".", ","),
+                d["descricao"],
+                d["data_emissao"]
+            ),
+            tags=(tag_cor, str(d["id"]))
+        )
+
 
 
     def abrir_emissao(self):
@@ -1,10 +1,10 @@
-import re
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
 import pandas as pd
 from utils.constantes import CORES
 from utils.auxiliares import resource_path
+from services import leitor_sped
 
 # =====================================================
 # Extração Informações TXT → Excel
@@ -140,15 +140,6 @@ class ExtratorFiscalAppEmbed:
             self.lbl_arquivo.delete(0, tk.END)
             self.lbl_arquivo.insert(0, arquivo)
     
-    def linha_valida(self, linha):
-        """
-        Linha válida:
-        |dd/mm/aa|...
-        """
-        return bool(re.match(r"^\|\d{2}/\d{2}/\d{2}\|", linha))
-
-    
-
     def processar(self):
         # Validação
         if not self.lbl_arquivo.get():
@@ -169,41 +160,16 @@ class ExtratorFiscalAppEmbed:
         nota_atual = None  # guarda a última nota válida
 
         try:
-            with open(self.lbl_arquivo.get(), "r", encoding="latin-1") as f:
-                for linha in f:
-                    linha = linha.rstrip()
-
-                    partes = [p.strip() for p in linha.split("|")]
-
-                    # proteção mínima
-                    if len(partes) < 9:
-                        continue
-
-                    # tenta capturar valor contábil (pode existir em linhas filhas)
-                    valor_txt = partes[8]
-                    valor_txt = valor_txt.replace(".", "").replace(",", ".")
-
-                    try:
-                        valor = float(valor_txt)
-                    except ValueError:
-                        valor = 0.0
-
-                    # linha principal: começa com |dd/mm/aa|
-                    if self.linha_valida(linha):
-                        numero = partes[4].lstrip("0")
-                        data_emissao = partes[5]
-
-                        nota_atual = {
-                            "Numero": numero,
-                            "Data de Emissao": data_emissao,
-                            "Valor": valor
-                        }
-                        dados.append(nota_atual)
-
-                    # linha complementar: soma ao valor da última nota
-                    else:
-                        if nota_atual and valor > 0:
-                            nota_atual["Valor"] += valor
+            for documento, numero, data_emissao, valor in leitor_sped.lancamentos_livro(
+                    self.lbl_arquivo.get()):
+                # linha principal: começa com |dd/mm/aa|
+                if documento:
+                    nota_atual = [numero, data_emissao, valor]
+                    dados.append(nota_atual)
+
+                # linha complementar: soma ao valor da última nota
+                elif nota_atual and valor > 0:
+                    nota_atual[2] += valor
 
             if not dados:
                 messagebox.showwarning(
@@ -212,7 +178,7 @@ class ExtratorFiscalAppEmbed:
                 )
                 return
 
-            df = pd.DataFrame(dados)
+            df = pd.DataFrame(dados, columns=["Numero", "Data de Emissao", "Valor"])
 
             df["Data de Emissao"] = pd.to_datetime(
                 df["Data de Emissao"],
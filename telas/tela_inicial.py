@@ -3,7 +3,7 @@ from tkinter import ttk
 from tkinter import ttk, messagebox
 from utils.constantes import CORES, VERSAO_ATUAL
 from utils.auxiliares import resource_path, configurar_estilo, sistema_esta_desatualizado, atualizacao_liberada, executar_atualizacao
-from dao.usuario_dao import UsuarioDAO
+from dao.usuario_dao import get_usuario_dao
 from database.sessao import sessao
 from PIL import Image, ImageTk
 
@@ -17,7 +17,7 @@ class SistemaFiscal:
         self.usuario_nome = sessao.usuario_nome
         self.empresa_id = sessao.empresa_id
         self.empresa_nome = sessao.empresa_nome
-        self.dao = UsuarioDAO()
+        self.dao = get_usuario_dao()
         self.usuario_admin = self.dao.usuario_admin(self.usuario_id)
 
         if sessao.versao_remota:
@@ -216,7 +216,7 @@ class SistemaFiscal:
         # =========================
         menu_frame = self.menu_scrollable  # Tudo vai aqui agora!
 
-        dao = UsuarioDAO()
+        dao = get_usuario_dao()
         is_admin = dao.is_admin(self.usuario_id)
         permissoes = dao.permissoes_usuario(self.usuario_id)
 
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from PIL import Image, ImageTk
-from dao.usuario_dao import UsuarioDAO
+from dao.usuario_dao import get_usuario_dao
 from utils.constantes import CORES, VERSAO_ATUAL
 from utils.auxiliares import resource_path, configurar_estilo
 
@@ -10,7 +10,7 @@ class TelaLogin:
     def __init__(self, root, versao_remota=None):
         self.root = root
         self.versao_remota = versao_remota
-        self.dao = UsuarioDAO()
+        self.dao = get_usuario_dao()
 
         self.root.title("MTSistem")
         self.root.configure(bg='#fafbfc')
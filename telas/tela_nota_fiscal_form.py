@@ -12,10 +12,13 @@ from services.nfse_importer import (importar_nfse, importar_nfse_xml,
 from utils.constantes import CORES
 from utils.auxiliares import resource_path
 
+# Como o PDF foi lido (services.nfse_importer.importar_nfse → _metodo)
+_ORIGEM_IMPORTACAO = {"texto": " (texto do PDF)", "ocr": " (OCR)"}
+
 
 class NotaFiscalFormDialog:
     """Janela modal para criar/editar uma nota fiscal, com importação de
-    NFS-e via XML (recomendado) ou PDF (OCR)."""
+    NFS-e via XML (recomendado) ou PDF (camada de texto ou OCR)."""
 
     def __init__(self, parent, dao: NotasFiscaisDAO, nota_id=None, on_save=None):
         self.dao = dao
@@ -165,12 +168,13 @@ class NotaFiscalFormDialog:
 
         ttk.Separator(card, orient="horizontal").pack(fill="x", pady=8)
 
-        if tesseract_disponivel():
-            ttk.Button(card, text="📂 Selecionar PDF", style="Add.TButton",
-                       command=self._importar_pdf).pack(anchor="w")
-        else:
+        # PDFs com camada de texto não precisam do Tesseract; ele só entra
+        # para DANFSe digitalizada
+        ttk.Button(card, text="📂 Selecionar PDF", style="Add.TButton",
+                   command=self._importar_pdf).pack(anchor="w")
+        if not tesseract_disponivel():
             aviso = ttk.Frame(card, style="Card.TFrame", relief="solid", borderwidth=1)
-            aviso.pack(fill="x")
+            aviso.pack(fill="x", pady=(8, 0))
             av_inner = ttk.Frame(aviso, style="Card.TFrame", padding=10)
             av_inner.pack(fill="x")
 
@@ -181,14 +185,16 @@ class NotaFiscalFormDialog:
 
             if sys.platform == "win32":
                 instrucoes = (
-                    "Para habilitar a importação de NFS-e por PDF, instale o Tesseract OCR:\n"
+                    "PDFs com texto são lidos normalmente. Para PDFs digitalizados (imagem),\n"
+                    "instale o Tesseract OCR:\n"
                     "1. Baixe em: github.com/UB-Mannheim/tesseract/wiki\n"
                     "2. Durante a instalação, selecione o pacote de idioma 'Portuguese'\n"
                     "3. Reinicie o aplicativo após instalar"
                 )
             else:
                 instrucoes = (
-                    "Instale com:\n"
+                    "PDFs com texto são lidos normalmente. Para PDFs digitalizados (imagem),\n"
+                    "instale com:\n"
                     "Ubuntu/Debian: sudo apt install tesseract-ocr tesseract-ocr-por\n"
                     "Mac: brew install tesseract tesseract-lang"
                 )
@@ -206,9 +212,6 @@ class NotaFiscalFormDialog:
                            command=lambda: webbrowser.open(
                                "https://github.com/UB-Mannheim/tesseract/wiki"
                            )).pack(side="left", padx=(0, 8))
-            ttk.Button(btn_row, text="📂 Tentar mesmo assim",
-                       style="Secondary.TButton",
-                       command=self._importar_pdf).pack(side="left")
 
     # ── LÓGICA DE IMPORTAÇÃO ──────────────────────────────────────────────────
 
@@ -289,8 +292,9 @@ class NotaFiscalFormDialog:
             forn_id = self.dao.upsert_fornecedor_auto(nome_emit, cnpj_emit)
             sufixo = " (fornecedor cadastrado)" if forn_id else ""
 
+        origem = _ORIGEM_IMPORTACAO.get(dados.get("_metodo"), "")
         self.import_status.configure(
-            text=f"✅ Dados importados com sucesso!{sufixo}",
+            text=f"✅ Dados importados com sucesso!{origem}{sufixo}",
             foreground=CORES['success']
         )
 
@@ -455,6 +459,8 @@ class NotaFiscalFormDialog:
         if self._chave_acesso_importada:
             dados["chave_acesso"] = self._chave_acesso_importada
 
+        dados["fornecedor_id"] = self.dao.upsert_fornecedor_auto(emitente, dados["cnpj_cpf"])
+
         if self.nota_id:
             self.dao.atualizar_nota(self.nota_id, dados)
             messagebox.showinfo("Sucesso", "Nota fiscal atualizada com sucesso!", parent=self.janela)
@@ -462,8 +468,6 @@ class NotaFiscalFormDialog:
             self.dao.inserir_nota(dados)
             messagebox.showinfo("Sucesso", "Nota fiscal cadastrada com sucesso!", parent=self.janela)
 
-        self.dao.upsert_fornecedor_auto(emitente, dados["cnpj_cpf"])
-
         if self.on_save:
             self.on_save()
         self.janela.destroy()
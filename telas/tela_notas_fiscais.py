@@ -14,6 +14,8 @@ from telas.tela_recibo_nota import ReciboNotaDialog
 from telas.tela_recibos_assinados import RecibosAssinadosEmbed
 from utils.auxiliares import pasta_recibos_nf, resource_path
 from utils.constantes import CORES
+from utils.tarefas_tk import ExecutorTk
+from utils.treeview_paginada import CabecalhosOrdenaveis, TreeviewPaginada
 from PIL import Image, ImageTk
 
 
@@ -44,6 +46,11 @@ def _fmt_data_br(iso):
         return iso
 
 
+_STATUS_TXT = {"pago": "✅ Pago", "ok": "📎 Ok", "pendente": "⏳ Pendente"}
+# Filtro de status → chave de get_stats com a contagem correspondente
+_CHAVE_TOTAL_STATUS = {"pendente": "pendentes", "ok": "ok", "pago": "pagos"}
+
+
 class NotasFiscaisEmbed:
     """Tela principal do módulo de Notas Fiscais de Serviço, com sub-abas
     para Notas Fiscais, Fornecedores e Recibos Assinados."""
@@ -53,6 +60,7 @@ class NotasFiscaisEmbed:
         self.sistema_fiscal = sistema_fiscal
         self.dao = NotasFiscaisDAO()
         self.recibos_dir = pasta_recibos_nf(sessao.empresa_id)
+        self.tarefas = ExecutorTk(self.parent_frame)
 
         self._aba_atual = "notas"
         self._filtro_status = None
@@ -204,6 +212,10 @@ class NotasFiscaisEmbed:
                   ).pack(side="left", padx=(0, 5))
         self.data_fim_var = tk.StringVar()
         ttk.Entry(filtros2, textvariable=self.data_fim_var, width=12).pack(side="left")
+        self.lbl_carregando = ttk.Label(filtros2, text="", font=('Segoe UI', 8, 'italic'),
+                                        background=CORES['bg_card'],
+                                        foreground=CORES['text_light'])
+        self.lbl_carregando.pack(side="right")
         for var in (self.data_ini_var, self.data_fim_var):
             var.trace_add("write", lambda *_: self._carregar_notas())
 
@@ -275,6 +287,16 @@ class NotasFiscaisEmbed:
         self.tree.bind("<Button-1>", self._on_tree_click)
         self.tree.pack(fill="both", expand=True)
 
+        self.paginas = TreeviewPaginada(self.tree, scroll_y, self._inserir_nota,
+                                        executor=self.tarefas)
+        # Clique no cabeçalho refaz a consulta com outro ORDER BY
+        self.ordenacao = CabecalhosOrdenaveis(
+            self.tree,
+            {"numero": "numero", "emitente": "emitente", "emissao": "data_emissao",
+             "valor": "valor", "status": "status"},
+            self._carregar_notas, ordem="data_emissao", descendente=True
+        )
+
     def _parse_date_filtro(self, s):
         s = (s or "").strip()
         if not s:
@@ -285,7 +307,7 @@ class NotasFiscaisEmbed:
             return None
 
     def _carregar_notas(self):
-        if not hasattr(self, "tree"):
+        if not hasattr(self, "tree") or not self.tree.winfo_exists():
             return
 
         emitente_sel = self.emitente_var.get()
@@ -295,35 +317,54 @@ class NotasFiscaisEmbed:
         elif self._emitente_filtro_id:
             emitente_id = self._emitente_filtro_id
 
-        busca = self.busca_var.get().strip()
+        busca = self.busca_var.get().strip() or None
         status = self.status_var.get()
         filtro_status = None if status == "todos" else status
         data_ini = self._parse_date_filtro(self.data_ini_var.get())
         data_fim = self._parse_date_filtro(self.data_fim_var.get())
 
-        notas = self.dao.listar_notas(
-            filtro_status=filtro_status, busca=busca or None,
-            emitente_id=emitente_id, data_ini=data_ini, data_fim=data_fim
-        )
-
-        self._update_stats(emitente_id, busca, data_ini, data_fim)
-
-        self.tree.delete(*self.tree.get_children())
-        for nota in notas:
-            pago = bool(nota["pago"])
-            qtd = nota.get("qtd_recibos", 0)
-            if pago:
-                status_key, status_txt = "pago", "✅ Pago"
-            elif qtd:
-                status_key, status_txt = "ok", "📎 Ok"
-            else:
-                status_key, status_txt = "pendente", "⏳ Pendente"
-
-            self.tree.insert("", "end", iid=str(nota["id"]), tags=(status_key,), values=(
-                nota["numero"], nota["emitente"], nota["competencia"],
-                _fmt_data_br(nota["data_emissao"]), _fmt_brl(nota["valor"]),
-                status_txt, f"👁 {qtd}" if qtd else "—"
-            ))
+        ordem = self.ordenacao.ordem
+        filtros = dict(filtro_status=filtro_status, busca=busca,
+                       emitente_id=emitente_id, data_ini=data_ini, data_fim=data_fim,
+                       ordem=ordem, descendente=self.ordenacao.descendente)
+
+        def consultar():
+            # Só a primeira página; as demais vêm conforme a rolagem
+            notas = self.dao.listar_notas(limite=self.paginas.tamanho_pagina, **filtros)
+            stats = self.dao.get_stats(busca=busca, emitente_id=emitente_id,
+                                       data_ini=data_ini, data_fim=data_fim)
+            return notas, stats
+
+        def proxima_pagina(ultima, limite):
+            return self.dao.listar_notas(apos=(ultima[ordem], ultima["id"]),
+                                         limite=limite, **filtros)
+
+        self.tarefas.executar(
+            consultar, lambda r: self._exibir_notas(r, filtro_status, proxima_pagina),
+            chave="notas", indicador=self.lbl_carregando)
+
+    def _exibir_notas(self, resultado, filtro_status, proxima_pagina):
+        if not self.tree.winfo_exists():
+            return  # trocou de aba enquanto carregava
+        notas, stats = resultado
+        self._update_stats(stats)
+
+        self.paginas.exibir(notas, proxima_pagina)
+
+        # Os totais já vêm de get_stats: nada de contar as linhas da tabela
+        total = stats[_CHAVE_TOTAL_STATUS.get(filtro_status, "total")]
+        self.lbl_carregando.config(text=f"{total} nota(s)")
+
+    def _inserir_nota(self, nota, _indice):
+        qtd = nota.get("qtd_recibos", 0)
+        status_key = nota["status"]
+        status_txt = _STATUS_TXT.get(status_key, status_key)
+
+        self.tree.insert("", "end", iid=str(nota["id"]), tags=(status_key,), values=(
+            nota["numero"], nota["emitente"], nota["competencia"],
+            _fmt_data_br(nota["data_emissao"]), _fmt_brl(nota["valor"]),
+            status_txt, f"👁 {qtd}" if qtd else "—"
+        ))
 
     def _on_tree_click(self, event):
         """Clique na coluna 'Recibos' abre direto o último recibo anexado,
@@ -346,29 +387,17 @@ class NotasFiscaisEmbed:
             messagebox.showwarning("Arquivo não encontrado",
                                    "O arquivo do recibo não foi encontrado no disco.")
 
-    def _update_stats(self, emitente_id=None, busca=None, data_ini=None, data_fim=None):
+    def _update_stats(self, s):
         for w in self.stats_frame.winfo_children():
             w.destroy()
 
-        if emitente_id or busca or data_ini or data_fim:
-            notas = self.dao.listar_notas(emitente_id=emitente_id, busca=busca or None,
-                                          data_ini=data_ini, data_fim=data_fim)
-            total = len(notas)
-            pendentes = sum(1 for n in notas if not n["pago"] and not n.get("qtd_recibos"))
-            ok = sum(1 for n in notas if not n["pago"] and n.get("qtd_recibos"))
-            pagos = sum(1 for n in notas if n["pago"])
-            val_pend = sum(n["valor"] for n in notas if not n["pago"] and not n.get("qtd_recibos"))
-            val_ok = sum(n["valor"] for n in notas if not n["pago"] and n.get("qtd_recibos"))
-            val_pago = sum(n["valor"] for n in notas if n["pago"])
-        else:
-            s = self.dao.get_stats()
-            total = s["total"] or 0
-            pendentes = s["pendentes"] or 0
-            ok = s["ok"] or 0
-            pagos = s["pagos"] or 0
-            val_pend = s["valor_pendente"] or 0
-            val_ok = s["valor_ok"] or 0
-            val_pago = s["valor_pago"] or 0
+        total = s["total"]
+        pendentes = s["pendentes"]
+        ok = s["ok"]
+        pagos = s["pagos"]
+        val_pend = s["valor_pendente"]
+        val_ok = s["valor_ok"]
+        val_pago = s["valor_pago"]
 
         cards = [
             ("Total de NFs", str(total), CORES['primary']),
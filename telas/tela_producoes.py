@@ -7,6 +7,8 @@ from telas.tela_detalhes_producao import TelaDetalhesProducao
 from services.recibo_producao_service import ReciboProducaoService
 from telas.tela_relatorio_producoes import TelaRelatorioProducoes
 from utils.constantes import CORES
+from utils.tarefas_tk import ExecutorTk
+from utils.treeview_paginada import CabecalhosOrdenaveis, TreeviewPaginada
 from utils.auxiliares import resource_path
 from PIL import Image, ImageTk
 
@@ -24,10 +26,11 @@ class ProducoesPrincipalEmbed:
         self.parent_frame = parent_frame
         self.sistema_fiscal = sistema_fiscal
         self.dao = ProducaoDAO()
+        self.tarefas = ExecutorTk(self.parent_frame)
         self.recibo_producao_service = ReciboProducaoService(self.dao)
 
-        # Guarda todas as produções carregadas para filtragem local
-        self._producoes_cache = []
+        # Produções já inseridas na Treeview, por id
+        self._producoes_por_id = {}
 
         self.criar_interface()
         self.carregar_producoes()
@@ -207,18 +210,12 @@ class ProducoesPrincipalEmbed:
         scroll_x.config(command=self.tree.xview)
 
         # Cabeçalhos
-        self.tree.heading("nome",        text="Nome da Produção", anchor="w",
-                          command=lambda: self._ordenar("nome"))
-        self.tree.heading("status",      text="Status",           anchor="w",
-                          command=lambda: self._ordenar("status"))
-        self.tree.heading("data_inicio", text="Data Início",      anchor="w",
-                          command=lambda: self._ordenar("data_inicio"))
-        self.tree.heading("data_fim",    text="Data Fim",         anchor="w",
-                          command=lambda: self._ordenar("data_fim"))
-        self.tree.heading("total_sacos", text="Total Sacos",      anchor="w",
-                          command=lambda: self._ordenar("total_sacos"))
-        self.tree.heading("valor_total", text="Valor Total (R$)", anchor="e",
-                          command=lambda: self._ordenar("valor_total"))
+        self.tree.heading("nome",        text="Nome da Produção", anchor="w")
+        self.tree.heading("status",      text="Status",           anchor="w")
+        self.tree.heading("data_inicio", text="Data Início",      anchor="w")
+        self.tree.heading("data_fim",    text="Data Fim",         anchor="w")
+        self.tree.heading("total_sacos", text="Total Sacos",      anchor="w")
+        self.tree.heading("valor_total", text="Valor Total (R$)", anchor="e")
 
         # Larguras
         self.tree.column("nome",        width=220, minwidth=140, stretch=True,  anchor="w")
@@ -234,6 +231,17 @@ class ProducoesPrincipalEmbed:
 
         self.tree.pack(fill="both", expand=True)
 
+        # Linhas entram por páginas conforme a rolagem; o clique no cabeçalho
+        # refaz a consulta com outro ORDER BY
+        self.paginas = TreeviewPaginada(self.tree, scroll_y, self._inserir_producao,
+                                        executor=self.tarefas)
+        self.ordenacao = CabecalhosOrdenaveis(
+            self.tree,
+            {c: c for c in ("nome", "status", "data_inicio", "data_fim",
+                            "total_sacos", "valor_total")},
+            self.aplicar_filtros, ordem="created_at", descendente=True
+        )
+
         # ── Barra de ações (rodapé) ───────────────────────────────────────────
         acoes_frame = ttk.Frame(card, style="Card.TFrame")
         acoes_frame.pack(fill="x", pady=(12, 0))
@@ -249,141 +257,85 @@ class ProducoesPrincipalEmbed:
         # Duplo clique abre detalhes
         self.tree.bind("<Double-1>", lambda _e: self._acao_detalhes())
 
-        # Controle de ordenação
-        self._ordem_coluna = None
-        self._ordem_reversa = False
-
     # ─────────────────────────────────────────────────────────────────────────
     # CARREGAMENTO / FILTRAGEM
     # ─────────────────────────────────────────────────────────────────────────
 
     def carregar_producoes(self):
-        """Busca todos os dados do DAO e armazena no cache, depois filtra."""
-        self._producoes_cache = self.dao.listar_producoes()
+        """Recarrega a lista do banco com os filtros e a ordenação atuais."""
         self.aplicar_filtros()
 
     def aplicar_filtros(self):
-        """Filtra o cache em memória e atualiza a Treeview."""
+        """Consulta (fora da thread do Tk) a primeira página e o total com os
+        filtros da tela; as demais páginas vêm conforme a rolagem."""
         filtro_status = self.filtro_var.get()
-        termo_nome   = self.busca_nome_var.get().strip().lower()
-        termo_data   = self.busca_data_var.get().strip()
-
-        resultado = []
-        for p in self._producoes_cache:
-            # Filtro de status
-            if filtro_status == "abertas"  and p['status'] != 'aberta':
-                continue
-            if filtro_status == "fechadas" and p['status'] != 'fechada':
-                continue
-
-            # Filtro por nome (case-insensitive, parcial)
-            if termo_nome and termo_nome not in p['nome'].lower():
-                continue
-
-            # Filtro por data de início (parcial: "04-2025" encontra "10-04-2025")
-            if termo_data:
-                data_br = formatar_data_br(p['data_inicio']) or ""
-                if termo_data not in data_br:
-                    continue
-
-            resultado.append(p)
-
-        self._popular_tree(resultado)
-
-    def _popular_tree(self, producoes):
-        """Limpa e repovoa a Treeview com a lista fornecida."""
+        filtros = dict(
+            status={"abertas": "aberta", "fechadas": "fechada"}.get(filtro_status),
+            busca_nome=self.busca_nome_var.get().strip() or None,
+            # Busca parcial na data de início: "04-2025" encontra "10-04-2025"
+            busca_data=self.busca_data_var.get().strip() or None,
+        )
+        ordem = self.ordenacao.ordem
+        descendente = self.ordenacao.descendente
+
+        def consultar():
+            producoes = self.dao.listar_producoes(
+                ordem=ordem, descendente=descendente,
+                limite=self.paginas.tamanho_pagina, **filtros)
+            return producoes, self.dao.contar_producoes(**filtros)
+
+        def proxima_pagina(ultima, limite):
+            return self.dao.listar_producoes(
+                ordem=ordem, descendente=descendente,
+                apos=(ultima[ordem], ultima["id"]), limite=limite, **filtros)
+
+        self.tarefas.executar(
+            consultar, lambda r: self._popular_tree(r, proxima_pagina),
+            chave="producoes", indicador=self.label_total)
+
+    def _popular_tree(self, resultado, proxima_pagina):
+        """Limpa e repovoa a Treeview (a primeira página agora, as demais
+        conforme a rolagem)."""
+        producoes, total = resultado
         # Salva id selecionado para restaurar após refresh
         selecionado = self._id_selecionado()
 
-        self.tree.delete(*self.tree.get_children())
-
-        for i, p in enumerate(producoes):
-            data_fim_br = formatar_data_br(p['data_fim']) or "—"
-            tag_zebra = "par" if i % 2 == 0 else "impar"
-
-            iid = str(p['id'])
-            self.tree.insert(
-                "", "end", iid=iid,
-                values=(
-                    p['nome'],
-                    "✅ Aberta" if p['status'] == 'aberta' else "🔒 Fechada",
-                    formatar_data_br(p['data_inicio']) or "—",
-                    data_fim_br,
-                    p['total_sacos'],
-                    f"{p['valor_total']:.2f}",
-                ),
-                tags=(tag_zebra,)
-            )
-
-        # Restaura seleção se ainda existir
+        self._producoes_por_id = {}
+        self.paginas.exibir(producoes, proxima_pagina)
+
+        # Restaura seleção se ainda existir (e já estiver nas páginas inseridas)
         if selecionado and self.tree.exists(selecionado):
             self.tree.selection_set(selecionado)
             self.tree.see(selecionado)
 
-        total = len(producoes)
         self.label_total.config(
             text=f"{total} produção{'ões' if total != 1 else ''} encontrada{'s' if total != 1 else ''}"
         )
 
+    def _inserir_producao(self, p, indice):
+        data_fim_br = formatar_data_br(p['data_fim']) or "—"
+        tag_zebra = "par" if indice % 2 == 0 else "impar"
+
+        self._producoes_por_id[p['id']] = p
+        self.tree.insert(
+            "", "end", iid=str(p['id']),
+            values=(
+                p['nome'],
+                "✅ Aberta" if p['status'] == 'aberta' else "🔒 Fechada",
+                formatar_data_br(p['data_inicio']) or "—",
+                data_fim_br,
+                p['total_sacos'],
+                f"{p['valor_total']:.2f}",
+            ),
+            tags=(tag_zebra,)
+        )
+
     def limpar_filtros(self):
         self.filtro_var.set("todas")
         self.busca_nome_var.set("")
         self.busca_data_var.set("")
         self.aplicar_filtros()
 
-    # ─────────────────────────────────────────────────────────────────────────
-    # ORDENAÇÃO
-    # ─────────────────────────────────────────────────────────────────────────
-
-    def _ordenar(self, coluna):
-        """Ordena a Treeview pela coluna clicada (toggle asc/desc)."""
-        if self._ordem_coluna == coluna:
-            self._ordem_reversa = not self._ordem_reversa
-        else:
-            self._ordem_coluna = coluna
-            self._ordem_reversa = False
-
-        indices_col = {
-            "nome": 0, "status": 1, "data_inicio": 2,
-            "data_fim": 3, "total_sacos": 4, "valor_total": 5
-        }
-        col_idx = indices_col[coluna]
-
-        itens = [(self.tree.set(k, coluna), k) for k in self.tree.get_children("")]
-
-        # Conversão numérica onde aplicável
-        def chave(item):
-            v = item[0]
-            if coluna in ("total_sacos", "valor_total"):
-                try:
-                    return float(v.replace(",", "."))
-                except ValueError:
-                    return 0.0
-            # Data no formato DD-MM-AAAA → converte para AAAA-MM-DD para ordenar
-            if coluna in ("data_inicio", "data_fim") and v and v != "—":
-                partes = v.split("-")
-                if len(partes) == 3:
-                    return f"{partes[2]}-{partes[1]}-{partes[0]}"
-            return v.lower()
-
-        itens.sort(key=chave, reverse=self._ordem_reversa)
-
-        for index, (_, k) in enumerate(itens):
-            self.tree.move(k, "", index)
-            # Re-aplica zebra
-            tag_zebra = "par" if index % 2 == 0 else "impar"
-            self.tree.item(k, tags=(tag_zebra,))
-
-        # Indicador visual no cabeçalho
-        seta = " ▲" if not self._ordem_reversa else " ▼"
-        for c in ("nome", "status", "data_inicio", "data_fim", "total_sacos", "valor_total"):
-            textos = {
-                "nome": "Nome da Produção", "status": "Status",
-                "data_inicio": "Data Início", "data_fim": "Data Fim",
-                "total_sacos": "Total Sacos", "valor_total": "Valor Total (R$)"
-            }
-            self.tree.heading(c, text=textos[c] + (seta if c == coluna else ""))
-
     # ─────────────────────────────────────────────────────────────────────────
     # HELPERS
     # ─────────────────────────────────────────────────────────────────────────
@@ -399,11 +351,11 @@ class ProducoesPrincipalEmbed:
         return int(iid) if iid else None
 
     def _producao_dados(self):
-        """Retorna dict da produção selecionada do cache, ou None."""
+        """Retorna dict da produção selecionada (já carregada na lista), ou None."""
         pid = self._producao_selecionada()
         if pid is None:
             return None
-        return next((p for p in self._producoes_cache if p['id'] == pid), None)
+        return self._producoes_por_id.get(pid)
 
     # ─────────────────────────────────────────────────────────────────────────
     # AÇÕES DA BARRA DE RODAPÉ
@@ -5,6 +5,7 @@ from dateutil.relativedelta import relativedelta
 from tkcalendar import DateEntry
 from dao.diaria_dao import DiariaDAO
 from utils.constantes import CORES
+from utils.tarefas_tk import ExecutorTk
 from utils.auxiliares import resource_path
 
 
@@ -14,6 +15,7 @@ class TelaRelatorioDiarias:
         self.dao = DiariaDAO()
 
         self.janela = tk.Toplevel(parent)
+        self.tarefas = ExecutorTk(self.janela)
         self.janela.title("Relatório de Gestão — Diárias")
         self.janela.geometry("900x650")
         self.janela.configure(bg=CORES['bg_main'])
@@ -147,6 +149,9 @@ class TelaRelatorioDiarias:
 
 
         # ================= TOTAIS =================
+        self.lbl_carregando = tk.Label(main, text="", font=('Segoe UI', 8, 'italic'),
+                                       bg=CORES['bg_main'], fg=CORES['text_light'])
+        self.lbl_carregando.pack(anchor="w")
         self.totais_frame = tk.Frame(main, bg=CORES['bg_main'])
         self.totais_frame.pack(fill="x", pady=(0, 15))
 
@@ -197,23 +202,34 @@ class TelaRelatorioDiarias:
             messagebox.showwarning("Atenção", "Período inválido!")
             return
 
-        self.tree.delete(*self.tree.get_children())
-
         agrup = self.var_agrup.get()
 
+        if agrup == "centro_custo":
+            consulta = self.dao.relatorio_por_centro_custo
+        elif agrup == "diarista":
+            consulta = self.dao.relatorio_por_diarista
+        else:  # mês
+            consulta = self.dao.relatorio_por_mes
+
+        self.tarefas.executar(
+            lambda: consulta(ini, fim),
+            lambda dados: self._exibir_dados(agrup, dados, ini, fim),
+            chave="relatorio", indicador=self.lbl_carregando
+        )
+
+    def _exibir_dados(self, agrup, dados, ini, fim):
+        self.tree.delete(*self.tree.get_children())
+
         if agrup == "centro_custo":
             self._configurar_colunas_centro()
-            dados = self.dao.relatorio_por_centro_custo(ini, fim)
             self._preencher_centro(dados)
         
         elif agrup == "diarista":
             self._configurar_colunas_diarista()
-            dados = self.dao.relatorio_por_diarista(ini, fim)
             self._preencher_diarista(dados) 
 
         else:  # mês
             self._configurar_colunas_mes()
-            dados = self.dao.relatorio_por_mes(ini, fim)
             self._preencher_mes(dados)
 
 
@@ -11,6 +11,7 @@ from services.relatorio_notas_fiscais_service import (
 )
 from utils.auxiliares import resource_path
 from utils.constantes import CORES
+from utils.tarefas_tk import ExecutorTk
 
 DATA_MINIMA = date(2000, 1, 1)
 
@@ -24,6 +25,7 @@ class TelaRelatorioNotasFiscais:
         self._notas_atuais = []
 
         self.janela = tk.Toplevel(parent)
+        self.tarefas = ExecutorTk(self.janela)
         self.janela.title("Relatório de Gestão — Notas Fiscais")
         self.janela.geometry("980x650")
         self.janela.configure(bg=CORES['bg_main'])
@@ -137,6 +139,9 @@ class TelaRelatorioNotasFiscais:
                   command=self._exportar_recibos_anexados).pack(side="left")
 
         # Cards de totais
+        self.lbl_carregando = tk.Label(main, text="", font=('Segoe UI', 8, 'italic'),
+                                       bg=CORES['bg_main'], fg=CORES['text_light'])
+        self.lbl_carregando.pack(anchor="w")
         self.totais_frame = tk.Frame(main, bg=CORES['bg_main'])
         self.totais_frame.pack(fill="x", pady=(0, 15))
 
@@ -207,10 +212,16 @@ class TelaRelatorioNotasFiscais:
         emitente_sel = self.var_emitente.get()
         emitente_id = self._forn_map.get(emitente_sel) if emitente_sel != "Todos os emitentes" else None
 
-        notas = self.dao.listar_notas(
-            filtro_status=filtro_status, emitente_id=emitente_id,
-            data_ini=ini, data_fim=fim
+        self.tarefas.executar(
+            lambda: self.dao.listar_notas(
+                filtro_status=filtro_status, emitente_id=emitente_id,
+                data_ini=ini, data_fim=fim
+            ),
+            self._exibir_notas,
+            chave="relatorio", indicador=self.lbl_carregando
         )
+
+    def _exibir_notas(self, notas):
         self._notas_atuais = notas
         self._preencher_tree(notas)
         self._atualizar_totais(notas)
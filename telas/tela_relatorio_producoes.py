@@ -5,6 +5,7 @@ from dateutil.relativedelta import relativedelta
 from tkcalendar import DateEntry
 from dao.producao_dao import ProducaoDAO
 from utils.constantes import CORES
+from utils.tarefas_tk import ExecutorTk
 from utils.auxiliares import resource_path
 
 
@@ -14,6 +15,7 @@ class TelaRelatorioProducoes:
         self.dao = ProducaoDAO()
 
         self.janela = tk.Toplevel(parent)
+        self.tarefas = ExecutorTk(self.janela)
         self.janela.title("Relatório de Gestão — Produções")
         self.janela.geometry("960x680")
         self.janela.configure(bg=CORES['bg_main'])
@@ -168,6 +170,9 @@ class TelaRelatorioProducoes:
         ).pack(side="left")
 
         # ── Cards de totais ──────────────────────────────────────────────
+        self.lbl_carregando = tk.Label(main, text="", font=('Segoe UI', 8, 'italic'),
+                                       bg=CORES['bg_main'], fg=CORES['text_light'])
+        self.lbl_carregando.pack(anchor="w")
         self.totais_frame = tk.Frame(main, bg=CORES['bg_main'])
         self.totais_frame.pack(fill="x", pady=(0, 15))
 
@@ -259,19 +264,29 @@ class TelaRelatorioProducoes:
             messagebox.showwarning("Atenção", "A data inicial não pode ser maior que a final!")
             return
 
-        self.tree.delete(*self.tree.get_children())
-
         agrup          = self.var_agrup.get()
         apenas_fechadas = self.var_status.get() == "fechadas"
         centro_id      = self._centro_custo_id_filtro()
 
+        if agrup == "centro_custo":
+            consulta = lambda: self.dao.relatorio_por_centro_custo(ini, fim, apenas_fechadas)
+        else:
+            consulta = lambda: self.dao.relatorio_por_diarista(ini, fim, centro_id)
+
+        self.tarefas.executar(
+            consulta,
+            lambda dados: self._exibir_dados(agrup, dados, ini, fim),
+            chave="relatorio", indicador=self.lbl_carregando
+        )
+
+    def _exibir_dados(self, agrup, dados, ini, fim):
+        self.tree.delete(*self.tree.get_children())
+
         if agrup == "centro_custo":
             self._configurar_colunas_centro()
-            dados = self.dao.relatorio_por_centro_custo(ini, fim, apenas_fechadas)
             self._preencher_centro(dados)
         else:
             self._configurar_colunas_diarista()
-            dados = self.dao.relatorio_por_diarista(ini, fim, centro_id)
             self._preencher_diarista(dados)
 
         self._atualizar_totais(dados, agrup, ini, fim)
@@ -5,6 +5,7 @@ from dateutil.relativedelta import relativedelta
 from tkcalendar import DateEntry
 from dao.servico_dao import ServicoDAO
 from utils.constantes import CORES
+from utils.tarefas_tk import ExecutorTk
 from utils.auxiliares import resource_path
 
 
@@ -14,6 +15,7 @@ class TelaRelatorioServicos:
         self.dao = ServicoDAO()
 
         self.janela = tk.Toplevel(parent)
+        self.tarefas = ExecutorTk(self.janela)
         self.janela.title("Relatório de Gestão — Serviços")
         self.janela.geometry("900x650")
         self.janela.configure(bg=CORES['bg_main'])
@@ -138,6 +140,9 @@ class TelaRelatorioServicos:
         ).pack(side="left")
 
         # ── Cards de totais ──────────────────────────────────────────────
+        self.lbl_carregando = tk.Label(main, text="", font=('Segoe UI', 8, 'italic'),
+                                       bg=CORES['bg_main'], fg=CORES['text_light'])
+        self.lbl_carregando.pack(anchor="w")
         self.totais_frame = tk.Frame(main, bg=CORES['bg_main'])
         self.totais_frame.pack(fill="x", pady=(0, 15))
 
@@ -220,17 +225,27 @@ class TelaRelatorioServicos:
             messagebox.showwarning("Atenção", "A data inicial não pode ser maior que a final!")
             return
 
-        self.tree.delete(*self.tree.get_children())
-
         agrup = self.var_agrup.get()
 
+        if agrup == "centro_custo":
+            consulta = self.dao.relatorio_por_centro_custo
+        else:
+            consulta = self.dao.relatorio_por_diarista
+
+        self.tarefas.executar(
+            lambda: consulta(ini, fim),
+            lambda dados: self._exibir_dados(agrup, dados, ini, fim),
+            chave="relatorio", indicador=self.lbl_carregando
+        )
+
+    def _exibir_dados(self, agrup, dados, ini, fim):
+        self.tree.delete(*self.tree.get_children())
+
         if agrup == "centro_custo":
             self._configurar_colunas_centro()
-            dados = self.dao.relatorio_por_centro_custo(ini, fim)
             self._preencher_centro(dados)
         else:
             self._configurar_colunas_diarista()
-            dados = self.dao.relatorio_por_diarista(ini, fim)
             self._preencher_diarista(dados)
 
         self._atualizar_totais(dados, agrup, ini, fim)
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-from dao.usuario_dao import UsuarioDAO
+from dao.usuario_dao import get_usuario_dao
 from database.sessao import sessao
 from database.empresa_conexao import conectar_empresa
 import os
@@ -11,7 +11,7 @@ from utils.constantes import CORES, VERSAO_ATUAL
 class TelaSelecaoEmpresa:
     def __init__(self, root):
         self.root = root
-        self.dao = UsuarioDAO()
+        self.dao = get_usuario_dao()
 
         self.root.title("Selecionar Empresa")
         self.root.configure(bg='#fafbfc')
@@ -6,7 +6,8 @@ from dao.diarista_dao import DiaristaDAO
 from dao.centro_custo_dao import CentroCustoDAO
 from telas.tela_novo_servico import TelaNovoServico
 from services.recibo_servico_service import ReciboServicoService
-from utils.constantes import CORES
+from utils.constantes import CORES, SERVICOS_PARTICIPANTES_SOB_DEMANDA
+from utils.tarefas_tk import ExecutorTk
 from utils.auxiliares import resource_path
 from PIL import Image, ImageTk
 
@@ -33,9 +34,12 @@ class ServicosEmbed:
         self.dao = ServicoDAO()
         self.diarista_dao = DiaristaDAO()
         self.centro_custo_dao = CentroCustoDAO()
+        self.tarefas = ExecutorTk(self.parent_frame)
 
         # cache completo para filtragem local
         self._servicos_cache = []
+        # participantes só quando a linha é expandida (ver utils.constantes)
+        self._sob_demanda = SERVICOS_PARTICIPANTES_SOB_DEMANDA
 
         self.criar_interface()
         self.carregar_servicos()
@@ -208,7 +212,7 @@ class ServicosEmbed:
         self.tree = ttk.Treeview(
             tree_frame,
             columns=colunas,
-            show="headings",
+            show="tree headings" if self._sob_demanda else "headings",
             style="Servicos.Treeview",
             selectmode="browse",
             yscrollcommand=scroll_y.set,
@@ -231,6 +235,11 @@ class ServicosEmbed:
 
         self.tree.tag_configure("par",   background="#f8f9fa")
         self.tree.tag_configure("impar", background="white")
+        self.tree.tag_configure("participante", foreground=CORES['text_light'])
+
+        if self._sob_demanda:
+            self.tree.column("#0", width=28, minwidth=28, stretch=False)
+            self.tree.bind("<<TreeviewOpen>>", self._expandir_servico)
 
         self.tree.pack(fill="both", expand=True)
 
@@ -252,15 +261,39 @@ class ServicosEmbed:
 
     def carregar_servicos(self):
         ini, fim = self._get_filtro_periodo()
-        self._servicos_cache = self.dao.listar(
-            filtro_data_inicio=ini,
-            filtro_data_fim=fim
+        self.tarefas.executar(
+            lambda: self.dao.listar(
+                filtro_data_inicio=ini,
+                filtro_data_fim=fim,
+                com_participantes=not self._sob_demanda
+            ),
+            self._receber_servicos,
+            chave="servicos",
+            indicador=self.label_total
         )
+
+    def _receber_servicos(self, servicos):
+        self._servicos_cache = servicos
         self.aplicar_filtros()
 
     def aplicar_filtros(self):
         termo = self.var_busca.get().strip().lower()
 
+        if self._sob_demanda:
+            # Sem os participantes em memória, a busca vai ao banco
+            if not termo:
+                self.tarefas.cancelar("busca")
+                self._popular_tree(self._servicos_cache)
+                return
+            self.tarefas.executar(
+                lambda: self.dao.ids_por_participante(termo),
+                lambda ids: self._popular_tree(
+                    [s for s in self._servicos_cache if s['id'] in ids]),
+                chave="busca",
+                indicador=self.label_total
+            )
+            return
+
         resultado = []
         for s in self._servicos_cache:
             if termo:
@@ -282,25 +315,22 @@ class ServicosEmbed:
         for i, s in enumerate(servicos):
             tag = "par" if i % 2 == 0 else "impar"
 
-            # Exibe nomes resumidos: "João, Maria +1"
-            nomes = [p['nome'].split()[0] for p in s['diaristas']]
-            if len(nomes) <= 2:
-                diaristas_txt = ", ".join(nomes)
-            else:
-                diaristas_txt = f"{', '.join(nomes[:2])} +{len(nomes)-2}"
-
             iid = str(s['id'])
             self.tree.insert(
                 "", "end", iid=iid,
                 values=(
                     formatar_data_br(s['data_servico']) or "—",
-                    diaristas_txt,
+                    self._resumo_diaristas(s),
                     s['centro_custo'],
                     s['descricao'],
                     _fmt_valor(s['valor'])
                 ),
                 tags=(tag,)
             )
+            if s['diaristas'] is None and s['qtd_diaristas']:
+                # Filho provisório só para exibir o ▸ de expandir
+                self.tree.insert(iid, "end", iid=f"{iid}:carregando",
+                                 values=("", "Carregando...", "", "", ""))
 
         if selecionado and self.tree.exists(selecionado):
             self.tree.selection_set(selecionado)
@@ -311,6 +341,34 @@ class ServicosEmbed:
             text=f"{total} serviço{'s' if total != 1 else ''} encontrado{'s' if total != 1 else ''}"
         )
 
+    @staticmethod
+    def _resumo_diaristas(servico):
+        if servico['diaristas'] is None:
+            qtd = servico['qtd_diaristas']
+            return f"{qtd} diarista{'s' if qtd != 1 else ''}"
+
+        # Exibe nomes resumidos: "João, Maria +1"
+        nomes = [p['nome'].split()[0] for p in servico['diaristas']]
+        if len(nomes) <= 2:
+            return ", ".join(nomes)
+        return f"{', '.join(nomes[:2])} +{len(nomes)-2}"
+
+    def _expandir_servico(self, _event=None):
+        iid = self.tree.focus()
+        servico = self._servico_por_iid(iid)
+        if not servico or not self.tree.exists(f"{iid}:carregando"):
+            return
+
+        self.dao.carregar_participantes([servico])
+        self.tree.delete(f"{iid}:carregando")
+        self.tree.set(iid, "diaristas", self._resumo_diaristas(servico))
+        for p in servico['diaristas']:
+            nome = f"{p['nome']} ({p['cpf']})" if p['cpf'] else p['nome']
+            self.tree.insert(
+                iid, "end", tags=("participante",),
+                values=("", nome, "", "", _fmt_valor(p['valor_rateio']))
+            )
+
     def limpar_filtros(self):
         self.var_busca.set("")
         self.combo_periodo.set("Todos")
@@ -322,15 +380,23 @@ class ServicosEmbed:
 
     def _iid_selecionado(self):
         sel = self.tree.selection()
-        return sel[0] if sel else None
+        if not sel:
+            return None
+        # Linha de participante selecionada → serviço dela
+        return self.tree.parent(sel[0]) or sel[0]
 
-    def _servico_selecionado(self):
-        iid = self._iid_selecionado()
-        if not iid:
+    def _servico_por_iid(self, iid):
+        if not iid or not iid.isdigit():
             return None
         pid = int(iid)
         return next((s for s in self._servicos_cache if s['id'] == pid), None)
 
+    def _servico_selecionado(self):
+        servico = self._servico_por_iid(self._iid_selecionado())
+        if servico and servico['diaristas'] is None:
+            self.dao.carregar_participantes([servico])
+        return servico
+
     # ─────────────────────────────────────────────────────────────────────────
     # AÇÕES
     # ─────────────────────────────────────────────────────────────────────────
@@ -1,10 +1,22 @@
 import os
+import queue
+import threading
+import traceback
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
-from PyPDF2 import PdfMerger
 from utils.constantes import CORES
 from utils.auxiliares import resource_path, pasta_dados_app
+from services import leitor_sped, triagem_sped
+
+# Opções de tamanho máximo de cada PDF gerado (bytes; None = sem limite)
+LIMITES_TAMANHO = {
+    "Sem limite": None,
+    "10 MB": 10 * 1024 * 1024,
+    "25 MB": 25 * 1024 * 1024,
+    "50 MB": 50 * 1024 * 1024,
+    "100 MB": 100 * 1024 * 1024,
+}
 
 # =====================================================
 # TRIAGEM SPED → PDFs
@@ -15,6 +27,8 @@ class TriagemSPEDEmbed:
         self.parent_frame = parent_frame
         self.sistema_fiscal = sistema_fiscal
         self.arquivo_pdf = None
+        self._fila = queue.Queue()
+        self._cancelar = None  # threading.Event da triagem em andamento
         base_dados = pasta_dados_app()
         self.pasta_padrao = os.path.join(base_dados, "Arquivos Notas PDF")
         os.makedirs(self.pasta_padrao, exist_ok=True)
@@ -111,6 +125,33 @@ class TriagemSPEDEmbed:
             self.selecionar_saida
         )
         
+        # Divisão da saída
+        opcoes_frame = ttk.Frame(card, style='Card.TFrame')
+        opcoes_frame.pack(fill="x")
+
+        self.var_por_mes = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            opcoes_frame,
+            text="Um arquivo por mês de emissão",
+            variable=self.var_por_mes,
+            style="Custom.TCheckbutton"
+        ).pack(side="left")
+
+        ttk.Label(
+            opcoes_frame,
+            text="Tamanho máximo por arquivo:",
+            style='Subtitle.TLabel'
+        ).pack(side="left", padx=(20, 5))
+
+        self.var_tamanho = tk.StringVar(value="Sem limite")
+        ttk.Combobox(
+            opcoes_frame,
+            textvariable=self.var_tamanho,
+            values=list(LIMITES_TAMANHO),
+            state="readonly",
+            width=12
+        ).pack(side="left")
+
         # Barra de progresso (inicialmente oculta)
         self.progress_frame = ttk.Frame(card, style='Card.TFrame')
         self.progress_frame.pack(fill="x", pady=(20, 0))
@@ -128,16 +169,24 @@ class TriagemSPEDEmbed:
             length=300
         )
         
-        # Botão executar
+        # Botões executar / cancelar
         btn_frame = ttk.Frame(card, style='Card.TFrame')
         btn_frame.pack(fill="x", pady=(20, 0))
         
-        ttk.Button(
+        self.btn_executar = ttk.Button(
             btn_frame,
             text="▶ Executar Triagem e Gerar PDFs",
             style='Primary.TButton',
             command=self.executar
-        ).pack(fill="x")
+        )
+        self.btn_executar.pack(fill="x")
+
+        self.btn_cancelar = ttk.Button(
+            btn_frame,
+            text="✖ Cancelar",
+            style='Secondary.TButton',
+            command=self.cancelar
+        )
 
     def criar_campo(self, parent, titulo, subtitulo, comando):
         campo_frame = ttk.Frame(parent, style='Card.TFrame')
@@ -195,26 +244,29 @@ class TriagemSPEDEmbed:
             self.entry_saida.insert(0, pasta)
 
     def extrair_chaves(self, caminho):
-        nf, cte = [], []
-        with open(caminho, 'r', encoding='latin-1') as f:
-            for linha in f:
-                c = linha.split('|')
-                if len(c) > 10:
-                    if c[1] == 'C100' and c[9].isdigit():
-                        nf.append(c[9])
-                    if c[1] == 'D100' and c[10].isdigit():
-                        cte.append(c[10])
-        return nf, cte
-
-    def mesclar(self, chaves, pasta, saida):
-        merger = PdfMerger()
-        for chave in chaves:
-            pdf = os.path.join(pasta, f"{chave}.pdf")
-            if os.path.exists(pdf):
-                merger.append(pdf)
-        if merger.pages:
-            merger.write(saida)
-            merger.close()
+        return leitor_sped.chaves_documentos(caminho)
+
+    def triar(self, sped, pasta_pdfs, pasta_saida, por_mes, tamanho_maximo, cancelado):
+        """Roda fora da thread do Tk: lê as chaves, indexa a pasta uma vez,
+        planeja os volumes e mescla. O andamento vai para a fila."""
+        self._fila.put(("fase", "Lendo chaves do SPED..."))
+        nf, cte = self.extrair_chaves(sped)
+
+        self._fila.put(("fase", "Listando a pasta dos PDFs..."))
+        indice = triagem_sped.indexar_pasta(pasta_pdfs)
+        plano = triagem_sped.planejar({"NFe": nf, "CTe": cte}, indice,
+                                      por_mes=por_mes, tamanho_maximo=tamanho_maximo)
+
+        mesclado = triagem_sped.mesclar_volumes(
+            plano, pasta_saida,
+            ao_progredir=lambda feitos, total, nome: self._fila.put(("progresso", feitos, total, nome)),
+            cancelado=cancelado,
+        )
+        if mesclado is None:
+            return None
+        gravados, com_erro = mesclado
+        pendencias = triagem_sped.gravar_pendencias(plano, com_erro, pasta_saida)
+        return nf, cte, plano, gravados, com_erro, pendencias
 
     def executar(self):
         # Validação
@@ -224,38 +276,97 @@ class TriagemSPEDEmbed:
                 "Por favor, preencha todos os campos antes de continuar."
             )
             return
-        
+        if self._cancelar is not None:
+            return
+
+        argumentos = (self.entry_sped.get(), self.entry_pdfs.get(), self.entry_saida.get(),
+                      self.var_por_mes.get(), LIMITES_TAMANHO[self.var_tamanho.get()])
+        self._cancelar = threading.Event()
+        cancelado = self._cancelar.is_set
+
+        def _rodar():
+            try:
+                self._fila.put(("fim", self.triar(*argumentos, cancelado)))
+            except Exception as e:
+                traceback.print_exc()
+                self._fila.put(("erro", e))
+
         # Mostrar progresso
-        self.progress_label.config(text="Processando arquivos SPED...")
+        self.progress_label.config(text="Processando arquivo SPED...")
+        self.progress.config(mode='indeterminate', value=0)
         self.progress.pack(fill="x")
         self.progress.start(10)
-        self.parent_frame.update_idletasks()
+        self.btn_executar.config(state="disabled")
+        self.btn_cancelar.pack(fill="x", pady=(8, 0))
+        self.btn_cancelar.config(state="normal")
 
-        
-        try:
-            nf, cte = self.extrair_chaves(self.entry_sped.get())
-            
-            self.progress_label.config(text=f"Mesclando {len(nf)} NF-e encontradas...")
-            self.parent_frame.update_idletasks()
-            self.mesclar(nf, self.entry_pdfs.get(), os.path.join(self.entry_saida.get(), "NFe_unico.pdf"))
-            
-            self.progress_label.config(text=f"Mesclando {len(cte)} CT-e encontradas...")
-            self.parent_frame.update_idletasks()
-            self.mesclar(cte, self.entry_pdfs.get(), os.path.join(self.entry_saida.get(), "CTe_unico.pdf"))
-            
-            self.progress.stop()
-            self.progress.pack_forget()
-            self.progress_label.config(text="")
-            
-            messagebox.showinfo(
-                "✓ Concluído",
-                f"PDFs gerados com sucesso!\n\n"
-                f"• NF-e processadas: {len(nf)}\n"
-                f"• CT-e processadas: {len(cte)}\n\n"
-                f"Arquivos salvos em:\n{self.entry_saida.get()}"
+        threading.Thread(target=_rodar, daemon=True).start()
+        self.parent_frame.after(100, self._acompanhar)
+
+    def cancelar(self):
+        if self._cancelar is not None:
+            self._cancelar.set()
+            self.btn_cancelar.config(state="disabled")
+            self.progress_label.config(text="Cancelando...")
+
+    def _encerrar_progresso(self):
+        self._cancelar = None
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.progress_label.config(text="")
+        self.btn_cancelar.pack_forget()
+        self.btn_executar.config(state="normal")
+
+    def _acompanhar(self):
+        if not self.parent_frame.winfo_exists():
+            if self._cancelar is not None:
+                self._cancelar.set()  # a tela foi trocada no meio da triagem
+            return
+        while True:
+            try:
+                msg = self._fila.get_nowait()
+            except queue.Empty:
+                self.parent_frame.after(100, self._acompanhar)
+                return
+
+            if msg[0] == "fase":
+                self.progress_label.config(text=msg[1])
+                continue
+            if msg[0] == "progresso":
+                _, feitos, total, nome = msg
+                if str(self.progress.cget("mode")) != "determinate":
+                    self.progress.stop()
+                    self.progress.config(mode="determinate", maximum=total)
+                self.progress.config(value=feitos)
+                if not self._cancelar.is_set():
+                    self.progress_label.config(text=f"Mesclando {feitos} de {total} PDF(s) — {nome}")
+                continue
+
+            self._encerrar_progresso()
+            if msg[0] == "erro":
+                messagebox.showerror("Erro", f"Ocorreu um erro ao processar:\n{str(msg[1])}")
+            elif msg[1] is None:
+                messagebox.showinfo("Triagem SPED", "Triagem cancelada.")
+            else:
+                self._mostrar_resultado(*msg[1])
+            return
+
+    def _mostrar_resultado(self, nf, cte, plano, gravados, com_erro, pendencias):
+        faltantes = plano["faltantes"]
+        texto = (
+            f"PDFs gerados com sucesso!\n\n"
+            f"• NF-e: {len(plano['encontradas']['NFe'])} de {len(nf)} com PDF\n"
+            f"• CT-e: {len(plano['encontradas']['CTe'])} de {len(cte)} com PDF\n"
+            f"• Arquivos gerados: {len(gravados)}\n"
+        )
+        if pendencias:
+            texto += (
+                f"\nPendências:\n"
+                f"• Chaves sem PDF: {len(faltantes['NFe']) + len(faltantes['CTe'])}\n"
+                f"• PDFs fora do SPED: {len(plano['extras'])}\n"
             )
-        except Exception as e:
-            self.progress.stop()
-            self.progress.pack_forget()
-            self.progress_label.config(text="")
-            messagebox.showerror("Erro", f"Ocorreu um erro ao processar:\n{str(e)}")
\ No newline at end of file
+            if com_erro:
+                texto += f"• PDFs com erro: {len(com_erro)}\n"
+            texto += f"Detalhes em {os.path.basename(pendencias)}\n"
+        texto += f"\nArquivos salvos em:\n{self.entry_saida.get()}"
+        messagebox.showinfo("✓ Concluído", texto)
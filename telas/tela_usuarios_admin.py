@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from dao.usuario_dao import UsuarioDAO
+from dao.usuario_dao import get_usuario_dao
 from database.sessao import sessao
 from utils.constantes import CORES, MODULOS
 from utils.auxiliares import resource_path
@@ -8,7 +8,7 @@ from utils.auxiliares import resource_path
 
 class TelaUsuariosAdmin:
     def __init__(self, parent):
-        self.dao = UsuarioDAO()
+        self.dao = get_usuario_dao()
         self.usuario_atual_id = None
         self.vars_permissoes = {}
 
@@ -14,6 +14,16 @@ CLIENTE_ID = "CLIENTE001TORTAFREIDAMIAO"
 # clientes — substitua pela URL real do seu site antes de distribuir.
 URL_VERIFICACAO_LICENCA = "https://mtsistemvalidador.netlify.app/clientes.json"
 
+# ── Banco da empresa ────────────────────────────────────────────────────────
+# Em filiais com link lento até o T:\, ative para servir as consultas a partir
+# de uma cópia local do banco (database.cache_local). As gravações continuam
+# indo direto para o arquivo do compartilhamento.
+CACHE_LOCAL_EMPRESA = False
+
+# Com muitos serviços cadastrados, a tela de Serviços pode listar só os dados
+# de cada serviço e buscar os diaristas apenas quando a linha é expandida.
+SERVICOS_PARTICIPANTES_SOB_DEMANDA = False
+
 
 MODULOS = {
     "abrir_extrator": "Extrator TXT → Excel",
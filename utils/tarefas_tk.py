@@ -0,0 +1,214 @@
+"""
+Execução de consultas fora da thread do Tk.
+
+Generaliza o padrão de app.abrir_login (thread + queue.Queue + after):
+as chamadas de DAO rodam num pool de workers e o resultado volta para a
+thread do Tk por polling com widget.after, sem congelar a janela enquanto
+o banco do T:\\ responde. Cada worker usa a própria conexão SQLite (ver
+database.gerenciador_conexoes).
+
+Uso numa tela:
+
+    self.tarefas = ExecutorTk(self.parent_frame)
+    ...
+    self.tarefas.executar(
+        lambda: self.dao.listar_notas(...),      # roda no worker
+        self._exibir_notas,                       # roda no Tk com o resultado
+        chave="notas",                            # nova chamada cancela a anterior
+        indicador=self.label_carregando,
+    )
+
+Com a mesma `chave`, só o resultado do pedido mais recente é entregue:
+filtros digitados em sequência não repintam a tabela com dados velhos.
+"""
+import queue
+import threading
+import tkinter as tk
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Poucos workers: o gargalo é o compartilhamento, não a CPU
+MAX_WORKERS = 3
+INTERVALO_POLLING = 40  # ms
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obter_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS,
+                                       thread_name_prefix="consulta")
+        return _pool
+
+
+class Tarefa:
+    """Pedido em andamento. cancelar() descarta o resultado (e evita a
+    execução, se o worker ainda não a começou)."""
+
+    __slots__ = ("chave", "cancelada", "_future")
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.cancelada = False
+        self._future = None
+
+    def cancelar(self):
+        self.cancelada = True
+        if self._future is not None:
+            self._future.cancel()
+
+
+class ExecutorTk:
+    """Entrega, na thread do Tk, resultados de funções executadas no pool."""
+
+    TEXTO_CARREGANDO = "⏳ Carregando..."
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._fila = queue.Queue()
+        self._pendentes = {}      # tarefa → indicador (ou None)
+        self._por_chave = {}
+        self._textos = {}         # indicador → [texto original, tarefas usando]
+        self._polling = False
+
+    def executar(self, funcao, ao_concluir, ao_falhar=None, chave=None, indicador=None):
+        """Roda `funcao()` num worker e chama `ao_concluir(resultado)` no Tk.
+
+        ao_falhar(exc) recebe exceções do worker; sem ele o erro é impresso,
+        como os DAOs já fazem. `indicador` é um widget com a opção text
+        (ttk.Label) que mostra "Carregando..." enquanto a tarefa roda.
+        """
+        if chave is not None:
+            self.cancelar(chave)
+
+        tarefa = Tarefa(chave)
+        if chave is not None:
+            self._por_chave[chave] = tarefa
+        self._pendentes[tarefa] = indicador
+        self._mostrar_indicador(indicador)
+
+        def _rodar():
+            if tarefa.cancelada:
+                return
+            try:
+                resultado = funcao()
+            except Exception as e:
+                traceback.print_exc()
+                self._fila.put((tarefa, False, e, ao_concluir, ao_falhar))
+            else:
+                self._fila.put((tarefa, True, resultado, ao_concluir, ao_falhar))
+
+        tarefa._future = _obter_pool().submit(_rodar)
+        self._iniciar_polling()
+        return tarefa
+
+    def cancelar(self, chave=None):
+        """Cancela o pedido em andamento de `chave` (ou todos, sem chave)."""
+        if chave is None:
+            tarefas = list(self._pendentes)
+        else:
+            tarefas = [self._por_chave[chave]] if chave in self._por_chave else []
+        for tarefa in tarefas:
+            tarefa.cancelar()
+            self._finalizar(tarefa)
+
+    @property
+    def ocupado(self):
+        return bool(self._pendentes)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # ENTREGA NA THREAD DO TK
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _iniciar_polling(self):
+        if not self._polling:
+            self._polling = True
+            self._agendar()
+
+    def _agendar(self):
+        try:
+            self.widget.after(INTERVALO_POLLING, self._entregar)
+        except tk.TclError:
+            self._parar()
+
+    def _parar(self):
+        # Tela destruída: nada mais a entregar
+        self._polling = False
+        for tarefa in list(self._pendentes):
+            tarefa.cancelar()
+        self._pendentes.clear()
+        self._por_chave.clear()
+        self._textos.clear()
+
+    def _entregar(self):
+        try:
+            existe = self.widget.winfo_exists()
+        except tk.TclError:
+            existe = False
+        if not existe:
+            self._parar()
+            return
+
+        while True:
+            try:
+                tarefa, ok, valor, ao_concluir, ao_falhar = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if tarefa.cancelada:
+                continue
+            self._finalizar(tarefa)
+
+            try:
+                if ok:
+                    ao_concluir(valor)
+                elif ao_falhar:
+                    ao_falhar(valor)
+                else:
+                    print(f"Erro ao carregar dados: {valor}")
+            except Exception:
+                # Erro ao exibir não pode parar a entrega das demais tarefas
+                traceback.print_exc()
+
+        if self._pendentes:
+            self._agendar()
+        else:
+            self._polling = False
+
+    def _finalizar(self, tarefa):
+        if tarefa not in self._pendentes:
+            return
+        self._esconder_indicador(self._pendentes.pop(tarefa))
+        if self._por_chave.get(tarefa.chave) is tarefa:
+            del self._por_chave[tarefa.chave]
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # INDICADOR DE CARREGAMENTO
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _mostrar_indicador(self, indicador):
+        if indicador is None:
+            return
+        try:
+            if indicador in self._textos:
+                self._textos[indicador][1] += 1
+            else:
+                self._textos[indicador] = [indicador.cget("text"), 1]
+            indicador.configure(text=self.TEXTO_CARREGANDO)
+        except tk.TclError:
+            pass
+
+    def _esconder_indicador(self, indicador):
+        if indicador not in self._textos:
+            return
+        estado = self._textos[indicador]
+        estado[1] -= 1
+        if estado[1] > 0:
+            return  # outra tarefa ainda usa o mesmo indicador
+        del self._textos[indicador]
+        try:
+            indicador.configure(text=estado[0])
+        except tk.TclError:
+            pass
@@ -0,0 +1,213 @@
+"""
+Treeview paginada: insere as linhas aos poucos, conforme a rolagem.
+
+O ttk.Treeview cria um item Tk para cada linha inserida, então repovoar a
+tabela com milhares de notas trava a janela mesmo com a consulta já fora
+da thread do Tk. Aqui só a primeira página é inserida; quando a barra de
+rolagem se aproxima do fim, a página seguinte é buscada (paginação por
+chave, ver database.paginacao) e anexada.
+
+Uso numa tela:
+
+    self.paginas = TreeviewPaginada(self.tree, scroll_y, self._inserir_nota,
+                                    executor=self.tarefas)
+    ...
+    # primeira página já consultada no worker, junto com o total
+    self.paginas.exibir(notas, lambda ultima, limite: self.dao.listar_notas(
+        ..., apos=(ultima["data_emissao"], ultima["id"]), limite=limite))
+
+    # lista já em memória
+    self.paginas.exibir_lista(linhas)
+
+`inserir(linha, indice)` recebe a posição da linha na lista completa, para
+a zebra continuar alternando entre as páginas.
+
+CabecalhosOrdenaveis completa o par: o clique no cabeçalho refaz a consulta
+com outro ORDER BY em vez de reordenar os itens já inseridos.
+"""
+import tkinter as tk
+import traceback
+
+TAMANHO_PAGINA = 200
+# Fração da barra de rolagem a partir da qual a próxima página é buscada
+LIMIAR_ROLAGEM = 0.85
+
+
+class TreeviewPaginada:
+    """Carregamento incremental de uma ttk.Treeview."""
+
+    def __init__(self, tree, scroll_y, inserir, executor=None,
+                 tamanho_pagina=TAMANHO_PAGINA, chave="pagina"):
+        self.tree = tree
+        self.scroll_y = scroll_y
+        self.inserir = inserir
+        self.executor = executor
+        self.tamanho_pagina = tamanho_pagina
+        self.chave = chave
+
+        self._geracao = 0
+        self._buscar = None
+        self._assincrono = False
+        self._ultima = None
+        self._inseridas = 0
+        self._fim = True
+        self._carregando = False
+        self._agendado = False
+
+        tree.configure(yscrollcommand=self._ao_rolar)
+
+    @property
+    def inseridas(self):
+        """Quantidade de linhas já inseridas na Treeview."""
+        return self._inseridas
+
+    @property
+    def completa(self):
+        """True quando não há mais páginas a buscar."""
+        return self._fim
+
+    def exibir(self, primeira_pagina, buscar_pagina=None):
+        """Limpa a Treeview e mostra `primeira_pagina`.
+
+        buscar_pagina(ultima, limite) devolve as linhas seguintes a `ultima`
+        (a última linha já inserida); roda no executor, se houver. Uma página
+        menor que tamanho_pagina encerra a paginação.
+        """
+        self._reiniciar(buscar_pagina, assincrono=self.executor is not None)
+        self._anexar(primeira_pagina)
+
+    def exibir_lista(self, linhas):
+        """Como exibir(), para uma lista já em memória: as páginas seguintes
+        são fatias da própria lista, inseridas sem passar pelo executor."""
+        self._reiniciar(lambda _ultima, limite:
+                        linhas[self._inseridas:self._inseridas + limite],
+                        assincrono=False)
+        self._anexar(linhas[:self.tamanho_pagina])
+
+    def carregar_tudo(self):
+        """Insere todas as páginas restantes (ex.: antes de exportar o que
+        está na tela). Só para listas em memória ou buscas síncronas."""
+        while not self._fim and not self._assincrono:
+            self._carregar_proxima()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # PÁGINAS
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _reiniciar(self, buscar_pagina, assincrono):
+        self._geracao += 1
+        if self.executor is not None:
+            self.executor.cancelar(self.chave)
+        self.tree.delete(*self.tree.get_children())
+        self._buscar = buscar_pagina
+        self._assincrono = assincrono
+        self._ultima = None
+        self._inseridas = 0
+        self._fim = buscar_pagina is None
+        self._carregando = False
+
+    def _anexar(self, linhas):
+        for linha in linhas:
+            self.inserir(linha, self._inseridas)
+            self._inseridas += 1
+        if linhas:
+            self._ultima = linhas[-1]
+        if len(linhas) < self.tamanho_pagina:
+            self._fim = True
+        # Se a página não enche a área visível, não haverá rolagem para
+        # pedir a próxima: o yscrollcommand que o Tk dispara após inserir
+        # chega com last = 1.0 e continua a carga.
+
+    def _ao_rolar(self, primeiro, ultimo):
+        self.scroll_y.set(primeiro, ultimo)
+        if float(ultimo) >= LIMIAR_ROLAGEM and not self._fim and not self._agendado:
+            # Fora do callback de rolagem: inserir aqui reentraria no Tk
+            self._agendado = True
+            try:
+                self.tree.after_idle(self._carregar_proxima)
+            except tk.TclError:
+                pass
+
+    def _carregar_proxima(self):
+        self._agendado = False
+        if self._fim or self._carregando or self._buscar is None:
+            return
+
+        geracao = self._geracao
+        buscar, ultima, limite = self._buscar, self._ultima, self.tamanho_pagina
+
+        def receber(linhas):
+            if geracao != self._geracao:
+                return  # a tabela foi repovoada enquanto a página vinha
+            self._carregando = False
+            self._anexar(linhas)
+
+        def falhar(exc):
+            if geracao != self._geracao:
+                return
+            print(f"Erro ao carregar a próxima página: {exc}")
+            self._carregando = False
+            self._fim = True
+
+        self._carregando = True
+        if self._assincrono:
+            self.executor.executar(lambda: buscar(ultima, limite), receber,
+                                   ao_falhar=falhar, chave=self.chave)
+            return
+        try:
+            linhas = buscar(ultima, limite)
+        except Exception as e:
+            traceback.print_exc()
+            falhar(e)
+        else:
+            receber(linhas)
+
+
+class CabecalhosOrdenaveis:
+    """Cabeçalhos clicáveis cuja ordenação é feita pelo banco.
+
+    Em vez de ler as células de volta com tree.set, converter texto em
+    número/data e mover item a item, o clique só guarda o campo e o sentido
+    e chama `ao_ordenar()`; a tela refaz a consulta com ORDER BY sobre os
+    valores crus (datas ISO, REAL) e repovoa pela TreeviewPaginada.
+
+        self.ordenacao = CabecalhosOrdenaveis(
+            self.tree, {"emissao": "data_emissao", "valor": "valor"},
+            self._carregar_notas, ordem="data_emissao", descendente=True)
+        ...
+        ordem = self.ordenacao.ordem
+        self.dao.listar_notas(ordem=ordem, descendente=self.ordenacao.descendente,
+                              apos=(ultima[ordem], ultima["id"]), ...)
+    """
+
+    SETA_ASC = " ▲"
+    SETA_DESC = " ▼"
+
+    def __init__(self, tree, campos, ao_ordenar, ordem="id", descendente=True):
+        # campos: coluna da Treeview → campo de ordenação aceito pelo DAO
+        self.tree = tree
+        self.campos = campos
+        self.ao_ordenar = ao_ordenar
+        self.ordem = ordem
+        self.descendente = descendente
+        self.coluna = None  # coluna clicada (a ordem inicial não tem seta)
+
+        self._titulos = {c: tree.heading(c, "text") for c in campos}
+        for coluna in campos:
+            tree.heading(coluna, command=lambda c=coluna: self.ordenar(c))
+
+    def ordenar(self, coluna):
+        """Ordena pela coluna (segundo clique inverte o sentido)."""
+        if coluna == self.coluna:
+            self.descendente = not self.descendente
+        else:
+            self.coluna = coluna
+            self.descendente = False
+        self.ordem = self.campos[coluna]
+        self._desenhar_setas()
+        self.ao_ordenar()
+
+    def _desenhar_setas(self):
+        seta = self.SETA_DESC if self.descendente else self.SETA_ASC
+        for coluna, titulo in self._titulos.items():
+            self.tree.heading(coluna, text=titulo + (seta if coluna == self.coluna else ""))